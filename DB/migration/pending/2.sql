@@ -0,0 +1,126 @@
+alter table "public"."product" add column "search_vector" tsvector;
+
+alter table "public"."case_study" add column "search_vector" tsvector;
+
+CREATE INDEX ix_product_search_vector ON public.product USING gin (search_vector);
+
+CREATE INDEX ix_case_study_search_vector ON public.case_study USING gin (search_vector);
+
+update "public"."product" p
+set search_vector = to_tsvector(concat(p.name, p.summary, s.name))
+from "public"."supplier" s
+where s.code = p.supplier_code;
+
+update "public"."case_study" c
+set search_vector = to_tsvector(concat(s.name, c.data->>'title', c.data->>'approach'))
+from "public"."supplier" s
+where s.code = c.supplier_code;
+
+CREATE INDEX ix_team_member_team_id ON public.team_member USING btree (team_id);
+
+CREATE INDEX ix_team_member_user_id ON public.team_member USING btree (user_id);
+
+CREATE INDEX ix_team_brief_brief_id ON public.team_brief USING btree (brief_id);
+
+CREATE INDEX ix_team_brief_team_id ON public.team_brief USING btree (team_id);
+
+CREATE INDEX ix_brief_user_user_id ON public.brief_user USING btree (user_id);
+
+DROP INDEX IF EXISTS public.ix_audit_event_type;
+
+DROP INDEX IF EXISTS public.ix_audit_event_created_at;
+
+DROP INDEX IF EXISTS public.ix_audit_event_acknowledged;
+
+CREATE INDEX ix_audit_event_created_at_id ON public.audit_event USING btree (created_at, id);
+
+CREATE INDEX ix_audit_event_type_created_at_id ON public.audit_event USING btree (type, created_at, id);
+
+CREATE INDEX ix_audit_event_acknowledged_created_at_id ON public.audit_event USING btree (acknowledged, created_at, id);
+
+CREATE INDEX ix_audit_event_object_created_at ON public.audit_event USING btree (object_type, object_id, created_at);
+
+CREATE TABLE public.archived_audit_event (
+    id integer NOT NULL,
+    type character varying NOT NULL,
+    created_at timestamp without time zone NOT NULL,
+    "user" character varying,
+    data json,
+    object_type character varying,
+    object_id bigint,
+    acknowledged boolean NOT NULL,
+    acknowledged_by character varying,
+    acknowledged_at timestamp without time zone,
+    CONSTRAINT archived_audit_event_pkey PRIMARY KEY (id)
+);
+
+CREATE INDEX ix_archived_audit_event_created_at_id ON public.archived_audit_event USING btree (created_at, id);
+
+CREATE INDEX ix_archived_audit_event_type_created_at_id ON public.archived_audit_event USING btree (type, created_at, id);
+
+CREATE INDEX ix_archived_audit_event_acknowledged_created_at_id ON public.archived_audit_event USING btree (acknowledged, created_at, id);
+
+CREATE INDEX ix_archived_audit_event_object_created_at ON public.archived_audit_event USING btree (object_type, object_id, created_at);
+
+CREATE TABLE public.brief_invited_supplier (
+    brief_id integer NOT NULL,
+    supplier_code bigint NOT NULL,
+    CONSTRAINT brief_invited_supplier_pkey PRIMARY KEY (brief_id, supplier_code),
+    CONSTRAINT brief_invited_supplier_brief_id_fkey FOREIGN KEY (brief_id) REFERENCES public.brief(id) ON DELETE CASCADE
+);
+
+CREATE INDEX ix_brief_invited_supplier_supplier_code ON public.brief_invited_supplier USING btree (supplier_code);
+
+INSERT INTO public.brief_invited_supplier (brief_id, supplier_code)
+SELECT DISTINCT brief.id, sellers.code::bigint
+FROM public.brief,
+    json_object_keys(
+        CASE WHEN json_typeof(brief.data->'sellers') = 'object' THEN brief.data->'sellers' ELSE '{}'::json END
+    ) AS sellers(code)
+WHERE sellers.code ~ '^[0-9]+$';
+
+ALTER TABLE public.brief ADD COLUMN seller_selector character varying;
+
+ALTER TABLE public.brief ADD COLUMN open_to character varying;
+
+ALTER TABLE public.brief ADD COLUMN area_of_expertise character varying;
+
+UPDATE public.brief SET
+    seller_selector = CASE WHEN json_typeof(data->'sellerSelector') = 'string' THEN data->>'sellerSelector' END,
+    open_to = CASE WHEN json_typeof(data->'openTo') = 'string' THEN data->>'openTo' END,
+    area_of_expertise = CASE WHEN json_typeof(data->'areaOfExpertise') = 'string' THEN data->>'areaOfExpertise' END;
+
+CREATE INDEX ix_brief_seller_selector ON public.brief USING btree (seller_selector);
+
+CREATE INDEX ix_brief_area_of_expertise ON public.brief USING btree (area_of_expertise);
+
+ALTER TABLE public.brief ADD COLUMN responses_zip_status character varying;
+
+ALTER TABLE public.brief ADD COLUMN responses_zip_queued_at timestamp without time zone;
+
+ALTER TABLE public.brief ADD COLUMN responses_zip_started_at timestamp without time zone;
+
+ALTER TABLE public.brief ADD COLUMN responses_zip_finished_at timestamp without time zone;
+
+UPDATE public.brief SET responses_zip_status = 'done' WHERE responses_zip_filesize IS NOT NULL;
+
+ALTER TABLE public.brief ADD COLUMN responses_submitted_count integer DEFAULT 0 NOT NULL;
+
+ALTER TABLE public.brief ADD COLUMN responses_draft_count integer DEFAULT 0 NOT NULL;
+
+ALTER TABLE public.brief ADD COLUMN responses_withdrawn_count integer DEFAULT 0 NOT NULL;
+
+UPDATE public.brief SET
+    responses_submitted_count = counts.submitted,
+    responses_draft_count = counts.draft,
+    responses_withdrawn_count = counts.withdrawn
+FROM (
+    SELECT
+        brief_id,
+        count(*) FILTER (WHERE withdrawn_at IS NULL AND submitted_at IS NOT NULL) AS submitted,
+        count(*) FILTER (WHERE withdrawn_at IS NULL AND submitted_at IS NULL) AS draft,
+        count(*) FILTER (WHERE withdrawn_at IS NOT NULL) AS withdrawn
+    FROM public.brief_response
+    GROUP BY brief_id
+) AS counts
+WHERE brief.id = counts.brief_id;
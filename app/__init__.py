@@ -1,5 +1,5 @@
 from functools import wraps
-from flask import Flask
+from flask import Flask, current_app
 import logging
 import dmapiclient
 from dmutils import init_app, flask_featureflags
@@ -8,6 +8,7 @@ from config import configs
 
 from .modelsbase import MySQLAlchemy as SQLAlchemy
 from .modelsbase import enc, CustomEncoder
+from .engine import set_statement_timeout
 from . import logs
 
 from .utils import log
@@ -18,9 +19,11 @@ from sqltap.wsgi import SQLTapMiddleware
 import redis
 from flask_kvsession import KVSessionExtension
 from simplekv.memory.redisstore import RedisStore
+from flask_caching import Cache
 
 
 db = SQLAlchemy()
+cache = Cache()
 
 search_api_client = dmapiclient.SearchAPIClient()
 
@@ -36,25 +39,26 @@ def create_app(config_name):
         search_api_client=search_api_client
     )
 
+    redis_client = None
+    if application.config['REDIS_SESSIONS'] or application.config['CACHE_TYPE'] == 'redis':
+        redis_client = redis.StrictRedis(**get_redis_options(application.config))
+
     if application.config['REDIS_SESSIONS']:
-        vcap_services = parse_vcap_services()
-        redis_opts = {
-            'ssl': application.config['REDIS_SSL'],
-            'ssl_ca_certs': application.config['REDIS_SSL_CA_CERTS'],
-            'ssl_cert_reqs': application.config['REDIS_SSL_HOST_REQ']
-        }
-        if vcap_services and 'redis' in vcap_services:
-            redis_opts['host'] = vcap_services['redis'][0]['credentials']['hostname']
-            redis_opts['port'] = vcap_services['redis'][0]['credentials']['port']
-            redis_opts['password'] = vcap_services['redis'][0]['credentials']['password']
-        else:
-            redis_opts['host'] = application.config['REDIS_SERVER_HOST']
-            redis_opts['port'] = application.config['REDIS_SERVER_PORT']
-            redis_opts['password'] = application.config['REDIS_SERVER_PASSWORD']
-
-        session_store = RedisStore(redis.StrictRedis(**redis_opts))
+        session_store = RedisStore(redis_client)
         KVSessionExtension(session_store, application)
 
+    init_cache(application, redis_client)
+
+    if application.config['PUBLISH_BATCHED']:
+        from .tasks import publish_tasks
+        application.before_request(publish_tasks.start_batch)
+        application.teardown_request(publish_tasks.flush_batch)
+
+    # AUDIT_BUFFERED is checked per request, see AuditService.start_request_buffer
+    from .api.services import audit_service
+    application.before_request(audit_service.start_request_buffer)
+    application.teardown_request(audit_service.flush_buffer)
+
     if not application.config['DM_API_AUTH_TOKENS']:
         raise Exception("No DM_API_AUTH_TOKENS provided")
 
@@ -113,6 +117,58 @@ def isolation_level(level):
     return decorator
 
 
+def statement_timeout(route_class):
+    """Return a Flask view decorator to set the statement timeout for a class of routes
+
+    The timeouts are in DB_STATEMENT_TIMEOUTS and last for the view's transaction.
+
+    Usage::
+        @view("/reports/thingy", methods=["GET"])
+        @statement_timeout("report")
+        def get_thingy_report():
+            ...
+    """
+    def decorator(view):
+        @wraps(view)
+        def view_wrapper(*args, **kwargs):
+            timeout = current_app.config['DB_STATEMENT_TIMEOUTS'].get(route_class)
+            if timeout:
+                set_statement_timeout(db.session, timeout)
+            return view(*args, **kwargs)
+        return view_wrapper
+    return decorator
+
+
+def get_redis_options(config):
+    vcap_services = parse_vcap_services()
+    redis_opts = {
+        'ssl': config['REDIS_SSL'],
+        'ssl_ca_certs': config['REDIS_SSL_CA_CERTS'],
+        'ssl_cert_reqs': config['REDIS_SSL_HOST_REQ']
+    }
+    if vcap_services and 'redis' in vcap_services:
+        redis_opts['host'] = vcap_services['redis'][0]['credentials']['hostname']
+        redis_opts['port'] = vcap_services['redis'][0]['credentials']['port']
+        redis_opts['password'] = vcap_services['redis'][0]['credentials']['password']
+    else:
+        redis_opts['host'] = config['REDIS_SERVER_HOST']
+        redis_opts['port'] = config['REDIS_SERVER_PORT']
+        redis_opts['password'] = config['REDIS_SERVER_PASSWORD']
+    return redis_opts
+
+
+def init_cache(application, redis_client=None):
+    """Set up the shared cache. Deployed environments share one redis cache across processes, so
+    entries can be invalidated from whichever process writes the underlying rows.
+    """
+    cache_config = {}
+    if application.config['CACHE_TYPE'] == 'redis':
+        cache_config['CACHE_REDIS_HOST'] = (
+            redis_client or redis.StrictRedis(**get_redis_options(application.config))
+        )
+    cache.init_app(application, config=cache_config)
+
+
 def parse_vcap_services():
     import os
     import json
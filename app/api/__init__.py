@@ -40,8 +40,7 @@ def load_user(userid):
 def get_notification_count(user):
     notification_count = None
     if user.role == 'supplier':
-        errors_warnings = supplier_business.get_supplier_messages(user.supplier_code, False)
-        notification_count = len(errors_warnings.errors + errors_warnings.warnings)
+        notification_count = supplier_business.get_notification_count(user.supplier_code)
 
     return notification_count
 
@@ -18,10 +18,10 @@ from app.api.business.validators import (ATMDataValidator, RFXDataValidator,
                                          TrainingDataValidator)
 from app.datetime_utils import combine_date_and_time, parse_time_of_day
 from app.emails import (send_opportunity_edited_email_to_buyers,
-                        send_opportunity_edited_email_to_seller,
-                        send_seller_invited_to_rfx_email,
-                        send_seller_invited_to_training_email,
-                        send_specialist_brief_seller_invited_email)
+                        send_opportunity_edited_email_to_sellers,
+                        send_sellers_invited_to_rfx_email,
+                        send_sellers_invited_to_training_email,
+                        send_specialist_brief_sellers_invited_email)
 from app.models import Brief, BriefHistory, ValidationError
 from app.tasks import publish_tasks
 
@@ -229,18 +229,19 @@ def edit_opportunity(user_id, brief_id, edits):
     brief_service.commit_changes()
 
     if len(sellers_to_contact) > 0 and organisation:
-        for email_address in sellers_to_contact:
-            send_opportunity_edited_email_to_seller(brief, email_address, organisation)
-
-    for code, data in sellers_to_invite.items():
-        supplier = supplier_service.get_supplier_by_code(code)
-        if supplier:
-            if brief.lot.slug == 'rfx':
-                send_seller_invited_to_rfx_email(brief, supplier)
-            elif brief.lot.slug == 'specialist':
-                send_specialist_brief_seller_invited_email(brief, supplier)
-            elif brief.lot.slug == 'training':
-                send_seller_invited_to_training_email(brief, supplier)
+        send_opportunity_edited_email_to_sellers(brief, sellers_to_contact, organisation)
+
+    invited_suppliers = [
+        supplier
+        for supplier in (supplier_service.get_supplier_by_code(code) for code in sellers_to_invite.keys())
+        if supplier
+    ]
+    if brief.lot.slug == 'rfx':
+        send_sellers_invited_to_rfx_email(brief, invited_suppliers)
+    elif brief.lot.slug == 'specialist':
+        send_specialist_brief_sellers_invited_email(brief, invited_suppliers)
+    elif brief.lot.slug == 'training':
+        send_sellers_invited_to_training_email(brief, invited_suppliers)
 
     send_opportunity_edited_email_to_buyers(brief, user, edit)
 
@@ -429,8 +430,14 @@ def get_opportunity_history(brief_id, show_documents=False, include_sellers=True
         }
     }
 
-    edits = []
     changes = brief_history_service.get_edits(brief.id)
+    response['edits'] = get_opportunity_edits(brief, changes, show_documents, include_sellers)
+
+    return response
+
+
+def get_opportunity_edits(brief, changes, show_documents=False, include_sellers=True):
+    edits = []
 
     for i, change in enumerate(changes):
         source = brief if i == 0 else changes[i - 1]
@@ -449,16 +456,18 @@ def get_opportunity_history(brief_id, show_documents=False, include_sellers=True
                     del edit_data['responseTemplate']
             edits.append(edit_data)
 
-    response['edits'] = edits
-
-    return response
+    return edits
 
 
 def only_sellers_were_edited(brief_id):
     history = get_opportunity_history(brief_id, show_documents=True)
+    return edits_only_changed_sellers(history['edits'])
+
+
+def edits_only_changed_sellers(edits):
     only_sellers_edited = False
 
-    for edit in history['edits']:
+    for edit in edits:
         for key, value in edit.iteritems():
             if key != 'editedAt' and key != 'sellers':
                 return False
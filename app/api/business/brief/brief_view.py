@@ -0,0 +1,88 @@
+from app.api.business.brief import brief_business
+from app.api.business.brief.brief_edit_business import (edits_only_changed_sellers,
+                                                        get_opportunity_edits)
+from app.api.business.brief.user_status import BriefUserStatus
+from app.api.services import (brief_history_service, brief_responses_service,
+                              briefs, domain_service)
+
+
+class BriefViewContext(object):
+    """What the brief page shows alongside a brief, gathered in a small fixed number of queries.
+
+    Response counts are read from the brief's counters, or from one aggregate when the seller's own responses
+    are needed too, rather than fetching every response. The edit history is read once for both the last
+    edited date and whether only the sellers were edited, and the domains come from the in-process domain cache.
+    A seller's evidence, assessments, applications and agreement are read together up front.
+    """
+
+    def __init__(self, brief, current_user):
+        self.brief = brief
+        self.current_user = current_user
+        self.user_role = current_user.role if hasattr(current_user, 'role') else None
+        self.supplier_code = current_user.supplier_code if self.user_role == 'supplier' else None
+        self.is_buyer = self.user_role == 'buyer'
+        self.is_brief_owner = self.is_buyer and briefs.has_permission_to_brief(current_user.id, brief.id)
+
+    def load(self):
+        brief = self.brief
+        invited_sellers = brief.data['sellers'] if 'sellers' in brief.data else {}
+        if self.supplier_code:
+            counts = brief_responses_service.get_brief_response_counts(brief.id, self.supplier_code)
+        else:
+            counts = {
+                'submitted': brief.responses_submitted_count,
+                'supplier_total': 0,
+                'supplier_submitted': 0,
+                'supplier_draft': 0,
+                'supplier_latest_id': None
+            }
+        changes = brief_history_service.get_edits(brief.id)
+
+        supplier_brief_response_id = 0
+        supplier_brief_response_is_draft = False
+        if counts['supplier_total'] == 1:
+            supplier_brief_response_id = counts['supplier_latest_id']
+            supplier_brief_response_is_draft = counts['supplier_draft'] == 1
+
+        # gather facts about the user's status against this brief
+        user_status = BriefUserStatus(brief, self.current_user)
+        user_status.load_supplier_facts()
+
+        return {
+            'brief_response_count': counts['submitted'],
+            'invited_seller_count': len(invited_sellers),
+            'has_chosen_brief_category': user_status.has_chosen_brief_category(),
+            'evidence_id': user_status.evidence_id_in_draft(),
+            'evidence_id_rejected': user_status.evidence_id_rejected(),
+            'supplier_brief_response_count': counts['supplier_total'],
+            'supplier_brief_response_count_submitted': counts['supplier_submitted'],
+            'supplier_brief_response_count_draft': counts['supplier_draft'],
+            'supplier_brief_response_id': supplier_brief_response_id,
+            'supplier_brief_response_is_draft': supplier_brief_response_is_draft,
+            'can_respond': user_status.can_respond(),
+            'has_evidence_in_draft_for_category': user_status.has_evidence_in_draft_for_category(),
+            'has_latest_evidence_rejected_for_category': user_status.has_latest_evidence_rejected_for_category(),
+            'is_assessed_for_category': user_status.is_assessed_for_category(),
+            'is_assessed_in_any_category': user_status.is_assessed_in_any_category(),
+            'is_approved_seller': user_status.is_approved_seller(),
+            'is_awaiting_application_assessment': user_status.is_awaiting_application_assessment(),
+            'is_awaiting_domain_assessment': user_status.is_awaiting_domain_assessment(),
+            'has_been_assessed_for_brief': user_status.has_been_assessed_for_brief(),
+            'open_to_all': brief_business.is_open_to_all(brief),
+            'open_to_category': brief.lot.slug == 'atm' and brief.data.get('openTo', '') == 'category',
+            'is_brief_owner': self.is_brief_owner,
+            'is_buyer': self.is_buyer,
+            'is_applicant': self.user_role == 'applicant',
+            'is_recruiter_only': user_status.is_recruiter_only(),
+            'is_invited': user_status.is_invited(),
+            'has_responded': (
+                self.user_role == 'supplier' and user_status.has_enough_responses(counts['supplier_submitted'])
+            ),
+            'has_supplier_errors': user_status.has_supplier_errors(),
+            'has_signed_current_agreement': user_status.has_signed_current_agreement(),
+            'last_edited_at': changes[0].edited_at if changes else None,
+            'only_sellers_edited': edits_only_changed_sellers(
+                get_opportunity_edits(brief, changes, show_documents=True)
+            ),
+            'domains': domain_service.get_cached_active_domains()
+        }
@@ -1,17 +1,30 @@
+from collections import namedtuple
+
 import pendulum
 
 from app.api.business.agreement_business import has_signed_current_agreement
 from app.api.business.validators import SupplierValidator
 from app.api.services import (application_service, assessments,
                               brief_responses_service, domain_service,
-                              evidence_service, lots_service,
-                              signed_agreement_service, suppliers)
+                              evidence_service, signed_agreement_service,
+                              suppliers)
+
+LatestEvidence = namedtuple('LatestEvidence', ['id', 'status'])
 
 
 class BriefUserStatus(object):
+    """Answers what a user can see and do on a brief.
+
+    Each underlying fact (the supplier's latest evidence for the brief's category, its open assessments,
+    validation errors, signed agreement and so on) is loaded the first time a question needs it and kept
+    for the life of the status. Asking every question costs one lookup per fact, not one per question, and
+    `load_supplier_facts` reads the supplier's facts together when most of the questions will be asked.
+    """
+
     def __init__(self, brief, current_user):
         self.brief = brief
         self.current_user = current_user
+        self.facts = {}
         self.supplier = None
         self.supplier_code = None
         self.user_role = current_user.role if hasattr(current_user, 'role') else None
@@ -28,6 +41,50 @@ class BriefUserStatus(object):
             )
             self.invited_sellers = self.brief.data['sellers'] if 'sellers' in self.brief.data else {}
 
+    def fact(self, name, load):
+        if name not in self.facts:
+            self.facts[name] = load()
+        return self.facts[name]
+
+    def load_supplier_facts(self):
+        if not self.supplier:
+            return
+        facts = suppliers.get_supplier_brief_facts(
+            self.supplier_code,
+            self.brief.id,
+            int(self.brief_category) if self.brief_category else None
+        )
+        self.facts['latest_evidence'] = (
+            LatestEvidence(facts['latest_evidence_id'], facts['latest_evidence_status'])
+            if facts['latest_evidence_id'] else None
+        )
+        for name in ['has_open_assessment', 'has_submitted_application', 'has_been_assessed_for_brief',
+                     'has_signed_current_agreement']:
+            self.facts[name] = facts[name]
+
+    def latest_evidence(self):
+        def load():
+            if self.supplier and self.brief_category:
+                evidence = evidence_service.get_latest_evidence_for_supplier_and_domain(
+                    int(self.brief_category),
+                    self.supplier_code
+                )
+                if evidence:
+                    return LatestEvidence(evidence.id, evidence.status)
+            return None
+
+        return self.fact('latest_evidence', load)
+
+    def assessed_domains(self):
+        return self.fact('assessed_domains', lambda: self.supplier.assessed_domains if self.supplier else [])
+
+    def unassessed_domains(self):
+        return self.fact('unassessed_domains', lambda: self.supplier.unassessed_domains if self.supplier else [])
+
+    def latest_evidence_status(self):
+        evidence = self.latest_evidence()
+        return evidence.status if evidence else None
+
     def is_approved_seller(self):
         if self.supplier:
             return True
@@ -40,74 +97,46 @@ class BriefUserStatus(object):
         return False
 
     def is_assessed_in_any_category(self):
-        if self.supplier and len(self.supplier.assessed_domains) > 0:
+        if len(self.assessed_domains()) > 0:
             return True
         return False
 
     def has_chosen_brief_category(self):
-        if self.supplier and self.brief_domain and self.brief_domain.name in self.supplier.unassessed_domains:
+        if self.brief_domain and self.brief_domain.name in self.unassessed_domains():
             return True
         return False
 
     def has_evidence_in_draft_for_category(self):
-        if self.supplier and self.brief_category:
-            evidence = evidence_service.get_latest_evidence_for_supplier_and_domain(
-                int(self.brief_category),
-                self.supplier_code
-            )
-            if evidence and evidence.status == 'draft':
-                return True
-        return False
+        return self.latest_evidence_status() == 'draft'
 
     def has_latest_evidence_rejected_for_category(self):
-        if self.supplier and self.brief_category:
-            evidence = evidence_service.get_latest_evidence_for_supplier_and_domain(
-                int(self.brief_category),
-                self.supplier_code
-            )
-            if evidence and evidence.status == 'rejected':
-                return True
-        return False
+        return self.latest_evidence_status() == 'rejected'
 
     def evidence_id_in_draft(self):
         if self.has_evidence_in_draft_for_category():
-            evidence = evidence_service.get_latest_evidence_for_supplier_and_domain(
-                int(self.brief_category),
-                self.supplier_code
-            )
-            return evidence.id
+            return self.latest_evidence().id
         return None
 
     def evidence_id_rejected(self):
         if self.has_latest_evidence_rejected_for_category():
-            evidence = evidence_service.get_latest_evidence_for_supplier_and_domain(
-                int(self.brief_category),
-                self.supplier_code
-            )
-            if evidence and evidence.status == 'rejected':
-                return evidence.id
+            return self.latest_evidence().id
         return None
 
     def is_assessed_for_category(self):
-        if self.supplier and self.brief_domain and self.brief_domain.name in self.supplier.assessed_domains:
+        if self.brief_domain and self.brief_domain.name in self.assessed_domains():
             return True
         return False
 
     def is_awaiting_domain_assessment(self):
-        if self.supplier and self.brief_category:
-            evidence = evidence_service.get_latest_evidence_for_supplier_and_domain(
-                int(self.brief_category),
-                self.supplier_code
-            )
-            if evidence and evidence.status == 'submitted':
-                return True
+        if self.latest_evidence_status() == 'submitted':
+            return True
 
         if (
             self.supplier and self.brief_category and self.brief.data.get('openTo', '') == 'all' and
-            assessments.get_open_assessments(
+            self.fact('has_open_assessment', lambda: bool(assessments.get_open_assessments(
                 domain_id=int(self.brief_category),
                 supplier_code=self.supplier_code
-            )
+            )))
         ):
             return True
 
@@ -116,12 +145,16 @@ class BriefUserStatus(object):
     def is_awaiting_application_assessment(self):
         if (
             self.supplier_code and
-            application_service.get_submitted_application_ids(supplier_code=self.supplier_code)
+            self.fact('has_submitted_application', lambda: bool(application_service.get_submitted_application_ids(
+                supplier_code=self.supplier_code
+            )))
         ):
             return True
 
         if self.user_role == 'applicant':
-            application = application_service.find(id=self.current_user.application_id).one_or_none()
+            application = self.fact('application', lambda: application_service.find(
+                id=self.current_user.application_id
+            ).one_or_none())
             if application and application.status == 'submitted' and application.type == 'new':
                 return True
 
@@ -149,14 +182,13 @@ class BriefUserStatus(object):
         return False
 
     def has_been_assessed_for_brief(self):
-        if self.supplier and evidence_service.supplier_has_assessment_for_brief(
-            self.supplier_code,
-            self.brief.id
-        ):
-            return True
-        if self.supplier and assessments.supplier_has_assessment_for_brief(self.supplier_code, self.brief.id):
-            return True
-        return False
+        def load():
+            return bool(self.supplier and (
+                evidence_service.supplier_has_assessment_for_brief(self.supplier_code, self.brief.id) or
+                assessments.supplier_has_assessment_for_brief(self.supplier_code, self.brief.id)
+            ))
+
+        return self.fact('has_been_assessed_for_brief', load)
 
     def can_respond_to_atm_opportunity(self):
         open_to = self.brief.data.get('openTo', '')
@@ -216,24 +248,23 @@ class BriefUserStatus(object):
 
     def has_responded(self, submitted_only=True):
         if self.user_role == 'supplier':
-            responses = brief_responses_service.get_brief_responses(
-                self.brief.id, self.supplier_code, submitted_only=submitted_only
-            )
-            brief_response_count = len(responses)
-            lot = lots_service.find(
-                slug='specialist'
-            ).one_or_none()
-            if self.brief.lot_id == lot.id:
-                return brief_response_count >= int(self.brief.data.get('numberOfSuppliers', 0))
-            elif brief_response_count > 0:
-                return True
+            count = self.fact('response_count:{}'.format(submitted_only), lambda: (
+                brief_responses_service.count_brief_responses(
+                    self.brief.id, self.supplier_code, submitted_only=submitted_only
+                )
+            ))
+            return self.has_enough_responses(count)
         return False
 
+    def has_enough_responses(self, brief_response_count):
+        if self.brief.lot.slug == 'specialist':
+            return brief_response_count >= int(self.brief.data.get('numberOfSuppliers', 0))
+        return brief_response_count > 0
+
     def has_supplier_errors(self):
         if self.user_role != 'supplier':
             return False
-        supplier_validator = SupplierValidator(self.supplier)
-        messages = supplier_validator.validate_all()
+        messages = self.fact('supplier_messages', lambda: SupplierValidator(self.supplier).validate_all())
         if len(messages.errors) > 0:
             return True
         return False
@@ -242,4 +273,4 @@ class BriefUserStatus(object):
         if self.user_role != 'supplier':
             return True
 
-        return has_signed_current_agreement(self.supplier)
+        return self.fact('has_signed_current_agreement', lambda: has_signed_current_agreement(self.supplier))
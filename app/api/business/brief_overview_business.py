@@ -11,9 +11,9 @@ from app.api.services import briefs as brief_service
 from app.api.services import users
 from app.emails import (send_opportunity_closed_early_email,
                         send_opportunity_withdrawn_email_to_buyers,
-                        send_opportunity_withdrawn_email_to_seller)
+                        send_opportunity_withdrawn_email_to_sellers)
 from app.tasks import publish_tasks
-from app.tasks.s3 import create_responses_zip
+from app.tasks.s3 import queue_responses_zip
 from app.validation import get_sections as get_validation_sections
 
 
@@ -58,7 +58,7 @@ def close_opportunity_early(user_id, brief_id):
         raise NotFoundError('User {} does not exist'.format(user_id))
 
     brief = brief_service.close_opportunity_early(brief)
-    create_responses_zip(brief.id)
+    queue_responses_zip(brief.id)
     send_opportunity_closed_early_email(brief, user)
 
     try:
@@ -105,8 +105,7 @@ def withdraw_opportunity(user_id, brief_id, withdrawal_reason):
     organisation = agency_service.get_agency_name(user.agency_id)
     sellers_to_contact = brief_service.get_sellers_to_notify(brief, brief_business.is_open_to_all(brief))
 
-    for email_address in sellers_to_contact:
-        send_opportunity_withdrawn_email_to_seller(brief, email_address, organisation)
+    send_opportunity_withdrawn_email_to_sellers(brief, sellers_to_contact, organisation)
 
     send_opportunity_withdrawn_email_to_buyers(brief, user)
 
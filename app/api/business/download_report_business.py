@@ -12,26 +12,39 @@ from app.api.csv import (
     generate_training_opportunities_csv
 )
 
+ROWS_PER_FETCH = 1000
 
-def get_result(current_user, report_type, start_date, end_date):
+
+def stream_rows(query):
+    # yield_per fetches through a server side cursor, so only one batch of rows is held at a time
+    for row in query.yield_per(ROWS_PER_FETCH):
+        yield row._asdict()
+
+
+def get_result(current_user, report_type, start_date, end_date, stream=False):
+    """Return the report file name, the report rows and the csv generator for the rows.
+
+    With `stream` the rows are a generator over a server side cursor, to be consumed once, within the
+    current request, by the csv generator.
+    """
     csv_generator = None
-    result = None
+    query = None
     report_file_name = None
 
     if report_type == 'sellersCatalogue':
-        result = suppliers.get_approved_suppliers()
+        query = suppliers.get_approved_suppliers_query()
         csv_generator = generate_seller_catalogue_csv
         report_file_name = 'current-approved-seller-catalogue.csv'
 
     elif report_type == 'sellerResponses':
-        result = briefs.get_all_user_seller_responses_within_date_range(
+        query = briefs.get_all_user_seller_responses_within_date_range_query(
             current_user.id, start_date, end_date
         )
         csv_generator = generate_seller_responses_csv
         report_file_name = "seller_responses_within_" + start_date + "_and_" + end_date + ".csv"
 
     elif report_type == 'specialist':
-        result = briefs.get_oppportunities_for_download(
+        query = briefs.get_oppportunities_for_download_query(
             current_user.id,
             start_date,
             end_date,
@@ -43,12 +56,12 @@ def get_result(current_user, report_type, start_date, end_date):
         report_file_name = "specialist_opportunities_within_" + start_date + "_and_" + end_date + ".csv"
 
     elif report_type == 'atm':
-        result = briefs.get_oppportunities_for_download(current_user.id, start_date, end_date, ['atm'])
+        query = briefs.get_oppportunities_for_download_query(current_user.id, start_date, end_date, ['atm'])
         csv_generator = generate_atm_opportunities_csv
         report_file_name = "atm_opportunities_within_" + start_date + "_and_" + end_date + ".csv"
 
     elif report_type == 'rfx':
-        result = briefs.get_oppportunities_for_download(
+        query = briefs.get_oppportunities_for_download_query(
             current_user.id,
             start_date,
             end_date,
@@ -60,8 +73,12 @@ def get_result(current_user, report_type, start_date, end_date):
         report_file_name = "rfx_opportunities_within_" + start_date + "_and_" + end_date + ".csv"
 
     elif report_type == 'training':
-        result = briefs.get_oppportunities_for_download(current_user.id, start_date, end_date, ['training2'])
+        query = briefs.get_oppportunities_for_download_query(current_user.id, start_date, end_date, ['training2'])
         csv_generator = generate_training_opportunities_csv
         report_file_name = "training_opportunities_within_" + start_date + "_and_" + end_date + ".csv"
 
+    result = None
+    if query is not None:
+        result = stream_rows(query) if stream else [r._asdict() for r in query.all()]
+
     return report_file_name, result, csv_generator
@@ -1,12 +1,19 @@
 import collections
 
 import pendulum
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm.session import Session
 
+from app import cache
 from app.api.business.agreement_business import (get_current_agreement,
                                                  get_new_agreement,
                                                  has_signed_current_agreement)
 from app.api.business.validators import SupplierValidator
 from app.api.services import application_service, key_values_service, suppliers
+from app.caching import delete_after_commit
+from app.models import (Application, CaseStudy, SignedAgreement, Supplier,
+                        SupplierDomain)
 
 
 def abn_is_used(abn):
@@ -77,3 +84,70 @@ def get_supplier_messages(code, skip_application_check):
             })
 
     return validation_result
+
+
+def notification_count_cache_key(code):
+    return 'supplier-notification-count:{}'.format(code)
+
+
+def get_notification_count(code):
+    """Return the number of errors and warnings `get_supplier_messages` reports for a supplier.
+
+    The count is shown on every page, so it is cached rather than running the full validator on each
+    request. Writes to the supplier's rows clear it (see `clear_stale_notification_counts`) and the timeout
+    covers the messages that change with time alone, such as documents expiring or a new master agreement
+    starting.
+    """
+    key = notification_count_cache_key(code)
+    notification_count = cache.get(key)
+    if notification_count is None:
+        messages = get_supplier_messages(code, False)
+        notification_count = len(messages.errors + messages.warnings)
+        cache.set(key, notification_count, timeout=current_app.config['NOTIFICATION_COUNT_CACHE_TIMEOUT'])
+
+    return notification_count
+
+
+NOTIFICATION_SOURCES = (Application, CaseStudy, SignedAgreement, Supplier, SupplierDomain)
+
+
+@event.listens_for(Session, 'after_flush')
+def clear_stale_notification_counts(session, flush_context):
+    changed = [
+        obj for obj in list(session.new) + list(session.dirty) + list(session.deleted)
+        if isinstance(obj, NOTIFICATION_SOURCES) and (obj not in session.dirty or session.is_modified(obj))
+    ]
+    if not changed:
+        return
+
+    codes = set()
+    supplier_ids = set()
+    for obj in changed:
+        if isinstance(obj, Supplier):
+            codes.add(obj.code)
+        elif isinstance(obj, SupplierDomain):
+            supplier = None
+            if obj.supplier_id is not None:
+                key = Supplier.__mapper__.identity_key_from_primary_key([obj.supplier_id])
+                supplier = session.identity_map.get(key)
+            if supplier is None:
+                supplier_ids.add(obj.supplier_id)
+            else:
+                codes.add(supplier.code)
+        else:
+            codes.add(obj.supplier_code)
+
+    # only suppliers that aren't already loaded in the session need looking up
+    supplier_ids.discard(None)
+    if supplier_ids:
+        codes.update(
+            code for code, in session.connection().execute(
+                Supplier.__table__.select()
+                .with_only_columns([Supplier.__table__.c.code])
+                .where(Supplier.__table__.c.id.in_(supplier_ids))
+            )
+        )
+
+    codes.discard(None)
+    if codes:
+        delete_after_commit(session, *[notification_count_cache_key(code) for code in codes])
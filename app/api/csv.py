@@ -11,7 +11,13 @@ def csv_cell_sanitize(text):
     return re.sub(r"^(;|=|\+|-|@|!|\|{|}|\[|\]|<|,)+", '', unicode(text).strip())
 
 
+ROWS_PER_CHUNK = 500
+
+
 def convert_to_csv(data, convertor_function, transpose=False):
+    if not transpose:
+        return u''.join(stream_csv(data, convertor_function))
+
     # convert the responses to a list - each row is a dict representing a brief response
     rows = [convertor_function(d) for d in data]
     # add the keys of a dict as the first element in the rows list, to be used as headers
@@ -21,17 +27,44 @@ def convert_to_csv(data, convertor_function, transpose=False):
 
     csvdata = StringIO()
     with csvx.Writer(csvdata) as csv_out:
-        if transpose:
-            # convert the rows to a zip'd list - this creates a structure so the csv's
-            # first column is the headers and the
-            # remaining columns contain the data for each header row
-            transposed = list(six.moves.zip_longest(*rows))
-            csv_out.write_rows(transposed)
-        else:
-            csv_out.write_rows(rows)
+        # convert the rows to a zip'd list - this creates a structure so the csv's
+        # first column is the headers and the
+        # remaining columns contain the data for each header row
+        transposed = list(six.moves.zip_longest(*rows))
+        csv_out.write_rows(transposed)
         return csvdata.getvalue()
 
 
+def stream_csv(data, convertor_function, rows_per_chunk=ROWS_PER_CHUNK):
+    """Yield the csv for `data` a chunk of rows at a time.
+
+    `data` can be any iterable, including rows streamed from a server side cursor, so only one chunk of
+    the report is held in memory at once. The headers are taken from the keys of the first converted row.
+    """
+    rows = (convertor_function(d) for d in data)
+    first_row = next(rows, None)
+    first = first_row.keys() if first_row is not None else []
+    first = [f.replace('_', ' ').capitalize() if '_' in f else f for f in first]
+
+    csvdata = StringIO()
+    with csvx.Writer(csvdata) as csv_out:
+        chunk = [first]
+        if first_row is not None:
+            chunk.append(first_row.values())
+        for row in rows:
+            chunk.append(row.values())
+            if len(chunk) >= rows_per_chunk:
+                csv_out.write_rows(chunk)
+                chunk = []
+                yield csvdata.getvalue()
+                csvdata.seek(0)
+                csvdata.truncate()
+
+        if chunk:
+            csv_out.write_rows(chunk)
+            yield csvdata.getvalue()
+
+
 def format_criteria(criteria):
     result = []
     for i in criteria:
@@ -280,7 +313,7 @@ def generate_seller_catalogue_csv(seller_catalogue):
 
         return answers
 
-    return convert_to_csv(seller_catalogue, row)
+    return stream_csv(seller_catalogue, row)
 
 
 def generate_seller_responses_csv(seller_responses):
@@ -427,7 +460,7 @@ def generate_seller_responses_csv(seller_responses):
 
         return answers
 
-    return convert_to_csv(seller_responses, row)
+    return stream_csv(seller_responses, row)
 
 
 def generate_specialist_opportunities_csv(specialist_opportunities):
@@ -465,7 +498,7 @@ def generate_specialist_opportunities_csv(specialist_opportunities):
 
         return answers
 
-    return convert_to_csv(specialist_opportunities, row)
+    return stream_csv(specialist_opportunities, row)
 
 
 def generate_atm_opportunities_csv(atmOpportunities):
@@ -493,7 +526,7 @@ def generate_atm_opportunities_csv(atmOpportunities):
 
         return answers
 
-    return convert_to_csv(atmOpportunities, row)
+    return stream_csv(atmOpportunities, row)
 
 
 def generate_rfx_opportunities_csv(rfx_opportunities):
@@ -531,7 +564,7 @@ def generate_rfx_opportunities_csv(rfx_opportunities):
 
         return answers
 
-    return convert_to_csv(rfx_opportunities, row)
+    return stream_csv(rfx_opportunities, row)
 
 
 def generate_training_opportunities_csv(training_opportunities):
@@ -571,4 +604,4 @@ def generate_training_opportunities_csv(training_opportunities):
 
         return answers
 
-    return convert_to_csv(training_opportunities, row)
+    return stream_csv(training_opportunities, row)
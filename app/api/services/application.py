@@ -1,6 +1,8 @@
-from sqlalchemy import func
+from sqlalchemy import exists, func
 from app.api.helpers import Service
-from app.models import Application, db
+from app.models import Application, Supplier, db
+
+APPLICATION_METRIC_STATUSES = ['saved', 'submitted', 'approved', 'approval_rejected', 'complete', 'assessment_rejected']
 
 
 class ApplicationService(Service):
@@ -9,6 +11,53 @@ class ApplicationService(Service):
     def __init__(self, *args, **kwargs):
         super(ApplicationService, self).__init__(*args, **kwargs)
 
+    def get_metrics(self):
+        """Application and supplier counts for the application metrics dashboard, in two aggregate queries."""
+        metrics = {}
+
+        totals = {'total': 0, 'existing_seller': 0}
+        applications_by_status = (
+            db
+            .session
+            .query(
+                Application.status,
+                func.count(Application.id),
+                func.count(Application.supplier_code)
+            )
+            .group_by(Application.status)
+            .all()
+        )
+        for status, count, existing_seller in applications_by_status:
+            totals['total'] += count
+            totals['existing_seller'] += existing_seller
+            metrics['application_status_{}_total_count'.format(status)] = count
+            metrics['application_status_{}_existing_seller_count'.format(status)] = existing_seller
+            metrics['application_status_{}_new_seller_count'.format(status)] = count - existing_seller
+
+        for status in APPLICATION_METRIC_STATUSES:
+            for category in ['existing_seller', 'new_seller', 'total']:
+                metrics.setdefault('application_status_{}_{}_count'.format(status, category), 0)
+
+        metrics['application_total_count'] = totals['total']
+        metrics['application_existing_seller_count'] = totals['existing_seller']
+        metrics['application_new_seller_count'] = totals['total'] - totals['existing_seller']
+
+        has_application = exists().where(Application.supplier_code == Supplier.code)
+        suppliers = (
+            db
+            .session
+            .query(
+                func.count(Supplier.id).label('total'),
+                func.count(Supplier.id).filter(has_application).label('with_application')
+            )
+            .filter(Supplier.abn != Supplier.DUMMY_ABN)
+            .one()
+        )
+        metrics['suppliers_with_application_count'] = suppliers.with_application
+        metrics['suppliers_without_application_count'] = suppliers.total - suppliers.with_application
+
+        return metrics
+
     def get_submitted_application_ids(self, supplier_code=None):
         query = (db.session.query(Application.id)
                    .filter(Application.status == 'submitted'))
@@ -1,9 +1,13 @@
+import time
+from contextlib import contextmanager
+
 from enum import Enum
 
 import rollbar
+from flask import current_app, g
 
 from app.api.helpers import Service
-from app.models import AuditEvent
+from app.models import AuditEvent, db, utcnow
 
 
 class AuditService(Service):
@@ -11,6 +15,12 @@ class AuditService(Service):
 
     def __init__(self, *args, **kwargs):
         super(AuditService, self).__init__(*args, **kwargs)
+        self.stats = {
+            'flushes': 0,
+            'events': 0,
+            'largest_buffer': 0,
+            'seconds': 0.0
+        }
 
     def log_audit_event(self, **kwargs):
         try:
@@ -20,13 +30,94 @@ class AuditService(Service):
                 data=kwargs['data'],
                 db_object=kwargs['db_object']
             )
-            self.save(audit)
+            events = g.get('audit_events') if g else None
+            # objects that are not flushed yet have no id to record, so they are saved with the audit as before.
+            # Sent markers are saved straight away too, so a worker that dies before flushing can't resend
+            if (
+                events is None or
+                kwargs['audit_type'] in SENT_MARKER_AUDIT_TYPES or
+                (kwargs['db_object'] is not None and audit.object_id is None)
+            ):
+                self.save(audit)
+                return
+
+            audit.created_at = utcnow()
+            events.append(audit)
+            if len(events) >= current_app.config['AUDIT_BUFFER_MAX_EVENTS']:
+                self.flush_buffer()
+                self.start_buffer()
         except Exception:
             rollbar.report_exc_info(extra_data={
                 'audit_type': kwargs['audit_type'],
                 'id': kwargs['db_object'].id
             })
 
+    def start_request_buffer(self):
+        if current_app.config['AUDIT_BUFFERED']:
+            self.start_buffer()
+
+    def start_buffer(self):
+        """Start buffering audit events for the current request or task, unless a buffer is already open."""
+        if g.get('audit_events') is None:
+            g.audit_events = []
+
+    def flush_buffer(self, *args):
+        """Write the audit events buffered since `start_buffer` with a single multi-row insert.
+
+        The insert runs in its own transaction so it neither commits nor depends on the state of the session.
+        If it fails the events are inserted one at a time, so one bad event doesn't lose the rest.
+        """
+        events = g.pop('audit_events', None)
+        if not events:
+            return
+
+        columns = [c.name for c in AuditEvent.__table__.columns if c.name != 'id']
+        rows = [{name: getattr(event, name) for name in columns} for event in events]
+        started_at = time.time()
+        try:
+            with db.engine.begin() as connection:
+                connection.execute(AuditEvent.__table__.insert().values(rows))
+        except Exception:
+            rows = self.insert_one_at_a_time(rows)
+
+        seconds = time.time() - started_at
+        self.stats['flushes'] += 1
+        self.stats['events'] += len(rows)
+        self.stats['largest_buffer'] = max(self.stats['largest_buffer'], len(rows))
+        self.stats['seconds'] += seconds
+        current_app.logger.info(
+            'Wrote {} audit events in {:.3f}s ({} flushes, {} events, largest buffer {} since the process started)'
+            .format(len(rows), seconds, self.stats['flushes'], self.stats['events'], self.stats['largest_buffer'])
+        )
+
+    def insert_one_at_a_time(self, rows):
+        """Insert each row in its own transaction, reporting the ones that fail. Returns the rows written."""
+        written = []
+        for row in rows:
+            try:
+                with db.engine.begin() as connection:
+                    connection.execute(AuditEvent.__table__.insert().values(row))
+                written.append(row)
+            except Exception:
+                rollbar.report_exc_info(extra_data={
+                    'audit_type': row['type'],
+                    'object_type': row['object_type'],
+                    'id': row['object_id']
+                })
+        return written
+
+    @contextmanager
+    def buffered(self):
+        if not current_app.config['AUDIT_BUFFERED'] or g.get('audit_events') is not None:
+            yield
+            return
+
+        self.start_buffer()
+        try:
+            yield
+        finally:
+            self.flush_buffer()
+
 
 class AuditTypes(Enum):
     update_price = 'update_price'
@@ -93,3 +184,15 @@ class AuditTypes(Enum):
     sent_request_to_join_team_decline = 'sent_request_to_join_team_decline'
     evidence_draft_deleted = 'evidence_draft_deleted'
     agency_updated = 'agency_updated'
+
+
+# audit types the email tasks check to avoid sending the same email twice
+SENT_MARKER_AUDIT_TYPES = frozenset([
+    AuditTypes.sent_closed_brief_email,
+    AuditTypes.specialist_brief_published,
+    AuditTypes.specialist_brief_closed_email,
+    AuditTypes.sent_expiring_documents_email,
+    AuditTypes.sent_expiring_licence_email,
+    AuditTypes.seller_to_review_pricing_case_study_email_part_2,
+    AuditTypes.seller_to_review_pricing_case_study_email_part_3
+])
@@ -1,4 +1,4 @@
-from sqlalchemy import desc, func
+from sqlalchemy import and_, desc, func
 
 from app import db
 from app.api.helpers import Service
@@ -45,6 +45,49 @@ class BriefResponsesService(Service):
 
         return [r._asdict() for r in query.all()]
 
+    def count_brief_responses(self, brief_id, supplier_code=None, submitted_only=False):
+        """Count the responses `get_brief_responses` would return, without loading them."""
+        query = (
+            db.session.query(func.count(BriefResponse.id))
+            .filter(
+                BriefResponse.brief_id == brief_id,
+                BriefResponse.withdrawn_at.is_(None)
+            )
+        )
+        if supplier_code:
+            query = query.filter(BriefResponse.supplier_code == supplier_code)
+        if submitted_only:
+            query = query.filter(BriefResponse.submitted_at.isnot(None))
+
+        return query.scalar()
+
+    def get_brief_response_counts(self, brief_id, supplier_code=None):
+        """Count a brief's responses that have not been withdrawn in one query.
+
+        `submitted` covers every seller. The `supplier_` counts and the id of the supplier's latest response
+        are only for `supplier_code`.
+        """
+        for_supplier = BriefResponse.supplier_code == supplier_code
+        counts = (
+            db.session.query(
+                func.count(BriefResponse.id).filter(BriefResponse.submitted_at.isnot(None)).label('submitted'),
+                func.count(BriefResponse.id).filter(for_supplier).label('supplier_total'),
+                func.count(BriefResponse.id).filter(
+                    and_(for_supplier, BriefResponse.submitted_at.isnot(None))
+                ).label('supplier_submitted'),
+                func.count(BriefResponse.id).filter(
+                    and_(for_supplier, BriefResponse.submitted_at.is_(None))
+                ).label('supplier_draft'),
+                func.max(BriefResponse.id).filter(for_supplier).label('supplier_latest_id')
+            )
+            .filter(
+                BriefResponse.brief_id == brief_id,
+                BriefResponse.withdrawn_at.is_(None)
+            )
+            .one()
+        )
+        return counts._asdict()
+
     def get_responses_to_zip(self, brief_id, slug):
         query = (
             db.session.query(BriefResponse)
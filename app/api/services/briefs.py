@@ -1,18 +1,26 @@
+import json
+
 import pendulum
-from sqlalchemy import and_, case, desc, func, or_, union
+from flask import current_app
+from sqlalchemy import and_, case, desc, event, func, inspect, or_, select, union
 from sqlalchemy.orm import joinedload, noload
+from sqlalchemy.orm.session import Session
 from sqlalchemy.sql.expression import case as sql_case
 from sqlalchemy.sql.functions import concat
-from sqlalchemy.types import Integer, Numeric
+from sqlalchemy.types import Numeric
 
-from app import db
+from app import cache, db
 from app.api.helpers import Service
+from app.caching import delete_after_commit
 from app.models import (AuditEvent, Brief, BriefAssessor,
-                        BriefClarificationQuestion, BriefQuestion,
+                        BriefClarificationQuestion, BriefInvitedSupplier, BriefQuestion,
                         BriefResponse, BriefUser, Framework, Lot, Supplier,
-                        Team, TeamBrief, TeamMember, User, WorkOrder)
+                        Team, TeamBrief, TeamMember, User, WorkOrder,
+                        utcnow)
 from dmutils.filters import timesince
 
+OPPORTUNITIES_CACHE_KEY = 'opportunities'
+
 
 class BriefsService(Service):
     __model__ = Brief
@@ -42,16 +50,6 @@ class BriefsService(Service):
         }
 
     def get_buyer_dashboard_briefs(self, user_id, status):
-        brief_response_subquery = (
-            db
-            .session
-            .query(
-                BriefResponse.brief_id,
-                func.count(BriefResponse.id).label('responses'),
-            )
-            .group_by(BriefResponse.brief_id)
-            .subquery()
-        )
         brief_question_subquery = (
             db
             .session
@@ -97,7 +95,9 @@ class BriefsService(Service):
                 Brief.questions_closed_at,
                 Brief.status,
                 accessible_briefs_subquery.columns.creators,
-                brief_response_subquery.columns.responses,
+                func.nullif(
+                    Brief.responses_submitted_count + Brief.responses_draft_count + Brief.responses_withdrawn_count, 0
+                ).label('responses'),
                 brief_question_subquery.columns.questionsAsked,
                 brief_clarification_question_subquery.columns.questionsAnswered,
                 Lot.slug.label('lot'),
@@ -122,7 +122,6 @@ class BriefsService(Service):
 
         results = (
             query
-            .outerjoin(brief_response_subquery, brief_response_subquery.columns.brief_id == Brief.id)
             .outerjoin(brief_question_subquery, brief_question_subquery.columns.brief_id == Brief.id)
             .outerjoin(
                 brief_clarification_question_subquery,
@@ -148,6 +147,43 @@ class BriefsService(Service):
 
         return [r._asdict() for r in results]
 
+    def get_brief_for_view(self, brief_id):
+        """The brief with what `Brief.serialize` reads joined in, rather than lazy loaded one at a time."""
+        return (
+            db.session.query(Brief)
+            .options(joinedload(Brief.work_order), joinedload(Brief.clarification_questions))
+            .filter(Brief.id == brief_id)
+            .one_or_none()
+        )
+
+    def get_opportunities(self):
+        """Return every published brief as shown on the opportunities page, newest first.
+
+        The list is the same for every visitor so it is cached, and cleared when a brief is published,
+        edited or withdrawn or a response is submitted (see `clear_stale_opportunities`). Status is left
+        for `get_briefs_by_filters` to work out as briefs close with time rather than with a write.
+        """
+        opportunities = cache.get(OPPORTUNITIES_CACHE_KEY)
+        if opportunities is None:
+            query = (db.session
+                       .query(Brief.id, Brief.data['title'].astext.label('name'), Brief.closed_at,
+                              Brief.data['organisation'].astext.label('company'),
+                              Brief.data['location'].label('location'),
+                              Brief.seller_selector.label('openTo'),
+                              Brief.area_of_expertise.label('areaOfExpertise'),
+                              Brief.withdrawn_at,
+                              Brief.responses_submitted_count.label('submissions'),
+                              Lot.slug.label('lot'))
+                       .outerjoin(Lot)
+                       .filter(Brief.published_at.isnot(None))
+                       .order_by(Brief.published_at.desc()))
+
+            opportunities = [r._asdict() for r in query.all()]
+            cache.set(OPPORTUNITIES_CACHE_KEY, opportunities,
+                      timeout=current_app.config['OPPORTUNITIES_CACHE_TIMEOUT'])
+
+        return opportunities
+
     def get_briefs_by_filters(self, status=None, open_to=None, brief_type=None, location=None):
         status = status or []
         open_to = open_to or []
@@ -158,30 +194,25 @@ class BriefsService(Service):
         brief_type_filters = [x for x in brief_type if x in ['outcomes', 'training', 'specialists', 'atm']]
         location_filters = [x for x in location if x in ['ACT', 'NSW', 'NT', 'QLD', 'SA', 'TAS', 'VIC', 'WA', 'Remote']]
 
-        query = (db.session
-                   .query(Brief.id, Brief.data['title'].astext.label('name'), Brief.closed_at,
-                          Brief.data['organisation'].astext.label('company'),
-                          Brief.data['location'].label('location'),
-                          Brief.data['sellerSelector'].astext.label('openTo'),
-                          Brief.status,
-                          func.count(BriefResponse.id).label('submissions'),
-                          Lot.slug.label('lot'))
-                   .outerjoin(
-                       BriefResponse,
-                       and_(Brief.id == BriefResponse.brief_id,
-                            BriefResponse.withdrawn_at.is_(None),
-                            BriefResponse.submitted_at.isnot(None)))
-                   .outerjoin(Lot)
-                   .group_by(Brief.id, Lot.id))
-
-        lots = db.session.query(Lot).all()
+        now = utcnow()
+        opportunities = []
+        for opportunity in self.get_opportunities():
+            opportunity = dict(opportunity)
+            withdrawn_at = opportunity.pop('withdrawn_at')
+            area_of_expertise = opportunity.pop('areaOfExpertise')
+            if withdrawn_at:
+                opportunity['status'] = 'withdrawn'
+            elif opportunity['closed_at'] and opportunity['closed_at'] > now:
+                opportunity['status'] = 'live'
+            else:
+                opportunity['status'] = 'closed'
+            opportunities.append((opportunity, area_of_expertise))
 
         if 'closed' in status_filters:
             status_filters.append('withdrawn')
 
         if status_filters:
-            cond = or_(*[Brief.status == x for x in status_filters])
-            query = query.filter(cond)
+            opportunities = [x for x in opportunities if x[0]['status'] in status_filters]
 
         if open_to_filters:
             switcher = {
@@ -189,12 +220,11 @@ class BriefsService(Service):
                 'selected': 'someSellers',
                 'one': 'oneSeller'
             }
-            atm_lot = next(iter([x for x in lots if x.slug == 'atm']))
-            cond = or_(
-                and_(Brief._lot_id == atm_lot.id, Brief.data['sellerSelector'].astext == 'someSellers'),
-                *[Brief.data['sellerSelector'].astext == switcher.get(x) for x in open_to_filters]
-            )
-            query = query.filter(cond)
+            seller_selectors = [switcher.get(x) for x in open_to_filters]
+            opportunities = [
+                x for x in opportunities
+                if (x[0]['lot'] == 'atm' and x[0]['openTo'] == 'someSellers') or x[0]['openTo'] in seller_selectors
+            ]
 
         if location_filters:
             switcher = {
@@ -208,60 +238,58 @@ class BriefsService(Service):
                 'WA': 'Western Australia',
                 'Remote': 'Offsite'
             }
-            cond = or_(*[Brief.data['location'].astext.contains(switcher.get(x)) for x in location_filters])
-            query = query.filter(cond)
+            location_names = [switcher.get(x) for x in location_filters]
+            opportunities = [
+                x for x in opportunities
+                if any(name in location_text(x[0]['location']) for name in location_names)
+            ]
 
         if brief_type_filters:
             switcher = {
-                'atm': [x.id for x in lots if x.slug == 'atm'],
-                'outcomes': [x.id for x in lots if x.slug in ['digital-outcome', 'rfx']],
-                'training': [x.id for x in lots if x.slug in ['training', 'training2']],
-                'specialists': [x.id for x in lots if x.slug in ['digital-professionals', 'specialist']]
+                'atm': ['atm'],
+                'outcomes': ['digital-outcome', 'rfx'],
+                'training': ['training', 'training2'],
+                'specialists': ['digital-professionals', 'specialist']
             }
-            lot_cond = or_(*[Brief._lot_id.in_(switcher.get(x)) for x in brief_type_filters])
+            lot_slugs = [slug for x in brief_type_filters for slug in switcher.get(x)]
 
             if 'training' in brief_type_filters:
                 # this is a list of historic prod brief ids we want to show when the training filter is active
                 training_ids = [105, 183, 205, 215, 217, 292, 313, 336, 358, 438, 477, 498, 535, 577, 593, 762,
                                 864, 868, 886, 907, 933, 1029, 1136, 1164, 1310, 1443]
-                ids_cond = or_(Brief.id.in_(training_ids))
 
                 # we also want specialist briefs with a area of expertise of 'Training, Learning and Development'
-                aoe_cond = or_(Brief.data['areaOfExpertise'].astext == 'Training, Learning and Development')
-
-                cond = or_(lot_cond, ids_cond, aoe_cond)
-                query = query.filter(cond)
+                opportunities = [
+                    x for x in opportunities
+                    if (x[0]['lot'] in lot_slugs or x[0]['id'] in training_ids or
+                        x[1] == 'Training, Learning and Development')
+                ]
             elif 'atm' in brief_type_filters:
                 # this is a list of historic prod brief ids we want to show when the atm filter is active
                 atm_ids = [136, 180, 207, 351, 383, 453, 485, 490, 548, 568, 633, 743, 819, 830, 862, 975, 1071,
                            1147, 1176, 1238, 1239, 1260, 1263, 1268, 1413, 1476, 1620, 1646, 1935]
-                ids_cond = or_(Brief.id.in_(atm_ids))
-                cond = or_(lot_cond, ids_cond)
-                query = query.filter(cond)
+                opportunities = [x for x in opportunities if x[0]['lot'] in lot_slugs or x[0]['id'] in atm_ids]
             else:
-                query = query.filter(lot_cond)
-
-        query = (query
-                 .filter(Brief.published_at.isnot(None))
-                 .order_by(Brief.published_at.desc()))
+                opportunities = [x for x in opportunities if x[0]['lot'] in lot_slugs]
 
-        results = query.all()
-
-        return [r._asdict() for r in results]
+        return [x[0] for x in opportunities]
 
     def get_open_briefs_published_since(self, since=None):
         if not since:
             since = pendulum.now().subtract(hours=24)
-        query = (
+        return self.get_open_briefs_published_since_query(since).all()
+
+    def get_open_briefs_published_since_query(self, since):
+        return (
             db.session.query(Brief)
             .join(Framework)
             .filter(Framework.slug == 'digital-marketplace')
             .filter(
                 or_(
-                    Brief.data['sellerSelector'].astext == 'allSellers',
+                    Brief.seller_selector == 'allSellers',
                     and_(
-                        Brief.data['sellerSelector'].astext == 'someSellers',
-                        Brief.data['openTo'].astext == 'category'
+                        Brief.seller_selector == 'someSellers',
+                        Brief.open_to == 'category'
                     )
                 )
             )
@@ -269,41 +297,40 @@ class BriefsService(Service):
             .filter(Brief.withdrawn_at.is_(None))
         )
 
-        results = query.all()
+    def get_metrics(self):
+        metrics = self.get_metrics_query().one()
 
-        return results
+        return {
+            'total': metrics.total,
+            'live': metrics.live,
+            'open_to_all': metrics.open_to_all,
+            'open_to_selected': metrics.open_to_selected,
+            'open_to_one': metrics.open_to_one,
+            'recent_brief_time_since': (
+                timesince(metrics.most_recent_published_at) if metrics.most_recent_published_at else ''
+            )
+        }
 
-    def get_metrics(self):
-        brief_query = (
+    def get_metrics_query(self):
+        seller_selector = Brief.seller_selector
+        return (
             db
             .session
             .query(
-                Brief.id,
-                Brief.published_at
+                func.count(Brief.id).label('total'),
+                func.count(Brief.id).filter(
+                    and_(Brief.closed_at.isnot(None), Brief.closed_at > pendulum.now())
+                ).label('live'),
+                func.count(Brief.id).filter(seller_selector == 'allSellers').label('open_to_all'),
+                func.count(Brief.id).filter(seller_selector == 'someSellers').label('open_to_selected'),
+                func.count(Brief.id).filter(seller_selector == 'oneSellers').label('open_to_one'),
+                func.max(Brief.published_at).label('most_recent_published_at')
             )
             .filter(
                 Brief.withdrawn_at.is_(None),
                 Brief.published_at.isnot(None)
             )
         )
-        most_recent_brief = (
-            brief_query
-            .order_by(
-                desc(
-                    Brief.published_at
-                )
-            )
-            .first()
-        )
-
-        return {
-            'total': brief_query.count(),
-            'live': brief_query.filter(Brief.closed_at.isnot(None), Brief.closed_at > pendulum.now()).count(),
-            'open_to_all': brief_query.filter(Brief.data['sellerSelector'].astext == 'allSellers').count(),
-            'open_to_selected': brief_query.filter(Brief.data['sellerSelector'].astext == 'someSellers').count(),
-            'open_to_one': brief_query.filter(Brief.data['sellerSelector'].astext == 'oneSellers').count(),
-            'recent_brief_time_since': (timesince(most_recent_brief.published_at)) if most_recent_brief else ''
-        }
 
     def create_brief(self, user, team, framework, lot, data=None):
         if not data:
@@ -350,20 +377,19 @@ class BriefsService(Service):
             .filter(Team.status == 'completed')
             .subquery()
         )
-        team_member_result = (
-            db
-            .session
-            .query(
-                TeamMember.team_id,
-                TeamMember.user_id
+        in_completed_team = db.session.query(team_member_subquery.exists()).scalar()
+
+        if in_completed_team:
+            team_mates_subquery = (
+                db
+                .session
+                .query(
+                    TeamMember.user_id
+                )
+                .filter(TeamMember.team_id.in_(team_member_subquery))
+                .subquery()
             )
-            .join(team_member_subquery, team_member_subquery.columns.team_id == TeamMember.team_id)
-            .all()
-        )
-        team_ids = [tm.team_id for tm in team_member_result]
-        user_ids = [tm.user_id for tm in team_member_result]
 
-        if team_ids:
             team_brief_query = (
                 db
                 .session
@@ -372,7 +398,7 @@ class BriefsService(Service):
                     TeamBrief.user_id.label('user_id')
                 )
                 .join(Team)
-                .filter(TeamBrief.team_id.in_(team_ids))
+                .filter(TeamBrief.team_id.in_(team_member_subquery))
                 .filter(Team.status == 'completed')
             )
 
@@ -383,7 +409,7 @@ class BriefsService(Service):
                     BriefUser.brief_id.label('brief_id'),
                     BriefUser.user_id.label('user_id')
                 )
-                .filter(BriefUser.user_id.in_(user_ids))
+                .filter(BriefUser.user_id.in_(team_mates_subquery))
             )
             query = union(team_brief_query, brief_user_query).alias('result')
             return (
@@ -417,41 +443,37 @@ class BriefsService(Service):
                 .subquery()
             )
 
-    def has_permission_to_brief(self, user_id, brief_id):
-        query = self.accessible_briefs(user_id)
-        result = (
-            db
-            .session
-            .query(query)
-            .filter(query.c.brief_id == brief_id)
-            .all()
-        )
+    def get_accessible_brief_ids(self, user_id):
+        """Return the set of brief ids the user can see through their teams or as a brief user.
 
-        return True if len(result) > 0 else False
+        The set is cached per user and cleared when the user's team membership, their team's briefs or
+        their team mates' briefs change (see `clear_stale_brief_access`).
+        """
+        key = brief_access_cache_key(user_id)
+        brief_ids = cache.get(key)
+        if brief_ids is None:
+            query = self.accessible_briefs(user_id)
+            brief_ids = frozenset(
+                brief_id for brief_id, in db.session.query(query.c.brief_id).distinct()
+            )
+            cache.set(key, brief_ids, timeout=current_app.config['BRIEF_ACCESS_CACHE_TIMEOUT'])
+
+        return brief_ids
+
+    def has_permission_to_brief(self, user_id, brief_id):
+        return int(brief_id) in self.get_accessible_brief_ids(user_id)
 
     def get_contact_for_team_brief(self, brief_id):
-        team_brief = (db.session
-                        .query(TeamBrief)
-                        .filter(TeamBrief.brief_id == brief_id)
-                        .one_or_none())
-
-        if team_brief:
-            team = (db.session
-                      .query(Team)
-                      .filter(Team.id == team_brief.team_id)
-                      .one_or_none())
-
-            if team and team.email_address:
-                return team.email_address
-            else:
-                user = (db.session
-                          .query(User)
-                          .filter(
-                              User.id == team_brief.user_id,
-                              User.active.is_(True))
-                          .one_or_none())
+        contact = (db.session
+                     .query(Team.email_address.label('team_email_address'), User.email_address)
+                     .select_from(TeamBrief)
+                     .outerjoin(Team, Team.id == TeamBrief.team_id)
+                     .outerjoin(User, and_(User.id == TeamBrief.user_id, User.active.is_(True)))
+                     .filter(TeamBrief.brief_id == brief_id)
+                     .one_or_none())
 
-                return user.email_address
+        if contact:
+            return contact.team_email_address or contact.email_address
 
         return None
 
@@ -497,7 +519,7 @@ class BriefsService(Service):
 
         return None
 
-    def get_all_user_seller_responses_within_date_range(self, current_user_id, start_date, end_date):
+    def get_all_user_seller_responses_within_date_range_query(self, current_user_id, start_date, end_date):
         subquery = self.accessible_briefs(current_user_id)
         result = (
             db
@@ -540,19 +562,10 @@ class BriefsService(Service):
             .order_by(Brief.id)
         )
 
-        return [r._asdict() for r in result.all()]
+        return result
 
-    def get_oppportunities_for_download(self, current_user_id, start_date, end_date, lot_slugs):
+    def get_oppportunities_for_download_query(self, current_user_id, start_date, end_date, lot_slugs):
         subquery = self.accessible_briefs(current_user_id)
-        brief_subquery = (
-            db
-            .session
-            .query(
-                Brief.id.label('brief_id'),
-                func.json_object_keys(Brief.data['sellers']).label('supplier_code')
-            )
-            .subquery()
-        )
         supplier_subquery = (
             db
             .session
@@ -563,10 +576,10 @@ class BriefsService(Service):
                         'name', Supplier.name
                     )
                 ).label('sellers'),
-                brief_subquery.c.brief_id
+                BriefInvitedSupplier.brief_id
             )
-            .join(brief_subquery, brief_subquery.c.supplier_code.cast(Integer) == Supplier.code)
-            .group_by(brief_subquery.c.brief_id)
+            .join(BriefInvitedSupplier, BriefInvitedSupplier.supplier_code == Supplier.code)
+            .group_by(BriefInvitedSupplier.brief_id)
             .subquery()
         )
         result = (
@@ -613,10 +626,9 @@ class BriefsService(Service):
             .filter(Brief.created_at >= pendulum.parse(start_date, tz='Australia/Canberra'))
             .filter(Brief.created_at <= pendulum.parse(end_date, tz='Australia/Canberra'))
             .filter(Brief.published_at.isnot(None))
-            .all()
         )
 
-        return [r._asdict() for r in result]
+        return result
 
     def close_opportunity_early(self, brief):
         now = pendulum.now('utc')
@@ -721,3 +733,82 @@ class BriefsService(Service):
 
         result = db.session.query(all_email_addresses.c.email_address).all()
         return set([r for (r,) in result] + invited_seller_email_addresses)
+
+
+def location_text(location):
+    """The text the opportunity locations used to be matched against with a `contains` on the JSON column."""
+    if location is None:
+        return ''
+    return json.dumps(location)
+
+
+def brief_access_cache_key(user_id):
+    return 'brief-access:{}'.format(user_id)
+
+
+def attribute_values(obj, key):
+    """The attribute's current value along with any value it held before this flush."""
+    history = inspect(obj).attrs[key].history
+    return set(history.unchanged or ()) | set(history.added or ()) | set(history.deleted or ())
+
+
+@event.listens_for(Session, 'after_flush')
+def clear_stale_brief_access(session, flush_context):
+    team_ids = set()
+    user_ids = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Team):
+            team_ids.update(attribute_values(obj, 'id'))
+        elif isinstance(obj, TeamBrief):
+            team_ids.update(attribute_values(obj, 'team_id'))
+        elif isinstance(obj, TeamMember):
+            team_ids.update(attribute_values(obj, 'team_id'))
+            user_ids.update(attribute_values(obj, 'user_id'))
+        elif isinstance(obj, BriefUser):
+            user_ids.update(attribute_values(obj, 'user_id'))
+        elif isinstance(obj, Brief):
+            # rows written through the Brief.users secondary never appear as BriefUser objects
+            history = inspect(obj).attrs['users'].history
+            user_ids.update(user.id for user in list(history.added or ()) + list(history.deleted or ()))
+
+    team_ids.discard(None)
+    user_ids.discard(None)
+    if not team_ids and not user_ids:
+        return
+
+    # a user sees the briefs of everyone in their teams, so a change to one user's briefs or teams
+    # changes what all of their team mates can see
+    team_member = TeamMember.__table__
+    conditions = []
+    if team_ids:
+        conditions.append(team_member.c.team_id.in_(team_ids))
+    if user_ids:
+        conditions.append(
+            team_member.c.team_id.in_(
+                select([team_member.c.team_id]).where(team_member.c.user_id.in_(user_ids))
+            )
+        )
+
+    user_ids.update(
+        user_id for user_id, in session.connection().execute(
+            select([team_member.c.user_id]).where(or_(*conditions))
+        )
+    )
+    delete_after_commit(session, *[brief_access_cache_key(user_id) for user_id in user_ids])
+
+
+@event.listens_for(Session, 'after_flush')
+def clear_stale_opportunities(session, flush_context):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        # drafts and draft responses don't appear on the opportunities page
+        if isinstance(obj, Brief):
+            published = attribute_values(obj, '_published_at')
+        elif isinstance(obj, BriefResponse):
+            published = attribute_values(obj, 'submitted_at')
+        else:
+            continue
+
+        published.discard(None)
+        if published:
+            delete_after_commit(session, OPPORTUNITIES_CACHE_KEY)
+            return
@@ -2,8 +2,6 @@ from app.api.helpers import Service
 from app.models import Domain
 from app import db
 from sqlalchemy.orm import joinedload, raiseload, Load
-from six import string_types
-from sqlalchemy import func
 
 
 class DomainService(Service):
@@ -23,20 +21,18 @@ class DomainService(Service):
         )
         return query.all()
 
+    def get_cached_active_domains(self):
+        """The id and name of the active domains, by name, read from the domain cache without a query."""
+        domains = [
+            {'id': str(values['id']), 'name': values['name']}
+            for values in Domain.cached_by_name_and_id()['by_id'].values()
+            if values['name'] not in self.legacy_domains
+        ]
+        return sorted(domains, key=lambda domain: domain['name'])
+
     def get_by_name_or_id(self, name_or_id, show_legacy=True):
-        if isinstance(name_or_id, string_types):
-            query = self.filter(
-                func.lower(Domain.name) == func.lower(name_or_id)
-            )
-            if not show_legacy:
-                query = query.filter(Domain.name.notin_(self.legacy_domains))
-        else:
-            query = self.filter(Domain.id == name_or_id)
-            if not show_legacy:
-                query = query.filter(Domain.name.notin_(self.legacy_domains))
-        query.options(
-            Load(Domain).raiseload('*')
-        )
-        domain = query.one_or_none()
+        domain = Domain.find_by_name_or_id(name_or_id)
+        if domain and not show_legacy and domain.name in self.legacy_domains:
+            return None
 
         return domain
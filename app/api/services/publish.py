@@ -1,8 +1,27 @@
 import json
-import boto3
+import time
+
+from app.aws import get_client
 
 
 class Publish(object):
+    # how long the aws_sns key value is used before it is read from the database again
+    CONFIG_TTL_SECONDS = 60
+
+    def __init__(self):
+        self._config = None
+        self._config_expires_at = 0
+        self.stats = {
+            'published': 0,
+            'seconds': 0.0
+        }
+
+    @property
+    def events_per_second(self):
+        """Events published per second spent publishing, across the life of this process."""
+        if not self.stats['seconds']:
+            return None
+        return self.stats['published'] / self.stats['seconds']
 
     def agency(self, agency, event_type, **kwargs):
         return self.__generic('agency', event_type, agency=agency, **kwargs)
@@ -43,22 +62,30 @@ class Publish(object):
     def user_claim(self, user_claim, event_type, **kwargs):
         return self.__generic('user_claim', event_type, user_claim=user_claim, **kwargs)
 
-    def __generic(self, object_type, event_type, **kwargs):
+    def _get_config(self):
         from . import key_values_service
-        key_values = (
-            key_values_service
-            .convert_to_object(
+        now = time.time()
+        if now >= self._config_expires_at:
+            self._config = (
                 key_values_service
-                .get_by_keys(
-                    'aws_sns'
+                .convert_to_object(
+                    key_values_service
+                    .get_by_keys(
+                        'aws_sns'
+                    )
                 )
+                .get('aws_sns', None)
             )
-            .get('aws_sns', None)
-        )
+            self._config_expires_at = now + self.CONFIG_TTL_SECONDS
+
+        return self._config
+
+    def __generic(self, object_type, event_type, **kwargs):
+        key_values = self._get_config()
         if not key_values:
             return None
 
-        client = boto3.client(
+        client = get_client(
             'sns',
             region_name=key_values.get('aws_sns_region', None),
             aws_access_key_id=key_values.get('aws_sns_access_key_id', None),
@@ -71,6 +98,7 @@ class Publish(object):
             for key, value in kwargs.iteritems():
                 message[key] = value
 
+        started_at = time.time()
         response = client.publish(
             TopicArn=key_values.get('aws_sns_topicarn', None),
             Message=json.dumps({
@@ -88,4 +116,6 @@ class Publish(object):
                 }
             }
         )
+        self.stats['published'] += 1
+        self.stats['seconds'] += time.time() - started_at
         return response
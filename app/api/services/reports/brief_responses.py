@@ -19,7 +19,7 @@ class BriefResponsesService(Service):
                 BriefResponse.created_at,
                 BriefResponse.data['dayRate'].astext.label('day_rate'),
                 Lot.name.label('brief_type'),
-                Brief.data['areaOfExpertise'].astext.label('brief_category')
+                Brief.area_of_expertise.label('brief_category')
             )
             .join(Brief, Lot)
             .filter(BriefResponse.withdrawn_at.is_(None))
@@ -47,8 +47,8 @@ class BriefsService(Service):
                 Brief.published_at,
                 Brief.withdrawn_at,
                 Brief.data['title'].astext.label('title'),
-                Brief.data['sellerSelector'].astext.label('openTo'),
-                Brief.data['areaOfExpertise'].astext.label('brief_category'),
+                Brief.seller_selector.label('openTo'),
+                Brief.area_of_expertise.label('brief_category'),
                 Lot.name.label('brief_type'),
                 subquery.columns.domain[1].label('publisher_domain')
             )
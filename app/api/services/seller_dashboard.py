@@ -2,57 +2,62 @@ from datetime import datetime, timedelta
 
 import pendulum
 import pytz
-from sqlalchemy import and_, case, func, literal, or_, select, union
+from flask import current_app
+from sqlalchemy import and_, case, event, func, inspect, literal, or_, select, union
 from sqlalchemy.dialects.postgresql import aggregate_order_by
 from sqlalchemy.orm import joinedload, noload, raiseload
+from sqlalchemy.orm.session import Session
 
-from app import db
+from app import cache, db
 from app.api.helpers import Service
-from app.models import (Brief, BriefResponse, CaseStudy, Domain, Framework, Lot, Supplier, SupplierDomain,
-                        SupplierFramework, User)
+from app.caching import delete_after_commit
+from app.models import (BRIEF_RESPONSE_COUNT_COLUMNS, Brief, BriefInvitedSupplier, BriefResponse, CaseStudy, Domain,
+                        Framework, Lot, Supplier, SupplierDomain, SupplierFramework, User, invited_supplier_codes)
+
+# what count_brief_responses changes on a brief when one of its responses moves between states
+RESPONSE_COUNTER_ATTRIBUTES = frozenset(BRIEF_RESPONSE_COUNT_COLUMNS.values()) | {'updated_at'}
 
 
 class SellerDashboardService(object):
 
     def get_opportunities(self, supplier_code):
-        submitted_response_count_query = (
-            db
-            .session
-            .query(
-                BriefResponse.brief_id.label("brief_id"),
-                func.count(BriefResponse.brief_id).label("responseCount")
-            )
-            .filter(
-                BriefResponse.supplier_code == supplier_code,
-                BriefResponse.withdrawn_at.is_(None),
-                BriefResponse.submitted_at.isnot(None)
-            )
-            .group_by(BriefResponse.brief_id)
-            .subquery()
-        )
+        """Open opportunities by closing date, then those closed in the last 60 days, most recently closed first.
 
-        draft_response_count_query = (
-            db
-            .session
-            .query(
-                BriefResponse.brief_id.label("brief_id"),
-                func.count(BriefResponse.brief_id).label("draftResponseCount")
-            )
-            .filter(
-                BriefResponse.supplier_code == supplier_code,
-                BriefResponse.withdrawn_at.is_(None),
-                BriefResponse.submitted_at.is_(None)
+        The rows for a seller are cached until one of their responses or one of the briefs on their dashboard
+        changes. Whether a brief is open is worked out when the page is read, since briefs close with time.
+        """
+        rows = cache.get(seller_dashboard_cache_key(supplier_code))
+        if rows is None:
+            rows = self.get_opportunity_rows(supplier_code)
+            cache.set(
+                seller_dashboard_cache_key(supplier_code),
+                rows,
+                timeout=current_app.config['SELLER_DASHBOARD_CACHE_TIMEOUT']
             )
-            .group_by(BriefResponse.brief_id)
-            .subquery()
+
+        today = datetime.now(pytz.timezone('Australia/Sydney'))
+        open_briefs = sorted((r for r in rows if r['closed_at'] >= today), key=lambda r: r['closed_at'])
+        closed_briefs = sorted(
+            (r for r in rows if today - timedelta(days=60) <= r['closed_at'] < today),
+            key=lambda r: r['closed_at'],
+            reverse=True
         )
+        return open_briefs + closed_briefs
 
-        brief_response_id_query = (
+    def get_opportunity_rows(self, supplier_code):
+        """The seller's published briefs that they responded to or were invited to, in one query."""
+        responses = (
             db
             .session
             .query(
-                BriefResponse.brief_id.label("brief_id"),
-                func.max(BriefResponse.id).label("briefResponseId")
+                BriefResponse.brief_id.label('brief_id'),
+                func.nullif(
+                    func.count(BriefResponse.id).filter(BriefResponse.submitted_at.isnot(None)), 0
+                ).label('responseCount'),
+                func.nullif(
+                    func.count(BriefResponse.id).filter(BriefResponse.submitted_at.is_(None)), 0
+                ).label('draftResponseCount'),
+                func.max(BriefResponse.id).label('briefResponseId')
             )
             .filter(
                 BriefResponse.supplier_code == supplier_code,
@@ -62,87 +67,38 @@ class SellerDashboardService(object):
             .subquery()
         )
 
-        responses_query = (
-            db
-            .session
-            .query(
-                BriefResponse.brief_id.label("brief_id")
-            )
-            .filter(
-                BriefResponse.supplier_code == supplier_code,
-                BriefResponse.withdrawn_at.is_(None)
-            )
-        )
+        to_show_briefs = union(
+            db.session.query(responses.c.brief_id),
+            db.session.query(BriefInvitedSupplier.brief_id).filter(BriefInvitedSupplier.supplier_code == supplier_code)
+        ).alias('to_show_briefs')
 
-        invited_query = (
-            db
-            .session
-            .query(
-                Brief.id.label("brief_id")
-            )
-            .filter(Brief.data['sellers']['{}'.format(supplier_code)].isnot(None))
-        )
-
-        query = union(responses_query, invited_query).alias('to_show_briefs')
-
-        brief_query = (
+        today = datetime.now(pytz.timezone('Australia/Sydney'))
+        results = (
             db
             .session
             .query(
-                query.c.brief_id.label('briefId'),
+                Brief.id.label('briefId'),
                 Brief.data['title'].astext.label('name'),
                 Brief.data['numberOfSuppliers'].astext.label('numberOfSuppliers'),
                 Brief.closed_at,
                 Brief.withdrawn_at,
                 Lot.slug.label('lot'),
-                submitted_response_count_query.c.responseCount,
-                draft_response_count_query.c.draftResponseCount,
-                brief_response_id_query.c.briefResponseId
+                responses.c.responseCount,
+                responses.c.draftResponseCount,
+                responses.c.briefResponseId
             )
-            .join(Brief, query.c.brief_id == Brief.id)
+            .select_from(to_show_briefs)
+            .join(Brief, to_show_briefs.c.brief_id == Brief.id)
             .join(Lot)
-            .outerjoin(submitted_response_count_query, submitted_response_count_query.c.brief_id == Brief.id)
-            .outerjoin(draft_response_count_query, draft_response_count_query.c.brief_id == Brief.id)
-            .outerjoin(brief_response_id_query, brief_response_id_query.c.brief_id == Brief.id)
+            .outerjoin(responses, responses.c.brief_id == Brief.id)
             .filter(
-                Brief.published_at.isnot(None)
-            )
-            .subquery()
-        )
-
-        today = datetime.now(pytz.timezone('Australia/Sydney'))
-        open_brief_result = (
-            db
-            .session
-            .query(
-                brief_query
-            )
-            .join(Brief, brief_query.c.briefId == Brief.id)
-            .filter(
-                Brief.closed_at >= today
-            )
-            .order_by(Brief.closed_at)
-            .all()
-        )
-        closed_brief_result = (
-            db
-            .session
-            .query(
-                brief_query
-            )
-            .join(Brief, brief_query.c.briefId == Brief.id)
-            .filter(
-                Brief.closed_at < today,
+                Brief.published_at.isnot(None),
                 Brief.closed_at >= today - timedelta(days=60)
             )
-            .order_by(Brief.closed_at.desc())
             .all()
         )
 
-        return (
-            [r._asdict() for r in open_brief_result] +
-            [r._asdict() for r in closed_brief_result]
-        )
+        return [r._asdict() for r in results]
 
     def get_team_members(self, supplier_code):
         user_type = (
@@ -178,3 +134,51 @@ class SellerDashboardService(object):
         )
 
         return [r._asdict() for r in results]
+
+
+def seller_dashboard_cache_key(supplier_code):
+    return 'seller-dashboard:{}'.format(supplier_code)
+
+
+def only_response_counters_changed(brief):
+    changed = {attr.key for attr in inspect(brief).attrs if attr.history.has_changes()}
+    return changed <= RESPONSE_COUNTER_ATTRIBUTES
+
+
+@event.listens_for(Session, 'before_flush')
+def clear_stale_seller_dashboards(session, flush_context, instances):
+    # before the flush, so brief_invited_supplier still holds the sellers a changed brief used to invite
+    from app.api.services.briefs import attribute_values
+
+    supplier_codes = set()
+    brief_ids = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, BriefResponse):
+            supplier_codes.update(attribute_values(obj, 'supplier_code'))
+        elif isinstance(obj, Brief):
+            # session.dirty also lists objects whose attributes were set back to the same value
+            if obj in session.dirty and not session.is_modified(obj, include_collections=False):
+                continue
+            # a brief only reaches dashboards once it is published
+            if not attribute_values(obj, '_published_at') - {None}:
+                continue
+            # a response only changes its own seller's dashboard, which is cleared for the response above
+            if obj in session.dirty and only_response_counters_changed(obj):
+                continue
+            supplier_codes.update(invited_supplier_codes(obj.data))
+            # a new brief has no responses or invited sellers stored yet
+            if obj not in session.new:
+                brief_ids.add(obj.id)
+
+    brief_ids.discard(None)
+    if brief_ids:
+        supplier_codes.update(
+            code for code, in session.connection().execute(union(
+                select([BriefResponse.supplier_code]).where(BriefResponse.brief_id.in_(brief_ids)),
+                select([BriefInvitedSupplier.supplier_code]).where(BriefInvitedSupplier.brief_id.in_(brief_ids))
+            ))
+        )
+
+    supplier_codes.discard(None)
+    if supplier_codes:
+        delete_after_commit(session, *[seller_dashboard_cache_key(code) for code in supplier_codes])
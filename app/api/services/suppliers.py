@@ -1,5 +1,6 @@
 from datetime import datetime, timedelta
 
+import pendulum
 import pytz
 from sqlalchemy import and_, case, func, literal, or_, select, union
 from sqlalchemy.orm import joinedload, noload, raiseload
@@ -7,9 +8,16 @@ from sqlalchemy.dialects.postgresql import aggregate_order_by
 
 from app import db
 from app.api.helpers import Service
-from app.models import (CaseStudy,
+from app.models import (Application,
+                        Assessment,
+                        Brief,
+                        BriefAssessment,
+                        CaseStudy,
                         Domain,
+                        Evidence,
                         Framework,
+                        MasterAgreement,
+                        SignedAgreement,
                         Supplier,
                         SupplierDomain,
                         SupplierFramework,
@@ -45,6 +53,59 @@ class SuppliersService(Service):
             query = query.filter(Supplier.status != 'deleted')
         return query.one_or_none()
 
+    def get_supplier_brief_facts(self, supplier_code, brief_id, domain_id):
+        """What a seller's standing on a brief depends on, read in one query.
+
+        Covers the supplier's latest evidence for the brief's category, whether it has an open assessment in
+        that category or a submitted application, whether it has been assessed for the brief and whether it
+        has signed the current master agreement.
+        """
+        now = pendulum.now('UTC')
+        latest_evidence = (
+            db.session.query(Evidence.id, Evidence.status)
+            .filter(Evidence.supplier_code == supplier_code, Evidence.domain_id == domain_id)
+            .order_by(Evidence.id.desc())
+            .limit(1)
+        )
+        supplier_domain = and_(
+            Assessment.supplier_domain_id == SupplierDomain.id,
+            SupplierDomain.supplier_id == Supplier.id,
+            Supplier.code == supplier_code
+        )
+        return db.session.query(
+            latest_evidence.with_entities(Evidence.id).as_scalar().label('latest_evidence_id'),
+            latest_evidence.with_entities(Evidence.status).as_scalar().label('latest_evidence_status'),
+            db.session.query(Assessment.id).filter(
+                supplier_domain,
+                SupplierDomain.domain_id == domain_id,
+                SupplierDomain.status == 'unassessed',
+                Assessment.active
+            ).exists().label('has_open_assessment'),
+            db.session.query(Application.id).filter(
+                Application.supplier_code == supplier_code,
+                Application.status == 'submitted'
+            ).exists().label('has_submitted_application'),
+            or_(
+                db.session.query(Evidence.id).filter(
+                    Evidence.supplier_code == supplier_code,
+                    Evidence.brief_id == brief_id
+                ).exists(),
+                db.session.query(Assessment.id).filter(
+                    supplier_domain,
+                    BriefAssessment.assessment_id == Assessment.id,
+                    BriefAssessment.brief_id == Brief.id,
+                    Brief.id == brief_id,
+                    Brief.closed_at > now
+                ).exists()
+            ).label('has_been_assessed_for_brief'),
+            db.session.query(SignedAgreement.agreement_id).filter(
+                SignedAgreement.supplier_code == supplier_code,
+                SignedAgreement.agreement_id == MasterAgreement.id,
+                MasterAgreement.start_date <= now,
+                MasterAgreement.end_date >= now
+            ).exists().label('has_signed_current_agreement')
+        ).one()._asdict()
+
     def get_supplier_by_abn(self, abn):
         return (
             db
@@ -345,7 +406,7 @@ class SuppliersService(Service):
     def save_supplier(self, supplier, do_commit=True):
         return self.save(supplier, do_commit)
 
-    def get_approved_suppliers(self):
+    def get_approved_suppliers_query(self):
         expanded_certifications = (
             db
             .session
@@ -414,7 +475,6 @@ class SuppliersService(Service):
             )
             .group_by(Supplier.id, Supplier.name, Supplier.abn, aggregated_certifications.c.certifications)
             .order_by(Supplier.name)
-            .all()
         )
 
-        return [r._asdict() for r in results]
+        return results
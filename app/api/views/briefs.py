@@ -16,6 +16,7 @@ from app.api.business import (brief_overview_business, brief_training_business,
                               supplier_business)
 from app.api.business.agreement_business import use_old_work_order_creator
 from app.api.business.brief import BriefUserStatus, brief_business, brief_edit_business
+from app.api.business.brief.brief_view import BriefViewContext
 from app.api.business.errors import (BriefError, NotFoundError,
                                      UnauthorisedError)
 from app.api.business.validators import (ATMDataValidator, RFXDataValidator,
@@ -28,7 +29,7 @@ from app.api.helpers import (abort, exception_logger, forbidden,
                              not_found, notify_team, permissions_required,
                              role_required, must_be_in_team_check)
 from app.api.services import (agency_service, audit_service, audit_types,
-                              brief_history_service, brief_question_service,
+                              brief_question_service,
                               brief_response_download_service,
                               brief_responses_service, briefs, domain_service,
                               evidence_service, frameworks_service,
@@ -38,11 +39,11 @@ from app.emails import (render_email_template,
                         send_brief_clarification_to_buyer,
                         send_brief_clarification_to_seller,
                         send_brief_response_received_email,
-                        send_seller_invited_to_rfx_email,
-                        send_seller_invited_to_training_email,
+                        send_sellers_invited_to_rfx_email,
+                        send_sellers_invited_to_training_email,
                         send_specialist_brief_published_email,
                         send_specialist_brief_response_received_email,
-                        send_specialist_brief_seller_invited_email)
+                        send_specialist_brief_sellers_invited_email)
 from app.tasks import publish_tasks
 from dmapiclient.audit import AuditTypes
 from dmutils.file import s3_download_file, s3_upload_file_from_request
@@ -254,65 +255,16 @@ def create_specialist_brief():
 
 @api.route('/brief/<int:brief_id>', methods=["GET"])
 def get_brief(brief_id):
-    brief = briefs.find(id=brief_id).one_or_none()
+    brief = briefs.get_brief_for_view(brief_id)
     if not brief:
         not_found("No brief for id '%s' found" % (brief_id))
 
-    user_role = current_user.role if hasattr(current_user, 'role') else None
-    invited_sellers = brief.data['sellers'] if 'sellers' in brief.data else {}
-
-    is_buyer = False
-    is_brief_owner = False
-    if user_role == 'buyer':
-        is_buyer = True
-        if briefs.has_permission_to_brief(current_user.id, brief.id):
-            is_brief_owner = True
-
-    if brief.status == 'draft' and not is_brief_owner:
+    context = BriefViewContext(brief, current_user)
+    if brief.status == 'draft' and not context.is_brief_owner:
         return forbidden("Unauthorised to view brief")
 
-    brief_response_count = len(brief_responses_service.get_brief_responses(brief_id, None, submitted_only=True))
-    supplier_brief_response_count = 0
-    supplier_brief_response_count_submitted = 0
-    supplier_brief_response_count_draft = 0
-    supplier_brief_response_id = 0
-    supplier_brief_response_is_draft = False
-    if user_role == 'supplier':
-        supplier_brief_responses = brief_responses_service.get_brief_responses(brief_id, current_user.supplier_code)
-        supplier_brief_response_count = len(supplier_brief_responses)
-        supplier_brief_response_count_submitted = len(
-            [x for x in supplier_brief_responses if x['status'] == 'submitted']
-        )
-        supplier_brief_response_count_draft = len([x for x in supplier_brief_responses if x['status'] == 'draft'])
-        if supplier_brief_response_count == 1:
-            supplier_brief_response_id = supplier_brief_responses[0]['id']
-            supplier_brief_response_is_draft = True if supplier_brief_responses[0]['status'] == 'draft' else False
-
-    invited_seller_count = len(invited_sellers)
-    open_to_category = brief.lot.slug == 'atm' and brief.data.get('openTo', '') == 'category'
-    is_applicant = user_role == 'applicant'
-
-    # gather facts about the user's status against this brief
-    user_status = BriefUserStatus(brief, current_user)
-    has_chosen_brief_category = user_status.has_chosen_brief_category()
-    has_evidence_in_draft_for_category = user_status.has_evidence_in_draft_for_category()
-    has_latest_evidence_rejected_for_category = user_status.has_latest_evidence_rejected_for_category()
-    is_assessed_for_category = user_status.is_assessed_for_category()
-    is_assessed_in_any_category = user_status.is_assessed_in_any_category()
-    is_awaiting_application_assessment = user_status.is_awaiting_application_assessment()
-    is_awaiting_domain_assessment = user_status.is_awaiting_domain_assessment()
-    has_been_assessed_for_brief = user_status.has_been_assessed_for_brief()
-    is_recruiter_only = user_status.is_recruiter_only()
-    is_approved_seller = user_status.is_approved_seller()
-    is_invited = user_status.is_invited()
-    can_respond = user_status.can_respond()
-    has_responded = user_status.has_responded()
-    evidence_id = user_status.evidence_id_in_draft()
-    evidence_id_rejected = user_status.evidence_id_rejected()
-    has_supplier_errors = user_status.has_supplier_errors()
-    has_signed_current_agreement = user_status.has_signed_current_agreement()
-    last_edited_at = brief_history_service.get_last_edited_date(brief.id)
-    only_sellers_edited = brief_edit_business.only_sellers_were_edited(brief.id)
+    view = context.load()
+    is_buyer = view['is_buyer']
 
     # remove private data for non brief owners
     brief.data['contactEmail'] = ''
@@ -322,7 +274,7 @@ def get_brief(brief_id):
             brief.data['sellers'] = {}
         brief.responses_zip_filesize = None
         brief.data['contactNumber'] = ''
-        if not can_respond:
+        if not view['can_respond']:
             brief.data['proposalType'] = []
             brief.data['evaluationType'] = []
             brief.data['responseTemplate'] = []
@@ -340,57 +292,18 @@ def get_brief(brief_id):
             not_found('Contact details not found for opportunity {}'.format(brief_id))
 
         brief.data['contactEmail'] = contacts
-        if not is_brief_owner:
+        if not view['is_brief_owner']:
             if 'sellers' in brief.data:
                 brief.data['sellers'] = {}
             brief.data['industryBriefing'] = ''
             brief.data['contactNumber'] = ''
 
-    domains = []
-    for domain in domain_service.get_active_domains():
-        domains.append({
-            'id': str(domain.id),
-            'name': domain.name
-        })
-
-    brief_serialized = brief.serialize(with_users=False, with_author=is_brief_owner)
+    brief_serialized = brief.serialize(with_users=False, with_author=view['is_brief_owner'])
     if not is_buyer:
-        if not is_invited:
+        if not view['is_invited']:
             brief_serialized['clarificationQuestions'] = []
 
-    return jsonify(brief=brief_serialized,
-                   brief_response_count=brief_response_count,
-                   invited_seller_count=invited_seller_count,
-                   has_chosen_brief_category=has_chosen_brief_category,
-                   evidence_id=evidence_id,
-                   evidence_id_rejected=evidence_id_rejected,
-                   supplier_brief_response_count=supplier_brief_response_count,
-                   supplier_brief_response_count_submitted=supplier_brief_response_count_submitted,
-                   supplier_brief_response_count_draft=supplier_brief_response_count_draft,
-                   supplier_brief_response_id=supplier_brief_response_id,
-                   supplier_brief_response_is_draft=supplier_brief_response_is_draft,
-                   can_respond=can_respond,
-                   has_evidence_in_draft_for_category=has_evidence_in_draft_for_category,
-                   has_latest_evidence_rejected_for_category=has_latest_evidence_rejected_for_category,
-                   is_assessed_for_category=is_assessed_for_category,
-                   is_assessed_in_any_category=is_assessed_in_any_category,
-                   is_approved_seller=is_approved_seller,
-                   is_awaiting_application_assessment=is_awaiting_application_assessment,
-                   is_awaiting_domain_assessment=is_awaiting_domain_assessment,
-                   has_been_assessed_for_brief=has_been_assessed_for_brief,
-                   open_to_all=brief_business.is_open_to_all(brief),
-                   open_to_category=open_to_category,
-                   is_brief_owner=is_brief_owner,
-                   is_buyer=is_buyer,
-                   is_applicant=is_applicant,
-                   is_recruiter_only=is_recruiter_only,
-                   is_invited=is_invited,
-                   has_responded=has_responded,
-                   has_supplier_errors=has_supplier_errors,
-                   has_signed_current_agreement=has_signed_current_agreement,
-                   last_edited_at=last_edited_at,
-                   only_sellers_edited=only_sellers_edited,
-                   domains=domains)
+    return jsonify(brief=brief_serialized, **view)
 
 
 @api.route('/brief/<int:brief_id>', methods=['PATCH'])
@@ -576,13 +489,12 @@ def update_brief(brief_id):
 
     if publish:
         if 'sellers' in brief.data and data['sellerSelector'] != 'allSellers':
-            for seller_code, seller in brief.data['sellers'].iteritems():
-                supplier = suppliers.get_supplier_by_code(seller_code)
-                if brief.lot.slug == 'rfx':
-                    send_seller_invited_to_rfx_email(brief, supplier)
-
-                send_seller_invited_to_training_email(brief, supplier)
-                send_specialist_brief_seller_invited_email(brief, supplier)
+            invited_suppliers = [
+                suppliers.get_supplier_by_code(seller_code) for seller_code in brief.data['sellers'].keys()
+            ]
+            send_sellers_invited_to_rfx_email(brief, invited_suppliers)
+            send_sellers_invited_to_training_email(brief, invited_suppliers)
+            send_specialist_brief_sellers_invited_email(brief, invited_suppliers)
 
         send_specialist_brief_published_email(brief)
 
@@ -964,13 +876,11 @@ def get_brief_responses(brief_id):
                 if supplier:
                     brief.data['sellers'][seller_code]['email'] = supplier.data.get('contact_email', None)
                     brief.data['sellers'][seller_code]['number'] = supplier.data.get('contact_phone', None)
-                    brief_responses_by_seller = brief_responses_service.get_brief_responses(
+                    response_count = brief_responses_service.count_brief_responses(
                         brief_id, seller_code, submitted_only=True
                     )
-                    brief.data['sellers'][seller_code]['has_responded'] = (
-                        True if len(brief_responses_by_seller) > 0 else False
-                    )
-                    brief.data['sellers'][seller_code]['response_count'] = len(brief_responses_by_seller)
+                    brief.data['sellers'][seller_code]['has_responded'] = response_count > 0
+                    brief.data['sellers'][seller_code]['response_count'] = response_count
     else:
         brief_responses = brief_responses_service.get_brief_responses(brief_id, supplier_code, order_by_status=True)
 
@@ -1060,6 +970,57 @@ def upload_brief_rfx_attachment_file(brief_id, slug):
     return jsonify({"filename": filename})
 
 
+@api.route('/brief/<int:brief_id>/respond/documents/status')
+@login_required
+@role_required('buyer')
+@must_be_in_team_check
+@permissions_required('download_responses')
+def get_brief_responses_zip_status(brief_id):
+    """Responses zip status (role=buyer)
+    ---
+    tags:
+        - brief
+    definitions:
+        ResponsesZipStatus:
+            type: object
+            properties:
+                status:
+                    type: string
+                    enum: [queued, running, done, failed]
+                size:
+                    type: integer
+                duration:
+                    type: number
+                queuedAt:
+                    type: string
+                startedAt:
+                    type: string
+                finishedAt:
+                    type: string
+    parameters:
+      - name: brief_id
+        in: path
+        type: number
+        required: true
+    responses:
+        200:
+            description: Progress of the responses zip, polled until it can be downloaded.
+            schema:
+                $ref: '#/definitions/ResponsesZipStatus'
+        403:
+            description: Unauthorised to view brief.
+        404:
+            description: brief_id not found.
+    """
+    brief = Brief.query.filter(
+        Brief.id == brief_id
+    ).first_or_404()
+    if not briefs.has_permission_to_brief(current_user.id, brief.id):
+        return forbidden("Unauthorised to view brief or brief does not exist")
+
+    return jsonify(brief.serialize_responses_zip())
+
+
 @api.route('/brief/<int:brief_id>/respond/documents')
 @login_required
 @role_required('buyer')
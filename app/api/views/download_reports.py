@@ -1,6 +1,7 @@
-from flask import Response, jsonify, request
+from flask import Response, jsonify, request, stream_with_context
 from flask_login import login_required, current_user
 
+from app import statement_timeout
 from app.api import api
 from app.api.business.download_report_business import get_result
 from app.api.helpers import (exception_logger, permissions_required,
@@ -15,6 +16,7 @@ from ...utils import get_json_from_request
 @role_required('buyer')
 @must_be_in_team_check
 @permissions_required('download_reports')
+@statement_timeout('report')
 def download_reports():
     start_date = request.args.get('startDate', '')
     end_date = request.args.get('endDate', '')
@@ -24,12 +26,15 @@ def download_reports():
     result = None
     report_file_name = None
 
-    report_file_name, result, csv_generator = get_result(current_user, report_type, start_date, end_date)
+    report_file_name, result, csv_generator = get_result(
+        current_user, report_type, start_date, end_date, stream=output_format != 'json'
+    )
 
     if output_format == 'json':
         return jsonify(result), 200
     else:
-        csv_data = csv_generator(result)
+        # keep the request (and its database session) open while the rows stream out
+        csv_data = stream_with_context(csv_generator(result))
         response = Response(csv_data, mimetype='text/csv')
         response.headers['Content-Disposition'] = 'attachment; filename=' + report_file_name
         return response
@@ -59,6 +59,8 @@ def get_opportunities():
             description: Data for the opportunities page
             schema:
                 $ref: '#/definitions/Opportunities'
+        304:
+            description: The opportunities are unchanged since the ETag given in If-None-Match
     """
     status_filters = request.args.get('statusFilters') or ''
     open_to_filters = request.args.get('openToFilters') or ''
@@ -72,4 +74,8 @@ def get_opportunities():
         location=location_filters.split(',')
     )
 
-    return jsonify({'opportunities': opportunities})
+    # the list only changes when a brief is published, closes or gets a response, so let repeat
+    # visitors revalidate against an etag rather than download it again
+    response = jsonify({'opportunities': opportunities})
+    response.add_etag()
+    return response.make_conditional(request)
@@ -1,4 +1,5 @@
 from flask import jsonify
+from app import statement_timeout
 from app.api import api
 from app.api.helpers import require_api_key_auth
 from app.api.services.reports import briefs_service
@@ -6,6 +7,7 @@ from app.api.services.reports import briefs_service
 
 @api.route('/reports/brief/published', methods=['GET'])
 @require_api_key_auth
+@statement_timeout('report')
 def get_published_briefs():
     result = briefs_service.get_published_briefs()
     return jsonify({
@@ -1,4 +1,5 @@
 from flask import jsonify
+from app import statement_timeout
 from app.api import api
 from app.api.helpers import require_api_key_auth
 from app.api.services.reports import feedback_service
@@ -6,6 +7,7 @@ from app.api.services.reports import feedback_service
 
 @api.route('/reports/feedback/all', methods=['GET'])
 @require_api_key_auth
+@statement_timeout('report')
 def get_all_feedback():
     result = feedback_service.get_all_feedback()
     return jsonify({
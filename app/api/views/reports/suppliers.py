@@ -1,4 +1,5 @@
 from flask import current_app, jsonify
+from app import statement_timeout
 from app.api import api
 from app.api.helpers import require_api_key_auth
 from app.api.services.reports import suppliers_service
@@ -7,6 +8,7 @@ from itertools import groupby
 
 @api.route('/reports/supplier/unassessed', methods=['GET'])
 @require_api_key_auth
+@statement_timeout('report')
 def get_unassessed():
     unassessed = suppliers_service.get_unassessed()
     result = []
@@ -30,6 +32,7 @@ def get_unassessed():
 
 @api.route('/reports/supplier/all', methods=['GET'])
 @require_api_key_auth
+@statement_timeout('report')
 def get_all_suppliers():
     result = suppliers_service.get_suppliers()
     return jsonify({
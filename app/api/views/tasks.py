@@ -10,7 +10,7 @@ from app.tasks.mailchimp import (send_document_expiry_reminder,
                                  send_labour_hire_expiry_reminder,
                                  send_new_briefs_email,
                                  sync_mailchimp_seller_list)
-from app.tasks.supplier_tasks import update_supplier_metrics
+from app.tasks.supplier_tasks import update_application_metrics, update_supplier_metrics
 from app.tasks.dreamail import send_dreamail, send_dreamail_part_3
 
 
@@ -126,6 +126,22 @@ def run_update_supplier_metrics():
     return jsonify(res.id)
 
 
+@api.route('/tasks/update-application-metrics', methods=['POST'])
+@role_required('admin')
+def run_update_application_metrics():
+    """Trigger Update Application Metrics
+    ---
+    tags:
+      - tasks
+    responses:
+      200:
+        type: string
+        description: string
+    """
+    res = update_application_metrics.delay()
+    return jsonify(res.id)
+
+
 @api.route('/tasks/update-all-metrics', methods=['POST'])
 @role_required('admin')
 def run_update_all_metrics():
@@ -141,7 +157,8 @@ def run_update_all_metrics():
     return jsonify({
         "update_brief_metrics": update_brief_metrics.delay().id,
         "update_brief_response_metrics": update_brief_response_metrics.delay().id,
-        "update_supplier_metrics": update_supplier_metrics.delay().id
+        "update_supplier_metrics": update_supplier_metrics.delay().id,
+        "update_application_metrics": update_application_metrics.delay().id
     })
 
 
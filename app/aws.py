@@ -0,0 +1,23 @@
+import threading
+
+import boto3
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(service_name, **kwargs):
+    """Return a boto3 client for `service_name`, built once per process for each set of arguments.
+
+    Building a client loads and parses the service model, which costs far more than the calls made with
+    it. Clients are thread safe, so one is shared by everything in the process using the same settings.
+    """
+    key = (service_name, tuple(sorted(kwargs.items())))
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _clients[key] = boto3.client(service_name, **kwargs)
+
+    return client
@@ -0,0 +1,88 @@
+import time
+import uuid
+
+from flask import current_app, g, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm.session import Session
+
+from app import cache
+
+
+def delete_after_commit(session, *keys):
+    """Queue cache keys to be deleted once the session's transaction commits.
+
+    Deleting at commit time rather than at flush time stops a concurrent reader from caching the old
+    value again between our flush and our commit.
+    """
+    session.info.setdefault('cache_keys_to_delete', set()).update(keys)
+
+
+def clear_process_cached_after_commit(session, *names):
+    """Queue values kept by `process_cached` to be dropped once the session's transaction commits.
+
+    Their shared versions are deleted too, so other processes load them again on their next read.
+    """
+    session.info.setdefault('process_cached_to_clear', set()).update(names)
+    delete_after_commit(session, *[process_cached_version_key(name) for name in names])
+
+
+@event.listens_for(Session, 'after_commit')
+def delete_queued_keys(session):
+    keys = session.info.pop('cache_keys_to_delete', None)
+    if keys:
+        cache.delete_many(*keys)
+    names = session.info.pop('process_cached_to_clear', None)
+    if names and has_app_context():
+        for name in names:
+            clear_process_cached(name)
+
+
+@event.listens_for(Session, 'after_rollback')
+def discard_queued_keys(session):
+    session.info.pop('cache_keys_to_delete', None)
+    session.info.pop('process_cached_to_clear', None)
+
+
+def process_cached_version_key(name):
+    return 'process-cached-version:{}'.format(name)
+
+
+def process_cached_version(name):
+    """The version of a process cached value in the shared cache, read once per app context.
+
+    A process keeps its copy only while the version matches, so a write committed in one process is seen by
+    the others from their next request or task rather than after the timeout.
+    """
+    versions = g.setdefault('process_cached_versions', {})
+    if name not in versions:
+        key = process_cached_version_key(name)
+        version = cache.get(key)
+        if version is None:
+            cache.add(key, uuid.uuid4().hex, timeout=0)
+            version = cache.get(key)
+        versions[name] = version
+    return versions[name]
+
+
+def process_cached(name, timeout, load):
+    """Return the value `load` returns, keeping it in this process for `timeout` seconds.
+
+    This is for small tables that rarely change but are read on hot paths, where a round trip to the shared
+    cache for every read costs more than the lookup. Values are kept on the application, so each app starts
+    empty, and are loaded again early when their version in the shared cache changes.
+    """
+    values = current_app.extensions.setdefault('process_cache', {})
+    version = process_cached_version(name)
+    now = time.time()
+    entry = values.get(name)
+    if entry is None or entry[1] != version or now - entry[0] > timeout:
+        entry = (now, version, load())
+        values[name] = entry
+
+    return entry[2]
+
+
+def clear_process_cached(name):
+    current_app.extensions.get('process_cache', {}).pop(name, None)
+    if has_app_context():
+        g.get('process_cached_versions', {}).pop(name, None)
@@ -15,9 +15,12 @@ from .briefs import (
     send_brief_closed_email,
     send_seller_requested_feedback_from_buyer_email,
     send_seller_invited_to_rfx_email,
+    send_sellers_invited_to_rfx_email,
     send_seller_invited_to_training_email,
+    send_sellers_invited_to_training_email,
     send_specialist_brief_published_email,
     send_specialist_brief_seller_invited_email,
+    send_specialist_brief_sellers_invited_email,
     send_specialist_brief_closed_email,
     send_specialist_brief_response_received_email,
     send_specialist_brief_response_withdrawn_email,
@@ -27,8 +30,10 @@ from .briefs import (
     send_opportunity_closed_early_email,
     send_opportunity_edited_email_to_buyers,
     send_opportunity_edited_email_to_seller,
+    send_opportunity_edited_email_to_sellers,
     send_opportunity_withdrawn_email_to_buyers,
-    send_opportunity_withdrawn_email_to_seller
+    send_opportunity_withdrawn_email_to_seller,
+    send_opportunity_withdrawn_email_to_sellers
 )  # noqa
 from .dreamail import (
     send_dreamail
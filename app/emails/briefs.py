@@ -4,7 +4,7 @@ from __future__ import unicode_literals
 
 from flask import current_app
 
-from .util import render_email_template, send_or_handle_error, escape_markdown
+from .util import render_email_template, send_bulk_or_handle_error, send_or_handle_error, escape_markdown
 
 import rollbar
 import pendulum
@@ -430,87 +430,65 @@ def send_seller_requested_feedback_from_buyer_email(brief):
 
 
 def send_seller_invited_to_rfx_email(brief, invited_supplier):
-    from app.api.services import audit_service, audit_types  # to circumvent circular dependency
+    send_sellers_invited_to_rfx_email(brief, [invited_supplier])
+
+
+def send_sellers_invited_to_rfx_email(brief, invited_suppliers):
+    from app.api.services import audit_types  # to circumvent circular dependency
 
     if brief.lot.slug != 'rfx':
         return
 
-    to_addresses = []
-    if 'contact_email' in invited_supplier.data:
-        to_addresses = [invited_supplier.data['contact_email']]
-    elif 'email' in invited_supplier.data:
-        to_addresses = [invited_supplier.data['email']]
-
-    if len(to_addresses) > 0:
-        email_body = render_email_template(
-            'brief_rfx_invite_seller.md',
-            frontend_url=current_app.config['FRONTEND_ADDRESS'],
-            brief_name=brief.data['title'],
-            brief_id=brief.id
-        )
-
-        subject = "You have been invited to respond to an opportunity"
+    to_addresses = get_invited_seller_emails(invited_suppliers)
+    if not to_addresses:
+        return
 
-        send_or_handle_error(
-            to_addresses,
-            email_body,
-            subject,
-            current_app.config['DM_GENERIC_NOREPLY_EMAIL'],
-            current_app.config['DM_GENERIC_SUPPORT_NAME'],
-            event_description_for_errors='seller_invited_to_rfx_opportunity'
-        )
+    email_body = render_email_template(
+        'brief_rfx_invite_seller.md',
+        frontend_url=current_app.config['FRONTEND_ADDRESS'],
+        brief_name=brief.data['title'],
+        brief_id=brief.id
+    )
 
-        audit_service.log_audit_event(
-            audit_type=audit_types.seller_invited_to_rfx_opportunity,
-            user='',
-            data={
-                "to_addresses": ', '.join(to_addresses),
-                "email_body": email_body,
-                "subject": subject
-            },
-            db_object=brief)
+    send_sellers_email(
+        brief,
+        to_addresses,
+        email_body,
+        "You have been invited to respond to an opportunity",
+        audit_types.seller_invited_to_rfx_opportunity,
+        'seller_invited_to_rfx_opportunity'
+    )
 
 
 def send_seller_invited_to_training_email(brief, invited_supplier):
-    from app.api.services import audit_service, audit_types  # to circumvent circular dependency
+    send_sellers_invited_to_training_email(brief, [invited_supplier])
+
+
+def send_sellers_invited_to_training_email(brief, invited_suppliers):
+    from app.api.services import audit_types  # to circumvent circular dependency
 
     if brief.lot.slug != 'training2':
         return
 
-    to_addresses = []
-    if 'contact_email' in invited_supplier.data:
-        to_addresses = [invited_supplier.data['contact_email']]
-    elif 'email' in invited_supplier.data:
-        to_addresses = [invited_supplier.data['email']]
-
-    if len(to_addresses) > 0:
-        email_body = render_email_template(
-            'brief_training_invite_seller.md',
-            frontend_url=current_app.config['FRONTEND_ADDRESS'],
-            brief_name=brief.data['title'],
-            brief_id=brief.id
-        )
-
-        subject = "You have been invited to respond to an opportunity"
+    to_addresses = get_invited_seller_emails(invited_suppliers)
+    if not to_addresses:
+        return
 
-        send_or_handle_error(
-            to_addresses,
-            email_body,
-            subject,
-            current_app.config['DM_GENERIC_NOREPLY_EMAIL'],
-            current_app.config['DM_GENERIC_SUPPORT_NAME'],
-            event_description_for_errors='seller_invited_to_training_opportunity'
-        )
+    email_body = render_email_template(
+        'brief_training_invite_seller.md',
+        frontend_url=current_app.config['FRONTEND_ADDRESS'],
+        brief_name=brief.data['title'],
+        brief_id=brief.id
+    )
 
-        audit_service.log_audit_event(
-            audit_type=audit_types.seller_invited_to_training_opportunity,
-            user='',
-            data={
-                "to_addresses": ', '.join(to_addresses),
-                "email_body": email_body,
-                "subject": subject
-            },
-            db_object=brief)
+    send_sellers_email(
+        brief,
+        to_addresses,
+        email_body,
+        "You have been invited to respond to an opportunity",
+        audit_types.seller_invited_to_training_opportunity,
+        'seller_invited_to_training_opportunity'
+    )
 
 
 def send_specialist_brief_published_email(brief):
@@ -584,51 +562,40 @@ def send_specialist_brief_published_email(brief):
 
 
 def send_specialist_brief_seller_invited_email(brief, invited_supplier):
-    from app.api.services import audit_service, audit_types  # to circumvent circular dependency
+    send_specialist_brief_sellers_invited_email(brief, [invited_supplier])
+
+
+def send_specialist_brief_sellers_invited_email(brief, invited_suppliers):
+    from app.api.services import audit_types  # to circumvent circular dependency
 
     if brief.lot.slug != 'specialist':
         return
 
-    to_addresses = []
-    if 'contact_email' in invited_supplier.data:
-        to_addresses = [invited_supplier.data['contact_email']]
-    elif 'email' in invited_supplier.data:
-        to_addresses = [invited_supplier.data['email']]
-
-    if len(to_addresses) > 0:
-        number_of_suppliers = int(brief.data['numberOfSuppliers'])
-        email_body = render_email_template(
-            'specialist_brief_invite_seller.md',
-            frontend_url=current_app.config['FRONTEND_ADDRESS'],
-            brief_name=brief.data['title'],
-            brief_id=brief.id,
-            brief_organisation=brief.data['organisation'],
-            brief_close_date=brief.closed_at.strftime('%d/%m/%Y'),
-            question_close_date=brief.questions_closed_at.strftime('%d/%m/%Y'),
-            number_of_suppliers=number_of_suppliers,
-            number_of_suppliers_plural='s' if number_of_suppliers > 1 else ''
-        )
-
-        subject = "You're invited to submit candidates for {}".format(brief.data['title'])
+    to_addresses = get_invited_seller_emails(invited_suppliers)
+    if not to_addresses:
+        return
 
-        send_or_handle_error(
-            to_addresses,
-            email_body,
-            subject,
-            current_app.config['DM_GENERIC_NOREPLY_EMAIL'],
-            current_app.config['DM_GENERIC_SUPPORT_NAME'],
-            event_description_for_errors='seller_invited_to_specialist_opportunity'
-        )
+    number_of_suppliers = int(brief.data['numberOfSuppliers'])
+    email_body = render_email_template(
+        'specialist_brief_invite_seller.md',
+        frontend_url=current_app.config['FRONTEND_ADDRESS'],
+        brief_name=brief.data['title'],
+        brief_id=brief.id,
+        brief_organisation=brief.data['organisation'],
+        brief_close_date=brief.closed_at.strftime('%d/%m/%Y'),
+        question_close_date=brief.questions_closed_at.strftime('%d/%m/%Y'),
+        number_of_suppliers=number_of_suppliers,
+        number_of_suppliers_plural='s' if number_of_suppliers > 1 else ''
+    )
 
-        audit_service.log_audit_event(
-            audit_type=audit_types.seller_invited_to_specialist_opportunity,
-            user='',
-            data={
-                "to_addresses": ', '.join(to_addresses),
-                "email_body": email_body,
-                "subject": subject
-            },
-            db_object=brief)
+    send_sellers_email(
+        brief,
+        to_addresses,
+        email_body,
+        "You're invited to submit candidates for {}".format(brief.data['title']),
+        audit_types.seller_invited_to_specialist_opportunity,
+        'seller_invited_to_specialist_opportunity'
+    )
 
 
 def send_specialist_brief_closed_email(brief):
@@ -648,7 +615,7 @@ def send_specialist_brief_closed_email(brief):
     if (audit_event > 0):
         return
 
-    responses = brief_responses_service.get_brief_responses(brief.id, None, submitted_only=True)
+    response_count = brief_responses_service.count_brief_responses(brief.id, submitted_only=True)
     to_addresses = get_brief_emails(brief)
 
     # prepare copy
@@ -657,8 +624,8 @@ def send_specialist_brief_closed_email(brief):
         frontend_url=current_app.config['FRONTEND_ADDRESS'],
         brief_name=brief.data['title'],
         brief_id=brief.id,
-        number_of_responses='{}'.format(len(responses)),
-        number_of_responses_plural='s' if len(responses) > 1 else ''
+        number_of_responses='{}'.format(response_count),
+        number_of_responses_plural='s' if response_count > 1 else ''
     )
 
     subject = 'Your "{}" opportunity has closed.'.format(brief.data['title'])
@@ -913,8 +880,12 @@ def send_opportunity_edited_email_to_buyers(brief, current_user, edit):
 
 
 def send_opportunity_edited_email_to_seller(brief, email_address, buyer):
+    send_opportunity_edited_email_to_sellers(brief, [email_address], buyer)
+
+
+def send_opportunity_edited_email_to_sellers(brief, email_addresses, buyer):
     # to circumvent circular dependencies
-    from app.api.services import audit_service, audit_types
+    from app.api.services import audit_types
 
     candidate_message = ''
     if brief.lot.slug == 'specialist':
@@ -935,26 +906,13 @@ def send_opportunity_edited_email_to_seller(brief, email_address, buyer):
         title=escape_markdown(brief.data['title'])
     )
 
-    subject = "Changes made to '{}' opportunity".format(brief.data['title'])
-
-    send_or_handle_error(
-        email_address,
+    send_sellers_email(
+        brief,
+        email_addresses,
         email_body,
-        subject,
-        current_app.config['DM_GENERIC_NOREPLY_EMAIL'],
-        current_app.config['DM_GENERIC_SUPPORT_NAME'],
-        event_description_for_errors=audit_types.opportunity_edited
-    )
-
-    audit_service.log_audit_event(
-        audit_type=audit_types.sent_opportunity_edited_email_to_seller,
-        user='',
-        data={
-            "to_addresses": email_address,
-            "email_body": email_body,
-            "subject": subject
-        },
-        db_object=brief
+        "Changes made to '{}' opportunity".format(brief.data['title']),
+        audit_types.sent_opportunity_edited_email_to_seller,
+        audit_types.opportunity_edited
     )
 
 
@@ -1014,8 +972,12 @@ def send_opportunity_withdrawn_email_to_buyers(brief, current_user):
 
 
 def send_opportunity_withdrawn_email_to_seller(brief, email_address, buyer):
+    send_opportunity_withdrawn_email_to_sellers(brief, [email_address], buyer)
+
+
+def send_opportunity_withdrawn_email_to_sellers(brief, email_addresses, buyer):
     # to circumvent circular dependencies
-    from app.api.services import audit_service, audit_types
+    from app.api.services import audit_types
 
     email_body = render_email_template(
         'opportunity_withdrawn_sellers.md',
@@ -1032,24 +994,13 @@ def send_opportunity_withdrawn_email_to_seller(brief, email_address, buyer):
         brief.id
     )
 
-    send_or_handle_error(
-        email_address,
+    send_sellers_email(
+        brief,
+        email_addresses,
         email_body,
         subject,
-        current_app.config['DM_GENERIC_NOREPLY_EMAIL'],
-        current_app.config['DM_GENERIC_SUPPORT_NAME'],
-        event_description_for_errors=audit_types.withdraw_opportunity
-    )
-
-    audit_service.log_audit_event(
-        audit_type=audit_types.sent_opportunity_withdrawn_email_to_seller,
-        user='',
-        data={
-            "to_addresses": email_address,
-            "email_body": email_body,
-            "subject": subject
-        },
-        db_object=brief
+        audit_types.sent_opportunity_withdrawn_email_to_seller,
+        audit_types.withdraw_opportunity
     )
 
 
@@ -1067,3 +1018,44 @@ def get_brief_emails(brief):
     ]
 
     return to_addresses
+
+
+def get_invited_seller_emails(invited_suppliers):
+    to_addresses = []
+    for supplier in invited_suppliers:
+        if 'contact_email' in supplier.data:
+            to_addresses.append(supplier.data['contact_email'])
+        elif 'email' in supplier.data:
+            to_addresses.append(supplier.data['email'])
+
+    return to_addresses
+
+
+def send_sellers_email(brief, to_addresses, email_body, subject, audit_type, event_description_for_errors):
+    """Send a message rendered once to each seller on its own, with an audit event per seller as before."""
+    from app.api.services import audit_service  # to circumvent circular dependency
+
+    to_addresses = list(to_addresses)
+    if not to_addresses:
+        return
+
+    send_bulk_or_handle_error(
+        to_addresses,
+        email_body,
+        subject,
+        current_app.config['DM_GENERIC_NOREPLY_EMAIL'],
+        current_app.config['DM_GENERIC_SUPPORT_NAME'],
+        event_description_for_errors=event_description_for_errors
+    )
+
+    for to_address in to_addresses:
+        audit_service.log_audit_event(
+            audit_type=audit_type,
+            user='',
+            data={
+                "to_addresses": to_address,
+                "email_body": email_body,
+                "subject": subject
+            },
+            db_object=brief
+        )
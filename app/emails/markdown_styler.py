@@ -1,7 +1,9 @@
+import threading
+
 import six
 import bleach
 
-from markdown import markdown as original_markdown
+from markdown import Markdown
 from markdown.treeprocessors import Treeprocessor
 from markdown.extensions import Extension
 
@@ -47,25 +49,39 @@ class InlineStylesExtension(Extension):
         md.treeprocessors['inline_styles'] = InlineStylesTreeprocessor(self.styles)
 
 
+ALLOWED_TAGS = bleach.sanitizer.ALLOWED_TAGS + ['p', 'span', 'h1', 'h2', 'h3', 'h4', 'h5', 'hr', 'div', 'br']
+ALLOWED_ATTRIBUTES = dict(bleach.sanitizer.ALLOWED_ATTRIBUTES, div=['style'], p=['style'], h1=['style'])
+ALLOWED_STYLES = ['display', 'color', 'font-weight', 'font-size', 'border-radius', 'background', 'width',
+                  'line-height', 'padding', 'border', 'margin-right', 'margin']
+
+# Markdown instances and bleach cleaners keep parser state, so each thread gets its own
+_pipelines = threading.local()
+
+
+def get_pipeline(styles_dictionary):
+    """The Markdown converter for these styles and the cleaner for its output, built once per thread."""
+    try:
+        pipelines = _pipelines.by_styles
+    except AttributeError:
+        pipelines = _pipelines.by_styles = {}
+
+    key = frozenset(styles_dictionary.items())
+    pipeline = pipelines.get(key)
+    if pipeline is None:
+        pipeline = pipelines[key] = (
+            Markdown(output_format='html5', extensions=[InlineStylesExtension(**styles_dictionary)]),
+            bleach.sanitizer.Cleaner(tags=ALLOWED_TAGS, attributes=ALLOWED_ATTRIBUTES, styles=ALLOWED_STYLES)
+        )
+
+    return pipeline
+
+
 def markdown_with_inline_styles(object, styles_dictionary=None):
     """
     Converts the given object to Markdown, with inline
     styles suitable for email.
     """
 
-    styles_dictionary = styles_dictionary or {}
-    tags = bleach.sanitizer.ALLOWED_TAGS + ['p', 'span', 'h1', 'h2', 'h3', 'h4', 'h5', 'hr', 'div', 'br']
-    attributes = bleach.sanitizer.ALLOWED_ATTRIBUTES.copy()
-    attributes.update({'div': ['style'], 'p': ['style'], 'h1': ['style']})
-    styles = ['display', 'color', 'font-weight', 'font-size', 'border-radius', 'background', 'width', 'line-height',
-              'padding', 'border', 'margin-right', 'margin']
-    return bleach.clean(original_markdown(
-        six.text_type(object),
-        output_format="html5",
-        extensions=[
-            InlineStylesExtension(**styles_dictionary),
-        ]),
-        tags=tags,
-        attributes=attributes,
-        styles=styles
-    )
+    md, cleaner = get_pipeline(styles_dictionary or {})
+    md.reset()
+    return cleaner.clean(md.convert(six.text_type(object)))
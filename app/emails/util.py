@@ -2,7 +2,7 @@ from jinja2 import Environment, PackageLoader, BaseLoader, sandbox, select_autoe
 from .markdown_styler import markdown_with_inline_styles
 from flask import current_app, url_for, abort
 from dmutils.email import EmailError
-from app.tasks.email import send_email
+from app.tasks.email import send_bulk_email, send_email
 import six
 import rollbar
 import re
@@ -24,11 +24,28 @@ DEFAULT_STYLES = {
 }
 
 
+# templates ship with the code, so they are compiled once rather than checked for changes on every render
 template_env = Environment(
     loader=PackageLoader('app.emails', 'templates'),
-    autoescape=select_autoescape(['html', 'xml', 'md'])
+    autoescape=select_autoescape(['html', 'xml', 'md']),
+    auto_reload=False
 )
 
+string_template_env = sandbox.SandboxedEnvironment(loader=BaseLoader)
+_string_templates = {}
+MAXIMUM_CACHED_STRING_TEMPLATES = 100
+
+
+def get_string_template(source):
+    """Compile a template held in a string (such as an assessment message) once per process."""
+    template = _string_templates.get(source)
+    if template is None:
+        if len(_string_templates) >= MAXIMUM_CACHED_STRING_TEMPLATES:
+            _string_templates.clear()
+        template = _string_templates[source] = string_template_env.from_string(source)
+
+    return template
+
 
 def fill_template(filename, **kwargs):
     template = template_env.get_template(filename)
@@ -50,8 +67,7 @@ def render_email_from_string(template, **kwargs):
     header = kwargs.pop('header', '')
     styles = kwargs.pop('styles', DEFAULT_STYLES)
 
-    sub = sandbox.SandboxedEnvironment(loader=BaseLoader).from_string(template)
-    md = sub.render(**kwargs)
+    md = get_string_template(template).render(**kwargs)
     rendered = markdown_with_inline_styles(md, styles)
     master = template_env.get_template('master.html')
     rendered = master.render(header=header, body=rendered)
@@ -63,9 +79,10 @@ def send_or_handle_error(*args, **kwargs):
         return
 
     error_desc = kwargs.pop('event_description_for_errors', 'unspecified')
+    task = kwargs.pop('task', send_email)
 
     try:
-        send_email.delay(*args, **kwargs)
+        task.delay(*args, **kwargs)
 
     except EmailError as e:
         rollbar.report_exc_info()
@@ -79,6 +96,13 @@ def send_or_handle_error(*args, **kwargs):
         abort(503, response='Failed to send email for event: {}'.format(error_desc))
 
 
+def send_bulk_or_handle_error(to_addresses, *args, **kwargs):
+    """Send one rendered message to each address separately, queueing a task per batch of addresses."""
+    batch_size = current_app.config['DM_EMAIL_BULK_BATCH_SIZE']
+    for start in range(0, len(to_addresses), batch_size):
+        send_or_handle_error(to_addresses[start:start + batch_size], *args, task=send_bulk_email, **kwargs)
+
+
 def escape_token_markdown(token):
     token = re.sub(r'([_-])', r'\\\1', token)
     return token
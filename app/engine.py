@@ -0,0 +1,161 @@
+"""Engine and connection pool settings for each kind of process that talks to the database.
+
+API processes serve bursts of requests from waitress threads, while celery workers run a few tasks at a time
+and then sit idle, so each process type gets its own pool options from `DB_POOL_OPTIONS`, picked by the
+`DB_PROCESS_TYPE` the process sets on its app, along with its default statement timeout from
+`DB_STATEMENT_TIMEOUTS`. `DB_PGBOUNCER` hands pooling over to PgBouncer instead.
+"""
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import event, exc, text
+from sqlalchemy.orm.session import Session
+from sqlalchemy.pool import NullPool, QueuePool
+
+
+class PoolMetrics(object):
+    """How long checkouts from a pool wait for a connection, kept across the pools it is recreated as."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.ping_failures = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record_checkout(self, wait, timed_out=False):
+        with self.lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+
+    def record_ping_failure(self):
+        with self.lock:
+            self.ping_failures += 1
+
+    def serialize(self):
+        with self.lock:
+            attempts = self.checkouts + self.timeouts
+            return {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'pingFailures': self.ping_failures,
+                'checkoutWaitAvgMs': round(self.wait_total / attempts * 1000, 3) if attempts else 0,
+                'checkoutWaitMaxMs': round(self.wait_max * 1000, 3)
+            }
+
+
+class MeteredPoolMixin(object):
+    """Times each checkout and optionally pings the connection before handing it out.
+
+    SQLAlchemy 1.1 has no `pool_pre_ping`, so `pre_ping` follows its documented pessimistic disconnect
+    recipe (see `ping_on_checkout`).
+    """
+
+    def __init__(self, creator, pre_ping=False, **kw):
+        super(MeteredPoolMixin, self).__init__(creator, **kw)
+        self.pre_ping = pre_ping
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        start = time.time()
+        try:
+            record = super(MeteredPoolMixin, self)._do_get()
+        except exc.TimeoutError:
+            self.metrics.record_checkout(time.time() - start, timed_out=True)
+            raise
+        self.metrics.record_checkout(time.time() - start)
+        return record
+
+    def recreate(self):
+        pool = super(MeteredPoolMixin, self).recreate()
+        pool.pre_ping = self.pre_ping
+        pool.metrics = self.metrics
+        return pool
+
+
+class MeteredQueuePool(MeteredPoolMixin, QueuePool):
+    def serialize(self):
+        checked_out = self.checkedout()
+        capacity = self.size() + max(self._max_overflow, 0)
+        return {
+            'size': self.size(),
+            'maxOverflow': self._max_overflow,
+            'checkedOut': checked_out,
+            'checkedIn': self.checkedin(),
+            'overflow': max(self.overflow(), 0),
+            'saturation': round(float(checked_out) / capacity, 3) if capacity else None,
+            'metrics': self.metrics.serialize()
+        }
+
+
+class MeteredNullPool(MeteredPoolMixin, NullPool):
+    def serialize(self):
+        return {
+            'size': 0,
+            'metrics': self.metrics.serialize()
+        }
+
+
+def ping_on_checkout(dbapi_connection, connection_record, connection_proxy):
+    pool = connection_proxy._pool
+    if not getattr(pool, 'pre_ping', False):
+        return
+
+    try:
+        cursor = dbapi_connection.cursor()
+        cursor.execute('SELECT 1')
+        cursor.close()
+        dbapi_connection.rollback()
+    except Exception:
+        pool.metrics.record_ping_failure()
+        # the pool throws the connection away and retries the checkout with a new one
+        raise exc.DisconnectionError()
+
+
+for pool_class in (MeteredQueuePool, MeteredNullPool):
+    event.listen(pool_class, 'checkout', ping_on_checkout)
+
+
+def default_statement_timeout(config):
+    """The statement timeout, in milliseconds, for this process's type, or None to leave it unset."""
+    return config['DB_STATEMENT_TIMEOUTS']['default'].get(config['DB_PROCESS_TYPE'])
+
+
+def engine_options(config):
+    """The `create_engine` options for this process's type."""
+    process_type = config['DB_PROCESS_TYPE']
+    pool = dict(config['DB_POOL_OPTIONS'][process_type])
+    timeout = default_statement_timeout(config)
+
+    options = {'pre_ping': pool.pop('pre_ping', False)}
+    if config['DB_PGBOUNCER']:
+        # PgBouncer keeps the connections, and in transaction mode it rejects startup options and doesn't
+        # keep session settings between transactions, so the timeout is set per transaction instead
+        options['poolclass'] = MeteredNullPool
+    else:
+        options['poolclass'] = MeteredQueuePool
+        options.update(pool)
+        if timeout:
+            options['connect_args'] = {'options': '-c statement_timeout={}'.format(timeout)}
+
+    return options
+
+
+def set_statement_timeout(connection, timeout):
+    """Set the statement timeout, in milliseconds, until the transaction of a session or connection ends."""
+    connection.execute(text("SELECT set_config('statement_timeout', :timeout, true)"), {'timeout': str(timeout)})
+
+
+@event.listens_for(Session, 'after_begin')
+def set_default_statement_timeout(session, transaction, connection):
+    if not current_app or not current_app.config.get('DB_PGBOUNCER'):
+        return
+    timeout = default_statement_timeout(current_app.config)
+    if timeout:
+        set_statement_timeout(connection, timeout)
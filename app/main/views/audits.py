@@ -1,10 +1,11 @@
 from flask import jsonify, abort, request, current_app
 from datetime import datetime, timedelta
+import pendulum
 from ...models import AuditEvent
 from sqlalchemy import asc, desc
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.sql.expression import true, false
-from ...utils import pagination_links, get_valid_page_or_1
+from ...utils import pagination_links, get_valid_page_or_1, encode_cursor, decode_cursor_or_400, keyset_after, url_for
 from .. import main
 from ... import db, models
 from dmapiclient.audit import AuditTypes
@@ -43,11 +44,21 @@ def list_audits():
     except ValueError:
         abort(400, 'invalid page size supplied')
 
-    audits = AuditEvent.query.order_by(
-        desc(AuditEvent.created_at)
-        if convert_to_boolean(request.args.get('latest_first'))
-        else asc(AuditEvent.created_at)
-    )
+    cursor = request.args.get('cursor', None)
+    include_user = convert_to_boolean(request.args.get('include-user'))
+
+    acknowledged = request.args.get('acknowledged', None)
+    if acknowledged and acknowledged != 'all' and not is_valid_acknowledged_state(acknowledged):
+        abort(400, 'invalid acknowledged state supplied')
+
+    audits = AuditEvent.query
+    if not acknowledged or acknowledged == 'all' or convert_to_boolean(acknowledged):
+        # only acknowledged events are ever archived, see archive_audit_events
+        audits = audits.select_entity_from(AuditEvent.live_and_archived())
+
+    latest_first = convert_to_boolean(request.args.get('latest_first'))
+    keyset = [(AuditEvent.created_at, latest_first), (AuditEvent.id, latest_first)]
+    audits = audits.order_by(*[desc(c) if d else asc(c) for c, d in keyset])
 
     audit_date = request.args.get('audit-date', None)
     if audit_date:
@@ -65,19 +76,15 @@ def list_audits():
             AuditEvent.type == audit_type
         )
 
-    acknowledged = request.args.get('acknowledged', None)
     if acknowledged and acknowledged != 'all':
-        if is_valid_acknowledged_state(acknowledged):
-            if convert_to_boolean(acknowledged):
-                audits = audits.filter(
-                    AuditEvent.acknowledged == true()
-                )
-            elif not convert_to_boolean(acknowledged):
-                audits = audits.filter(
-                    AuditEvent.acknowledged == false()
-                )
-        else:
-            abort(400, 'invalid acknowledged state supplied')
+        if convert_to_boolean(acknowledged):
+            audits = audits.filter(
+                AuditEvent.acknowledged == true()
+            )
+        elif not convert_to_boolean(acknowledged):
+            audits = audits.filter(
+                AuditEvent.acknowledged == false()
+            )
 
     object_type = request.args.get('object-type')
     object_id = request.args.get('object-id')
@@ -101,18 +108,41 @@ def list_audits():
     elif object_id:
         abort(400, 'object-id cannot be provided without object-type')
 
-    audits = audits.paginate(
-        page=page,
-        per_page=per_page
-    )
-
-    return jsonify(
-        auditEvents=[audit.serialize() for audit in audits.items],
-        links=pagination_links(
+    if cursor is not None:
+        # keyset pages cost the same however deep they go, and skip the count
+        created_at, audit_id = decode_cursor_or_400(cursor, 2)
+        try:
+            created_at = pendulum.parse(created_at)
+            audit_id = int(audit_id)
+        except (TypeError, ValueError):
+            abort(400, "Invalid cursor: {}".format(cursor))
+
+        items = audits.filter(keyset_after(keyset, [created_at, audit_id])).limit(per_page).all()
+        links = {'self': url_for('.list_audits', **request.args)}
+    else:
+        audits = audits.paginate(
+            page=page,
+            per_page=per_page
+        )
+        items = audits.items
+        links = pagination_links(
             audits,
             '.list_audits',
             request.args
         )
+
+    next_cursor = None
+    if items and len(items) == per_page:
+        next_cursor = encode_cursor([items[-1].created_at.isoformat(), items[-1].id])
+        if cursor is not None:
+            links['next'] = url_for('.list_audits', **dict(list(request.args.items()) + [('cursor', next_cursor)]))
+
+    user_names = AuditEvent.load_user_names(items) if include_user else None
+
+    return jsonify(
+        auditEvents=[audit.serialize(include_user=include_user, user_names=user_names) for audit in items],
+        links=links,
+        next_cursor=next_cursor
     )
 
 
@@ -1,15 +1,15 @@
 from .. import main
 from . import briefs, users, suppliers
-from ...models import Application, Brief, Domain, User, Supplier, SupplierDomain, BriefResponse
+from ...models import Brief, Domain, User, Supplier, SupplierDomain, BriefResponse
 from ... import db
-from sqlalchemy import desc, func, select, and_
+from sqlalchemy import desc, func, select
 import pendulum
 import json
 import io
 import csv
 from collections import defaultdict
 from flask import jsonify, make_response
-from app.api.services import key_values_service
+from app.api.services import application_service, key_values_service
 
 
 @main.route('/metrics', methods=['GET'])
@@ -113,43 +113,15 @@ def get_step_metrics():
 
 @main.route('/metrics/applications', methods=['GET'])
 def get_application_metrics():
-    timestamp = pendulum.now().to_iso8601_string()
-    metrics = {}
-
-    application_count = Application.query.count()
-    metrics["application_total_count"] = {"value": application_count, "ts": timestamp}
-    application_existing_seller_count = Application.query\
-        .filter(Application.supplier_code.isnot(None)).count()
-    metrics["application_new_seller_count"] = {"value": application_count - application_existing_seller_count,
-                                               "ts": timestamp}
-    metrics["application_existing_seller_count"] = {"value": application_existing_seller_count, "ts": timestamp}
-
-    suppliers_total = Supplier.query.filter(Supplier.abn != Supplier.DUMMY_ABN).count()
-    suppliers_with_apps_count = Supplier.query.filter(Supplier.abn != Supplier.DUMMY_ABN)\
-        .join(Application, and_(Application.supplier_code == Supplier.code)).distinct(Supplier.id).count()
-    metrics["suppliers_with_application_count"] = \
-        {"value": suppliers_with_apps_count, "ts": timestamp}
-    metrics["suppliers_without_application_count"] = \
-        {"value": suppliers_total - suppliers_with_apps_count, "ts": timestamp}
-
-    applications_by_status = select([Application.status,
-                                     func.count(Application.status), func.count(Application.supplier_code)]) \
-        .order_by(Application.status) \
-        .group_by(Application.status)
-    for (status, count, existing_seller) in db.session.execute(applications_by_status):
-        metrics["application_status_{}_total_count".format(status)] = \
-            {"value": count, "ts": timestamp}
-        metrics["application_status_{}_existing_seller_count".format(status)] = \
-            {"value": existing_seller, "ts": timestamp}
-        metrics["application_status_{}_new_seller_count".format(status)] = \
-            {"value": count - existing_seller, "ts": timestamp}
-
-    for status in ['saved', 'submitted', 'approved', 'approval_rejected', 'complete', 'assessment_rejected']:
-        for category in ['existing_seller', 'new_seller', 'total']:
-            if "application_status_{}_{}_count".format(status, category) not in metrics:
-                metrics["application_status_{}_{}_count".format(status, category)] = {"value": 0, "ts": timestamp}
-
-    return jsonify(metrics)
+    snapshot = key_values_service.get_by_key('application_metrics')
+    if snapshot:
+        timestamp = snapshot['updated_at'].to_iso8601_string()
+        counts = snapshot['data']
+    else:
+        timestamp = pendulum.now().to_iso8601_string()
+        counts = application_service.get_metrics()
+
+    return jsonify({k: {"value": v, "ts": timestamp} for k, v in counts.iteritems()})
 
 
 @main.route('/metrics/applications/history', methods=['GET'])
@@ -1,10 +1,13 @@
 from datetime import datetime
+from decimal import Decimal, InvalidOperation
 
+import pendulum
 from flask import abort, current_app, jsonify, request, url_for
+from six import integer_types, string_types
 from sqlalchemy.exc import IntegrityError, DataError
 from sqlalchemy.sql.expression import true
 from sqlalchemy.sql import cast
-from sqlalchemy import Boolean, select, column, or_
+from sqlalchemy import Boolean, Numeric, select, column, or_
 from sqlalchemy.dialects.postgresql import ARRAY, array
 from sqlalchemy.dialects import postgresql as postgres
 from sqlalchemy import String, literal
@@ -24,7 +27,7 @@ from functools import reduce
 from app.utils import (
     get_json_from_request, get_nonnegative_int_or_400, get_positive_int_or_400,
     get_valid_page_or_1, json_has_required_keys, pagination_links,
-    validate_and_return_updater_request
+    validate_and_return_updater_request, encode_cursor, decode_cursor_or_400, keyset_after
 )
 from ...supplier_utils import validate_agreement_details_data
 from dmapiclient.audit import AuditTypes
@@ -89,6 +92,7 @@ def list_suppliers():
                 'self': url_for('.list_suppliers', _external=True, **request.args),
             }
             supplier_results = suppliers.all()
+        supplier_results = Supplier.prefetch_signed_agreements(supplier_results)
         supplier_data = [supplier.serializable for supplier in supplier_results]
     except DataError:
         abort(400, 'invalid framework')
@@ -207,12 +211,9 @@ def product_search():
         ob = [asc(Product.name)]
 
     if search_term:
-        ob = [desc(func.ts_rank_cd(func.to_tsvector(func.concat(Product.name,
-                                                                Product.summary, Supplier.name)), tsquery))] + ob
+        ob = [desc(func.ts_rank_cd(Product.search_vector, tsquery))] + ob
 
-        condition = func.to_tsvector(func.concat(Product.name, Product.summary, Supplier.name)) \
-            .op('@@')(tsquery)
-        q = q.filter(condition)
+        q = q.filter(Product.search_vector.op('@@')(tsquery))
     q = q.order_by(*ob)
 
     raw_results = list(q)
@@ -303,15 +304,9 @@ def casestudies_search():
         ob = [asc(CaseStudy.data['title'].astext)]
 
     if search_term:
-        ob = [desc(func.ts_rank_cd(func.to_tsvector(
-            func.concat(Supplier.name, CaseStudy.data['title'].astext,
-                        CaseStudy.data['approach'].astext)), tsquery))] + ob
+        ob = [desc(func.ts_rank_cd(CaseStudy.search_vector, tsquery))] + ob
 
-        condition = func.to_tsvector(func.concat(Supplier.name,
-                                                 CaseStudy.data['title'].astext,
-                                                 CaseStudy.data['approach'].astext)).op('@@')(tsquery)
-
-        q = q.filter(condition)
+        q = q.filter(CaseStudy.search_vector.op('@@')(tsquery))
     q = q.order_by(*ob)
 
     raw_results = list(q)
@@ -346,7 +341,48 @@ def casestudies_search():
     return response
 
 
-def do_search(search_query, offset, result_count, new_domains, framework_slug):
+def search_cursor_values_or_400(cursor, search_term, sort_by):
+    """Decode a search cursor and check each keyset value has the type its column needs."""
+    values = decode_cursor_or_400(cursor, 3 if search_term else 2)
+    sort_token, code = values[-2], values[-1]
+
+    try:
+        if search_term:
+            values[0] = Decimal(values[0])
+            if not values[0].is_finite():
+                raise ValueError()
+        if sort_token is not None:
+            if not isinstance(sort_token, string_types):
+                raise ValueError()
+            if sort_by == 'latest':
+                pendulum.parse(sort_token)
+        if not isinstance(code, integer_types) or isinstance(code, bool):
+            raise ValueError()
+    except (InvalidOperation, TypeError, ValueError):
+        abort(400, "Invalid cursor: {}".format(cursor))
+
+    return values
+
+
+def search_headlines(codes, tsquery):
+    """Highlight the search term in the summaries of the suppliers on the page."""
+    headline = func.ts_headline(
+        'english',
+        func.concat(Supplier.summary,
+                    ' ',
+                    Supplier.data['tools'].astext,
+                    ' ',
+                    Supplier.data['methodologies'].astext,
+                    ' ',
+                    Supplier.data['technologies'].astext, ''),
+        tsquery,
+        'MaxWords=25, MinWords=20, ShortWord=3, HighlightAll=FALSE, MaxFragments=1'
+    )
+    query = db.session.query(Supplier.code, headline.label('headline')).filter(Supplier.code.in_(codes))
+    return {r.code: r.headline for r in query if r.headline}
+
+
+def do_search(search_query, offset, result_count, new_domains, framework_slug, cursor=None):
     try:
         sort_dir = list(search_query['sort'][0].values())[0]['order']
     except (KeyError, IndexError):
@@ -407,18 +443,6 @@ def do_search(search_query, offset, result_count, new_domains, framework_slug):
             tsquery = func.plainto_tsquery(search_term)
         else:
             tsquery = func.to_tsquery(search_term + ":*")
-        q = q.add_column(func.ts_headline(
-            'english',
-            func.concat(Supplier.summary,
-                         ' ',
-                         Supplier.data['tools'].astext,
-                         ' ',
-                         Supplier.data['methodologies'].astext,
-                         ' ',
-                         Supplier.data['technologies'].astext, ''),
-            tsquery,
-            'MaxWords=25, MinWords=20, ShortWord=3, HighlightAll=FALSE, MaxFragments=1'
-        ))
 
     q = q.group_by(Supplier.id)
 
@@ -453,51 +477,79 @@ def do_search(search_query, offset, result_count, new_domains, framework_slug):
 
         q = q.filter(selected_seller_types.contains(array(seller_types_list)))
 
-    if sort_by:
-        if sort_by == 'latest':
-            ob = [desc(Supplier.last_update_time)]
-        else:
-            ob = [asc(Supplier.name)]
+    if sort_by == 'latest':
+        sort_column, sort_descending = Supplier.last_update_time, True
+    elif sort_by:
+        sort_column, sort_descending = Supplier.name, False
     else:
-        if sort_dir == 'desc':
-            ob = [desc(Supplier.name)]
-        else:
-            ob = [asc(Supplier.name)]
+        sort_column, sort_descending = Supplier.name, sort_dir == 'desc'
+
+    # The page is cut in the database: the grouped, filtered suppliers are numbered with a
+    # window count for the total and only the requested slice of (rank, sort key, code) rows
+    # is returned. Rank is rounded so it can round-trip exactly through a keyset cursor.
+    columns = [
+        Supplier.code.label('code'),
+        sort_column.label('sort_key'),
+        cast(sort_column, TEXT).label('sort_token'),
+        func.count().over().label('total')
+    ]
 
     if search_term:
-        ob = [desc(func.ts_rank_cd(Supplier.text_vector, tsquery))] + ob
-
         q = q.filter(Supplier.text_vector.op('@@')(tsquery))
+        columns.append(func.round(cast(func.ts_rank_cd(Supplier.text_vector, tsquery), Numeric), 6).label('rank'))
 
-    q = q.order_by(*ob)
+    matches = q.with_entities(*columns).subquery()
 
-    raw_results = list(q)
-    results = []
+    keyset = []
+    if search_term:
+        keyset.append((matches.c.rank, True))
+    keyset.append((matches.c.sort_key, sort_descending))
+    keyset.append((matches.c.code, False))
 
-    for x in range(len(raw_results)):
-        if type(raw_results[x]) is Supplier:
-            result = raw_results[x]
-        else:
-            result = raw_results[x][0]
-            if raw_results[x][1] is not None and raw_results[x][1] != '':
-                result.summary = raw_results[x][1]
-        results.append(result)
+    page = db.session.query(matches).order_by(*[desc(c) if d else asc(c) for c, d in keyset])
 
-    sliced_results = results[offset:(offset + result_count)]
+    if cursor:
+        values = search_cursor_values_or_400(cursor, search_term, sort_by)
+        page = page.filter(keyset_after(keyset, values))
+    else:
+        page = page.offset(offset)
+
+    rows = page.limit(result_count).all()
+
+    if rows:
+        total = rows[0].total
+    elif offset or cursor:
+        total = db.session.query(func.count()).select_from(matches).scalar()
+    else:
+        total = 0
+
+    next_cursor = None
+    if rows and len(rows) == result_count:
+        last = rows[-1]
+        values = [last.sort_token, last.code]
+        if search_term:
+            values.insert(0, str(last.rank))
+        next_cursor = encode_cursor(values)
+
+    # headlines are built for the page only, not for every match
+    headlines = search_headlines([r.code for r in rows], tsquery) if search_term and rows else {}
 
     q = db.session.query(Supplier.code, Supplier.name, Supplier.summary, Supplier.is_recruiter,
                          Supplier.data, Domain.name.label('domain_name'),
                          SupplierDomain.status.label('domain_status'))\
         .outerjoin(SupplierDomain, Domain)\
-        .filter(Supplier.id.in_([sr.id for sr in sliced_results]))\
-        .order_by(Supplier.name)
+        .filter(Supplier.code.in_([r.code for r in rows]))\
+        .order_by(Supplier.name, Supplier.code)
 
-    suppliers = [r._asdict() for r in q]
+    suppliers = [r._asdict() for r in q] if rows else []
 
     sliced_results = []
     for key, group in groupby(suppliers, key=itemgetter('code')):
         supplier = group.next()
 
+        if key in headlines:
+            supplier['summary'] = headlines[key]
+
         supplier['seller_type'] = supplier.get('data') and supplier['data'].get('seller_type')
 
         supplier['domains'] = {'assessed': [], 'unassessed': []}
@@ -514,7 +566,7 @@ def do_search(search_query, offset, result_count, new_domains, framework_slug):
 
         sliced_results.append(supplier)
 
-    return sliced_results, len(results)
+    return sliced_results, total, next_cursor
 
 
 @main.route('/suppliers/search', methods=['GET'])
@@ -525,13 +577,17 @@ def supplier_search():
     offset = get_nonnegative_int_or_400(request.args, 'from', 0)
     result_count = get_positive_int_or_400(request.args, 'size', current_app.config['DM_API_SUPPLIERS_PAGE_SIZE'])
     framework_slug = request.args.get('framework', 'digital-marketplace')
-    sliced_results, count = do_search(search_query, offset, result_count, new_domains, framework_slug)
+    cursor = request.args.get('cursor', None)
+    sliced_results, count, next_cursor = do_search(
+        search_query, offset, result_count, new_domains, framework_slug, cursor=cursor
+    )
 
     result = {
         'hits': {
             'total': count,
             'hits': [{'_source': r} for r in sliced_results]
-        }
+        },
+        'next_cursor': next_cursor
     }
 
     try:
@@ -846,7 +902,7 @@ def get_domain(domain_id):
 
 @main.route('/domains', methods=['GET'])
 def get_domains_list():
-    result = [d.get_serializable() for d in Domain.query.order_by('ordering').all()]
+    result = [d.get_serializable() for d in Domain.query.options(noload('suppliers')).order_by('ordering').all()]
 
     return jsonify(domains=result)
 
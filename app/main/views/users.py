@@ -109,8 +109,7 @@ def get_user_by_id(user_id):
     notification_count = 0
     teams = []
     if user.role == 'supplier':
-        messages = supplier_business.get_supplier_messages(user.supplier_code, False)
-        notification_count = len(messages.errors + messages.warnings)
+        notification_count = supplier_business.get_notification_count(user.supplier_code)
     elif user.role == 'buyer':
         teams = team_business.get_user_teams(user.id)
 
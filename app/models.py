@@ -15,14 +15,15 @@ from operator import itemgetter
 from six import string_types, text_type, binary_type
 
 from sqlalchemy import text
-from sqlalchemy import asc, desc, func, and_
-from sqlalchemy.dialects.postgresql import JSON
+from sqlalchemy import asc, bindparam, desc, event, func, and_, or_, select, union_all
+from sqlalchemy.dialects.postgresql import JSON, TSVECTOR
 from sqlalchemy.ext.declarative import declared_attr
 from sqlalchemy.ext.hybrid import hybrid_property, hybrid_method
 from sqlalchemy.ext.mutable import MutableDict
 from sqlalchemy.ext.associationproxy import association_proxy
-from sqlalchemy.orm import validates, relationship, column_property, noload
-from sqlalchemy.orm.session import Session
+from sqlalchemy.orm import validates, relationship, column_property, deferred
+from sqlalchemy.orm.attributes import get_history, set_committed_value
+from sqlalchemy.orm.session import Session, make_transient_to_detached
 from sqlalchemy.sql.expression import case as sql_case
 from sqlalchemy.sql.expression import cast as sql_cast
 from sqlalchemy.types import String, Date, Integer, Interval
@@ -32,6 +33,7 @@ from dmutils.data_tools import ValidationError, normalise_acn, parse_money
 from dmapiclient.audit import AuditTypes
 
 from . import db
+from .caching import clear_process_cached_after_commit, process_cached
 
 from app.utils import (
     link, url_for, strip_whitespace_from_data, drop_foreign_fields, purge_nulls_from_data, filter_fields,
@@ -517,6 +519,19 @@ class MasterAgreement(db.Model):
 
         return data
 
+    @classmethod
+    def serialized_by_id(cls):
+        """Every master agreement, serialized and keyed by id.
+
+        Supplier serialization reads this for each signed agreement, and the table only gains a row when a new
+        agreement comes into force, so it is kept in process and cleared when an agreement is written.
+        """
+        return process_cached(
+            'master_agreements',
+            current_app.config['MASTER_AGREEMENT_CACHE_TIMEOUT'],
+            lambda: {agreement.id: agreement.serialize() for agreement in cls.query.all()}
+        )
+
 
 class SignedAgreement(db.Model):
     __tablename__ = 'signed_agreement'
@@ -913,22 +928,70 @@ class Supplier(db.Model):
         if 'case_studies' in j:
             j['case_studies'] = [normalize_key_case(c) for c in j['case_studies']]
 
-        signed_agreements = []
-        for v in j['signed_agreements']:
-            signed_agreements.append(self.serialize_signed_agreement(v))
+        if j['signed_agreements']:
+            signers = getattr(self, '_prefetched_signers', None)
+            if signers is None:
+                signers = Supplier.load_signers(j['signed_agreements'])
 
-        j['signed_agreements'] = signed_agreements
+            master_agreements = MasterAgreement.serialized_by_id()
+            j['signed_agreements'] = [
+                self.serialize_signed_agreement(v, master_agreements, signers) for v in j['signed_agreements']
+            ]
 
         return j
 
-    def serialize_signed_agreement(self, signed_agreement):
-        agreement = MasterAgreement.query.get(signed_agreement['agreement_id'])
-        user = User.query.get(signed_agreement['user_id'])
+    @staticmethod
+    def load_signers(signed_agreements):
+        user_ids = set(a['user_id'] if isinstance(a, dict) else a.user_id for a in signed_agreements)
+        if not user_ids:
+            return {}
+
+        return {user.id: user for user in User.query.filter(User.id.in_(user_ids))}
+
+    @classmethod
+    def prefetch_signed_agreements(cls, suppliers):
+        """Load the signed agreements and signers for a page of suppliers in two queries.
+
+        Without this each supplier lazy loads its agreements and then looks up every signer separately when
+        it is serialized.
+        """
+        suppliers = list(suppliers)
+        codes = [supplier.code for supplier in suppliers]
+        if not codes:
+            return suppliers
+
+        signed_agreements = (
+            SignedAgreement
+            .query
+            .filter(SignedAgreement.supplier_code.in_(codes))
+            .order_by(SignedAgreement.agreement_id)
+            .all()
+        )
+        signers = cls.load_signers(signed_agreements)
+
+        for supplier in suppliers:
+            set_committed_value(
+                supplier,
+                'signed_agreements',
+                [a for a in signed_agreements if a.supplier_code == supplier.code]
+            )
+            supplier._prefetched_signers = signers
+
+        return suppliers
+
+    def serialize_signed_agreement(self, signed_agreement, master_agreements=None, signers=None):
+        if master_agreements is None:
+            master_agreements = MasterAgreement.serialized_by_id()
+        if signers is None:
+            signers = Supplier.load_signers([signed_agreement])
+
+        agreement = master_agreements.get(signed_agreement['agreement_id'])
+        user = signers.get(signed_agreement['user_id']) or User.query.get(signed_agreement['user_id'])
 
         return {
-            'agreement': agreement.serialize() if agreement else None,
-            'htmlUrl': agreement.data['htmlUrl'] if 'htmlUrl' in agreement.data else None,
-            'pdfUrl': agreement.data['pdfUrl'] if 'pdfUrl' in agreement.data else None,
+            'agreement': dict(agreement) if agreement else None,
+            'htmlUrl': agreement['htmlUrl'] if 'htmlUrl' in agreement else None,
+            'pdfUrl': agreement['pdfUrl'] if 'pdfUrl' in agreement else None,
             'applicationId': signed_agreement['application_id'],
             'signedAt': signed_agreement['signed_at'],
             'supplierCode': signed_agreement['supplier_code'],
@@ -1072,20 +1135,54 @@ class Domain(db.Model):
     price_maximum = db.Column(db.Numeric, nullable=False)
     criteria_needed = db.Column(db.Numeric, nullable=False)
 
-    suppliers = relationship("SupplierDomain", back_populates="domain", lazy='joined')
+    # every seller's assessment for the domain, so only load it where it is needed
+    suppliers = relationship("SupplierDomain", back_populates="domain")
     criteria = relationship("DomainCriteria", back_populates="domain")
     assoc_suppliers = association_proxy('suppliers', 'supplier')
 
     @staticmethod
-    def get_by_name_or_id(name_or_id):
+    def cached_by_name_and_id():
+        """The columns of every domain, keyed by id and by lower cased name.
+
+        Domains are looked up by name or id all over the place (briefs, assessments, evidence) and the table
+        only changes when a new domain is added, so it is kept in process and loaded again in every process
+        once a domain write commits.
+        """
+        def load():
+            # read on a connection of its own, so uncommitted changes in the session never reach the cache
+            domains = {'by_id': {}, 'by_name': {}}
+            table = Domain.__table__
+            for row in db.engine.execute(table.select().order_by(table.c.id)):
+                values = dict(row)
+                domains['by_id'][values['id']] = values
+                domains['by_name'].setdefault(values['name'].lower(), values)
+            return domains
+
+        return process_cached('domains', current_app.config['DOMAIN_CACHE_TIMEOUT'], load)
+
+    @staticmethod
+    def find_by_name_or_id(name_or_id):
+        domains = Domain.cached_by_name_and_id()
         if isinstance(name_or_id, six.string_types):
-            d = Domain.query.filter(
-                func.lower(Domain.name) == func.lower(name_or_id)
-            ).options(
-                noload('suppliers')
-            ).first()
+            values = domains['by_name'].get(name_or_id.lower())
         else:
-            d = Domain.query.filter_by(id=name_or_id).first()
+            values = domains['by_id'].get(name_or_id)
+
+        if not values:
+            return None
+
+        # the session's own copy, along with any changes made to it, takes precedence over the cached row
+        domain = db.session.identity_map.get(Domain.__mapper__.identity_key_from_primary_key([values['id']]))
+        if domain is None:
+            # attach the cached row to the session as if it had been loaded, without going back to the database
+            domain = Domain(**values)
+            make_transient_to_detached(domain)
+            db.session.add(domain)
+        return domain
+
+    @staticmethod
+    def get_by_name_or_id(name_or_id):
+        d = Domain.find_by_name_or_id(name_or_id)
 
         if not d:
             raise ValidationError('cannot find domain: {}'.format(name_or_id))
@@ -1259,6 +1356,13 @@ class Product(db.Model):
 
     supplier_code = db.Column(db.BigInteger, db.ForeignKey('supplier.code'), nullable=False)
 
+    # maintained by refresh_search_vectors, see search_document below
+    search_vector = deferred(db.Column(TSVECTOR, nullable=True))
+
+    @staticmethod
+    def search_document():
+        return func.to_tsvector(func.concat(Product.name, Product.summary, Supplier.name))
+
     @staticmethod
     def get_by_name_or_id(name_or_id):
         if isinstance(name_or_id, six.string_types):
@@ -1886,25 +1990,18 @@ class DraftService(ServiceTableMixin, db.Model):
         return url_for(".fetch_draft_service", draft_id=self.id)
 
 
-class AuditEvent(db.Model):
-    __tablename__ = 'audit_event'
-
+class AuditEventTableMixin(object):
     id = db.Column(db.Integer, primary_key=True)
-    type = db.Column(db.String, index=True, nullable=False)
-    created_at = db.Column(DateTime, index=True, nullable=False, default=utcnow)
+    type = db.Column(db.String, nullable=False)
+    created_at = db.Column(DateTime, nullable=False, default=utcnow)
     user = db.Column(db.String)
     data = db.Column(MutableDict.as_mutable(JSON), default=dict)
 
     object_type = db.Column(db.String)
     object_id = db.Column(db.BigInteger)
 
-    object = generic_relationship(
-        object_type, object_id
-    )
-
     acknowledged = db.Column(
         db.Boolean,
-        index=True,
         unique=False,
         nullable=False)
 
@@ -1913,6 +2010,26 @@ class AuditEvent(db.Model):
         DateTime,
         nullable=True)
 
+    @declared_attr
+    def __table_args__(cls):
+        # one index per filter combination list_audits offers, each ending in its (created_at, id) sort key
+        return (
+            db.Index('ix_{}_created_at_id'.format(cls.__tablename__), 'created_at', 'id'),
+            db.Index('ix_{}_type_created_at_id'.format(cls.__tablename__), 'type', 'created_at', 'id'),
+            db.Index('ix_{}_acknowledged_created_at_id'.format(cls.__tablename__),
+                     'acknowledged', 'created_at', 'id'),
+            db.Index('ix_{}_object_created_at'.format(cls.__tablename__),
+                     'object_type', 'object_id', 'created_at'),
+        )
+
+
+class AuditEvent(AuditEventTableMixin, db.Model):
+    __tablename__ = 'audit_event'
+
+    object = generic_relationship(
+        'object_type', 'object_id'
+    )
+
     def __init__(self, audit_type, user, data, db_object):
         self.type = audit_type.value
         self.data = data
@@ -1928,8 +2045,9 @@ class AuditEvent(db.Model):
 
             return events.order_by(desc(AuditEvent.created_at)).first()
 
-    def serialize(self, include_user=False):
+    def serialize(self, include_user=False, user_names=None):
         """
+        :param user_names: email address to user name, from `load_user_names`, to save a query per event
         :return: dictionary representation of an audit event
         """
 
@@ -1960,15 +2078,68 @@ class AuditEvent(db.Model):
             })
 
         if include_user:
-            user = User.query.filter(
-                User.email_address == self.user
-            ).first()
+            if user_names is None:
+                user_names = AuditEvent.load_user_names([self])
 
-            if user:
-                data['userName'] = user.name
+            if self.user in user_names:
+                data['userName'] = user_names[self.user]
 
         return data
 
+    @staticmethod
+    def load_user_names(audit_events):
+        """Map the email addresses recorded against the audit events to user names, in one query."""
+        email_addresses = set(e.user for e in audit_events if e.user)
+        if not email_addresses:
+            return {}
+
+        return dict(
+            db.session.query(User.email_address, User.name).filter(User.email_address.in_(email_addresses))
+        )
+
+    @staticmethod
+    def live_and_archived():
+        """A selectable over both audit_event and archived_audit_event, for querying AuditEvents across both."""
+        columns = AuditEvent.__table__.columns.keys()
+        return union_all(
+            select([AuditEvent.__table__.c[c] for c in columns]),
+            select([ArchivedAuditEvent.__table__.c[c] for c in columns])
+        ).alias('audit_event')
+
+
+class ArchivedAuditEvent(AuditEventTableMixin, db.Model):
+    """
+        An acknowledged audit event old enough to be moved out of audit_event, see `archive_audit_events`
+    """
+    __tablename__ = 'archived_audit_event'
+
+    # archived rows keep the id they had in audit_event, so there is no sequence here
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+
+
+def archive_audit_events(connection, before, batch_size):
+    """Move acknowledged audit events created before `before` to archived_audit_event, a batch at a time.
+
+    Each batch is deleted and inserted in one statement, so an event is always in exactly one of the tables.
+    Returns the number of events moved by this call; run it until it returns 0.
+    """
+    columns = ', '.join('"{}"'.format(c) for c in AuditEvent.__table__.columns.keys())
+    statement = text("""
+        WITH moved AS (
+            DELETE FROM audit_event
+            WHERE id IN (
+                SELECT id FROM audit_event
+                WHERE acknowledged AND created_at < :before
+                ORDER BY created_at, id
+                LIMIT :batch_size
+            )
+            RETURNING {columns}
+        )
+        INSERT INTO archived_audit_event ({columns})
+        SELECT {columns} FROM moved
+    """.format(columns=columns)).bindparams(bindparam('before', type_=DateTime))
+    return connection.execute(statement, before=before, batch_size=batch_size).rowcount
+
 
 class KeyValue(db.Model):
     __tablename__ = 'key_value'
@@ -2007,6 +2178,21 @@ class Brief(db.Model):
     questions_closed_at = db.Column(DateTime, index=True, nullable=True)
     withdrawn_at = db.Column(DateTime, index=True, nullable=True)
     responses_zip_filesize = db.Column(db.BigInteger, nullable=True)
+    # queued, running, done or failed, see app.tasks.s3.create_responses_zip
+    responses_zip_status = db.Column(db.String, nullable=True)
+    responses_zip_queued_at = db.Column(DateTime, nullable=True)
+    responses_zip_started_at = db.Column(DateTime, nullable=True)
+    responses_zip_finished_at = db.Column(DateTime, nullable=True)
+
+    # copies of the data most often filtered on, kept in step with `data` by `sync_brief_data_columns`
+    seller_selector = db.Column(db.String, index=True, nullable=True)
+    open_to = db.Column(db.String, nullable=True)
+    area_of_expertise = db.Column(db.String, index=True, nullable=True)
+
+    # counts of the brief's responses by state, kept up to date by `count_brief_responses`
+    responses_submitted_count = db.Column(db.Integer, nullable=False, default=0, server_default=text('0'))
+    responses_draft_count = db.Column(db.Integer, nullable=False, default=0, server_default=text('0'))
+    responses_withdrawn_count = db.Column(db.Integer, nullable=False, default=0, server_default=text('0'))
 
     __table_args__ = (db.ForeignKeyConstraint([framework_id, _lot_id],
                                               ['framework_lot.framework_id', 'framework_lot.lot_id']),
@@ -2329,6 +2515,24 @@ class Brief(db.Model):
             'requirementsLength': requirements_length
         }
 
+    def serialize_responses_zip(self):
+        def as_s(x):
+            if x:
+                return x.to_iso8601_string(extended=True)
+
+        duration = None
+        if self.responses_zip_started_at and self.responses_zip_finished_at:
+            duration = (self.responses_zip_finished_at - self.responses_zip_started_at).total_seconds()
+
+        return {
+            'status': self.responses_zip_status,
+            'size': self.responses_zip_filesize,
+            'duration': duration,
+            'queuedAt': as_s(self.responses_zip_queued_at),
+            'startedAt': as_s(self.responses_zip_started_at),
+            'finishedAt': as_s(self.responses_zip_finished_at)
+        }
+
     def serialize(self, with_users=False, with_author=True):
         data = dict(self.data.items())
         data.update({
@@ -2419,7 +2623,15 @@ class BriefUser(db.Model):
     __tablename__ = 'brief_user'
 
     brief_id = db.Column(db.Integer, db.ForeignKey('brief.id'), primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True, index=True)
+
+
+class BriefInvitedSupplier(db.Model):
+    """The sellers invited to a brief, kept in step with the brief's `sellers` data so they can be queried by seller."""
+    __tablename__ = 'brief_invited_supplier'
+
+    brief_id = db.Column(db.Integer, db.ForeignKey('brief.id', ondelete='CASCADE'), primary_key=True)
+    supplier_code = db.Column(db.BigInteger, primary_key=True, index=True)
 
 
 class BriefResponseDownload(db.Model):
@@ -3100,6 +3312,15 @@ class CaseStudy(db.Model):
         nullable=False
     )
 
+    # maintained by refresh_search_vectors, see search_document below
+    search_vector = deferred(db.Column(TSVECTOR, nullable=True))
+
+    @staticmethod
+    def search_document():
+        return func.to_tsvector(func.concat(Supplier.name,
+                                            CaseStudy.data['title'].astext,
+                                            CaseStudy.data['approach'].astext))
+
     @validates('data')
     def validates_data(self, key, data):
         data = drop_foreign_fields(data, [
@@ -3282,8 +3503,8 @@ class TeamBrief(db.Model):
     __tablename__ = 'team_brief'
 
     id = db.Column(db.Integer, primary_key=True)
-    brief_id = db.Column(db.Integer, db.ForeignKey('brief.id'), nullable=False)
-    team_id = db.Column(db.Integer, db.ForeignKey('team.id'), nullable=False)
+    brief_id = db.Column(db.Integer, db.ForeignKey('brief.id'), index=True, nullable=False)
+    team_id = db.Column(db.Integer, db.ForeignKey('team.id'), index=True, nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
 
     user = relationship('User')
@@ -3295,8 +3516,8 @@ class TeamMember(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     is_team_lead = db.Column(db.Boolean, default=False, nullable=False)
-    team_id = db.Column(db.Integer, db.ForeignKey('team.id'), nullable=False)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    team_id = db.Column(db.Integer, db.ForeignKey('team.id'), index=True, nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), index=True, nullable=False)
     updated_at = db.Column(DateTime, index=False, nullable=False, default=utcnow, onupdate=utcnow)
 
     permissions = relationship('TeamMemberPermission', cascade="all, delete-orphan")
@@ -3351,6 +3572,213 @@ db.Index(
     AuditEvent.acknowledged,
 )
 
+# GIN indexes for the stored full text search documents used by /products/search and
+# /casestudies/search.
+db.Index(
+    'ix_product_search_vector',
+    Product.search_vector,
+    postgresql_using='gin'
+)
+
+db.Index(
+    'ix_case_study_search_vector',
+    CaseStudy.search_vector,
+    postgresql_using='gin'
+)
+
+
+def refresh_search_vectors(connection, product_ids=None, case_study_ids=None, supplier_codes=None):
+    """Recompute the stored search vectors for the given products, case studies and suppliers.
+
+    Both documents include the supplier name, so a supplier code refreshes all of that supplier's
+    products and case studies. Passing None for every argument refreshes every row.
+    """
+    refresh_all = product_ids is None and case_study_ids is None and supplier_codes is None
+
+    for model, ids in ((Product, product_ids), (CaseStudy, case_study_ids)):
+        criteria = []
+        if ids:
+            criteria.append(model.id.in_(ids))
+        if supplier_codes:
+            criteria.append(model.supplier_code.in_(supplier_codes))
+        if not criteria and not refresh_all:
+            continue
+
+        statement = (
+            model.__table__
+            .update()
+            .values(search_vector=model.search_document())
+            .where(Supplier.code == model.supplier_code)
+        )
+        if criteria:
+            statement = statement.where(or_(*criteria))
+        connection.execute(statement)
+
+
+@event.listens_for(Session, 'after_flush')
+def refresh_search_vectors_after_flush(session, flush_context):
+    product_ids = set()
+    case_study_ids = set()
+    supplier_codes = set()
+
+    for obj in session.new.union(session.dirty):
+        if isinstance(obj, Product):
+            product_ids.add(obj.id)
+        elif isinstance(obj, CaseStudy):
+            case_study_ids.add(obj.id)
+        elif isinstance(obj, Supplier) and obj not in session.new and get_history(obj, 'name').has_changes():
+            supplier_codes.add(obj.code)
+
+    if product_ids or case_study_ids or supplier_codes:
+        refresh_search_vectors(
+            session.connection(),
+            product_ids=product_ids,
+            case_study_ids=case_study_ids,
+            supplier_codes=supplier_codes
+        )
+
+
+def invited_supplier_codes(data):
+    """The codes of the sellers in a brief's `sellers` data."""
+    sellers = (data or {}).get('sellers') or {}
+    return set(int(code) for code in sellers.keys() if six.text_type(code).isdigit())
+
+
+def refresh_brief_invited_suppliers(connection, briefs):
+    """Replace the brief_invited_supplier rows of each brief with the sellers now in its data."""
+    table = BriefInvitedSupplier.__table__
+    connection.execute(table.delete().where(table.c.brief_id.in_([brief.id for brief in briefs])))
+    rows = [
+        {'brief_id': brief.id, 'supplier_code': code}
+        for brief in briefs
+        for code in invited_supplier_codes(brief.data)
+    ]
+    if rows:
+        connection.execute(table.insert(), rows)
+
+
+BRIEF_DATA_COLUMNS = {
+    'seller_selector': 'sellerSelector',
+    'open_to': 'openTo',
+    'area_of_expertise': 'areaOfExpertise'
+}
+
+
+def brief_data_columns(data):
+    """The values of the brief columns copied out of its data."""
+    data = data or {}
+    return {
+        column: data[key] if isinstance(data.get(key), string_types) else None
+        for column, key in BRIEF_DATA_COLUMNS.items()
+    }
+
+
+@event.listens_for(Session, 'before_flush')
+def sync_brief_data_columns(session, flush_context, instances):
+    for obj in session.new.union(session.dirty):
+        if isinstance(obj, Brief) and (obj in session.new or get_history(obj, 'data').has_changes()):
+            for column, value in brief_data_columns(obj.data).items():
+                if getattr(obj, column) != value:
+                    setattr(obj, column, value)
+
+
+@event.listens_for(Session, 'after_flush')
+def refresh_brief_invited_suppliers_after_flush(session, flush_context):
+    briefs = [
+        obj for obj in session.new.union(session.dirty)
+        if isinstance(obj, Brief) and (obj in session.new or get_history(obj, 'data').has_changes())
+    ]
+    if briefs:
+        refresh_brief_invited_suppliers(session.connection(), briefs)
+
+
+BRIEF_RESPONSE_COUNT_COLUMNS = {
+    'submitted': 'responses_submitted_count',
+    'draft': 'responses_draft_count',
+    'withdrawn': 'responses_withdrawn_count'
+}
+
+
+def brief_response_count_state(submitted_at, withdrawn_at):
+    """Which of the brief's response counters a response with these dates belongs to."""
+    if withdrawn_at:
+        return 'withdrawn'
+    if submitted_at:
+        return 'submitted'
+    return 'draft'
+
+
+def committed_value(obj, key):
+    history = get_history(obj, key)
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    return None
+
+
+@event.listens_for(Session, 'before_flush')
+def count_brief_responses(session, flush_context, instances):
+    """Move each flushed response between its brief's counters as it is created, submitted, withdrawn or deleted.
+
+    Counters are changed with `column = column + n` so concurrent responses to the same brief don't lose counts.
+    """
+    deltas = {}
+
+    def move(brief, state, n):
+        column = BRIEF_RESPONSE_COUNT_COLUMNS[state]
+        deltas.setdefault(brief, {})
+        deltas[brief][column] = deltas[brief].get(column, 0) + n
+
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if not isinstance(obj, BriefResponse):
+            continue
+        # a pending response doesn't load its brief through the relationship, only through the id
+        brief = obj.brief or (session.query(Brief).get(obj.brief_id) if obj.brief_id else None)
+        if not brief:
+            continue
+        new_state = brief_response_count_state(obj.submitted_at, obj.withdrawn_at)
+        if obj in session.new:
+            move(brief, new_state, 1)
+            continue
+        old_state = brief_response_count_state(
+            committed_value(obj, 'submitted_at'),
+            committed_value(obj, 'withdrawn_at')
+        )
+        if obj in session.deleted:
+            move(brief, old_state, -1)
+        elif old_state != new_state:
+            move(brief, old_state, -1)
+            move(brief, new_state, 1)
+
+    for brief, columns in deltas.items():
+        if brief in session.deleted:
+            continue
+        if brief not in session.new and not session.is_modified(brief):
+            # a response isn't an edit of the brief, so keep its updated_at
+            brief.updated_at = Brief.updated_at
+        for column, n in columns.items():
+            if not n:
+                continue
+            if brief in session.new:
+                setattr(brief, column, (getattr(brief, column) or 0) + n)
+            else:
+                setattr(brief, column, getattr(Brief, column) + n)
+
+
+@event.listens_for(Session, 'after_flush')
+def clear_process_cached_tables(session, flush_context):
+    names = set()
+    changed = [obj for obj in session.dirty if session.is_modified(obj, include_collections=False)]
+    for obj in list(session.new) + changed + list(session.deleted):
+        if isinstance(obj, MasterAgreement):
+            names.add('master_agreements')
+        elif isinstance(obj, Domain):
+            names.add('domains')
+
+    if names:
+        clear_process_cached_after_commit(session, *names)
+
 
 def filter_null_value_fields(obj):
     return dict(
@@ -30,6 +30,8 @@ from collections import Iterable
 
 from dmutils.data_tools import ValidationError
 
+from app.engine import engine_options
+
 
 def normalize_key_case(d):
     if not isinstance(d, Mapping):
@@ -63,25 +65,28 @@ def to_snake(s):
         r'([A-Z])', lambda m: "_" + m.group(0).lower(), s[1:]))
 
 
-def identity_link(name, id):
-    def pluralize(word):
-        if word == 'case_study':
-            word = 'case_studies'
-        elif word == 'address':
-            word = 'addresses'
-        elif not word.endswith('s'):
-            return '{}s'.format(word)
-        return word.replace('_', '-')
+def pluralize_for_link(word):
+    if word == 'case_study':
+        word = 'case_studies'
+    elif word == 'address':
+        word = 'addresses'
+    elif not word.endswith('s'):
+        return '{}s'.format(word)
+    return word.replace('_', '-')
 
-    if id is None:
-        raise ValueError
 
+def link_root():
     try:
-        url_root = request.url_root
+        return request.url_root
     except RuntimeError:
-        url_root = '/'
+        return '/'
+
+
+def identity_link(name, id):
+    if id is None:
+        raise ValueError
 
-    return url_root + '{}/{}'.format(pluralize(name), id)
+    return link_root() + '{}/{}'.format(pluralize_for_link(name), id)
 
 
 DEFAULT_REPR_FIELDS = ['id', 'name', 'slug']
@@ -118,9 +123,7 @@ class MyModel(Model):
 
     @property
     def _name(self):
-        name = type(self).__name__
-        return (name[0].lower() + re.sub(
-            r'([A-Z])', lambda m: "_" + m.group(0).lower(), name[1:]))
+        return self._serialization_plan.name
 
     def update_from_json_before(self, j):
         return j
@@ -218,6 +221,16 @@ class MyModel(Model):
             c._relationshipslist = get_relationships(c)
         return c._relationshipslist
 
+    @property
+    def _serialization_plan(self):
+        c = type(self)
+        # look in the class's own __dict__ so subclasses don't reuse their parent's plan
+        plan = c.__dict__.get('_serializationplan')
+        if plan is None:
+            plan = SerializationPlan(c)
+            c._serializationplan = plan
+        return plan
+
     @property
     def _ordereddict(self):
         """
@@ -248,75 +261,66 @@ class MyModel(Model):
         only = only or [self._name]
         return self._serializable(only=[self._name])
 
-    def _serializable(self, exclude=None, only=None, recurse=0):
+    def _serializable(self, exclude=None, only=None, recurse=0, url_root=None):
+        plan = self._serialization_plan
         exclude = exclude or []
         exclude = list(exclude)
 
-        if self._name in exclude:
+        if plan.name in exclude:
             raise ExcludedException()
 
-        if only is not None and self._name not in only:
+        if only is not None and plan.name not in only:
             raise ExcludedException()
 
-        exclude.append(self._name)
+        exclude.append(plan.name)
 
         try:
             data = self.data.copy()
         except AttributeError:
             data = {}
 
-        data.update({k: v for k, v in self._fieldsdict.items() if k != 'data'})
+        for k in plan.fields:
+            data[k] = getattr(self, k)
 
-        data['links'] = {}
+        links = data['links'] = {}
 
-        try:
-            self.id
-        except AttributeError:
+        if not plan.has_id:
             # return early as this is likely a many-to-many
             return data
 
+        if url_root is None:
+            url_root = link_root()
+
         if self.id is not None:
-            data['links']['self'] = identity_link(self._name, self.id)
+            links['self'] = url_root + plan.link_path + str(self.id)
 
         def get_related(x):
             if x is None:
                 return None
             elif not isinstance(x, string_types) and isinstance(x, Iterable):
-                return [_._serializable(exclude=exclude, only=only, recurse=recurse + 1) for _ in x]
+                return [
+                    _._serializable(exclude=exclude, only=only, recurse=recurse + 1, url_root=url_root) for _ in x
+                ]
             else:
-                return x._serializable(exclude=exclude, only=only, recurse=recurse + 1)
+                return x._serializable(exclude=exclude, only=only, recurse=recurse + 1, url_root=url_root)
 
         if len(exclude) != len(set(exclude)):
             print('duplicates in exclude!')
             raise ValueError
 
-        for r in self._relationships:
-            no_serialize = False
-            try:
-                if r in self.EXCLUDE_FOR_SERIALIZATION:
-                    no_serialize = True
-            except AttributeError:
-                pass
-
-            if not no_serialize:
+        for r, serialize, fk_attr, link_path in plan.relationships:
+            if serialize:
                 try:
                     data[r] = get_related(getattr(self, r))
                 except ExcludedException:
                     pass
 
-            fk_attr = '{}_id'.format(r)
-            alternate_fk_id = '{}_code'.format(r)
-
-            try:
-                fk_id = getattr(self, fk_attr)
-            except AttributeError:
-                try:
-                    fk_id = getattr(self, alternate_fk_id)
-                except AttributeError:
-                    continue
+            if fk_attr is None:
+                continue
 
+            fk_id = getattr(self, fk_attr)
             if fk_id is not None:
-                data['links'][r] = identity_link(r, fk_id)
+                links[r] = url_root + link_path + str(fk_id)
 
         if 'created_at' in data:
             data['createdAt'] = data['created_at']
@@ -332,7 +336,42 @@ class MyModel(Model):
         return jsondumps(self.serializable)
 
 
+class SerializationPlan(object):
+    """
+    What `MyModel._serializable` needs to know about a model class, worked out once per class
+    rather than rediscovered for every object serialized.
+    """
+
+    def __init__(self, _class):
+        self.name = to_snake(_class.__name__)
+        self.link_path = '{}/'.format(pluralize_for_link(self.name))
+        self.fields = [f for f in get_fields(_class) if f != 'data']
+        self.has_id = class_has_attribute(_class, 'id')
+
+        excluded = getattr(_class, 'EXCLUDE_FOR_SERIALIZATION', [])
+        self.relationships = []
+        for r in get_relationships(_class):
+            fk_attr = None
+            for candidate in ('{}_id'.format(r), '{}_code'.format(r)):
+                if class_has_attribute(_class, candidate):
+                    fk_attr = candidate
+                    break
+
+            self.relationships.append(
+                (r, r not in excluded, fk_attr, '{}/'.format(pluralize_for_link(r)))
+            )
+
+
+def class_has_attribute(_class, name):
+    # hasattr() would evaluate descriptors such as hybrid properties against the class
+    return any(name in vars(c) for c in _class.__mro__)
+
+
 class MySQLAlchemy(SQLAlchemy):
+    def apply_driver_hacks(self, app, info, options):
+        super(MySQLAlchemy, self).apply_driver_hacks(app, info, options)
+        options.update(engine_options(app.config))
+
     def make_declarative_base(self, metadata=None):
         """Creates the declarative base."""
         base = declarative_base(cls=MyModel, name='Model',
@@ -372,12 +411,15 @@ def get_properties(_class):
 def get_fields(_class):
     """
     Gets the mapped properties of this mapped object.
+
+    Deferred columns are internal (eg. stored search vectors) and are left out so that
+    serialization doesn't load them one object at a time.
     """
 
     def _props():
         mapper = sqlalchemy.orm.class_mapper(_class)
         for prop in mapper.iterate_properties:
-            if not isinstance(prop, RelationshipProperty):
+            if not isinstance(prop, RelationshipProperty) and not getattr(prop, 'deferred', False):
                 yield prop.key
 
     return list(_props())
@@ -2,6 +2,7 @@ from flask import jsonify, current_app, request
 from sqlalchemy.exc import SQLAlchemyError
 
 from . import status
+from app import db
 from dmutils.status import get_flags
 
 
@@ -30,3 +31,15 @@ def status_no_db():
             message="Error connecting to database",
             flags=get_flags(current_app)
         ), 500
+
+
+@status.route('/_status/db-pool')
+def status_db_pool():
+    """Checkout latency and saturation of this process's connection pool."""
+    pool = db.engine.pool
+    return jsonify(
+        status="ok",
+        processType=current_app.config['DB_PROCESS_TYPE'],
+        pgbouncer=current_app.config['DB_PGBOUNCER'],
+        pool=pool.serialize() if hasattr(pool, 'serialize') else {'status': pool.status()}
+    )
@@ -3,6 +3,7 @@ from .celery import make_celery
 from config import configs
 from os import getenv, environ
 from app.modelsbase import MySQLAlchemy as SQLAlchemy
+from app import init_cache
 from dmutils import rollbar_agent
 
 
@@ -12,6 +13,7 @@ def get_flask_app():
     app.config['DM_ENVIRONMENT'] = config_name
     app.config['ROLLBAR_TOKEN'] = getenv('ROLLBAR_TOKEN')
     app.config.from_object(configs[config_name])
+    app.config['DB_PROCESS_TYPE'] = 'worker'
     jira_creds_oauth = getenv('JIRA_CREDS_OAUTH')
     app.config['JIRA_CREDS_OAUTH'] = jira_creds_oauth if jira_creds_oauth else ''
     app.config['DM_SEND_EMAIL_TO_STDERR'] = getenv('DM_SEND_EMAIL_TO_STDERR', app.config['DM_SEND_EMAIL_TO_STDERR'])
@@ -26,5 +28,6 @@ def get_flask_app():
 db = SQLAlchemy(session_options={'autocommit': True})
 flask_app = get_flask_app()
 db.init_app(flask_app)
+init_cache(flask_app)
 rollbar_agent.init_app(flask_app)
 celery = make_celery(flask_app)
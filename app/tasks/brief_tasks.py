@@ -1,6 +1,5 @@
 import pendulum
 from flask import current_app
-from sqlalchemy import or_
 from app import db
 from app.api.services import (
     briefs,
@@ -38,38 +37,29 @@ def process_closed_briefs():
 
 @celery.task
 def create_responses_zip_for_closed_briefs():
-    from app.tasks.s3 import create_responses_zip, CreateResponsesZipException
+    from app.tasks.s3 import RESPONSES_ZIP_LOTS, queue_responses_zip, responses_zip_can_start
     closed_briefs = (
         db
         .session
-        .query(Brief)
+        .query(Brief.id)
         .join(
             Framework,
             Lot
         )
         .filter(
             Brief.status == 'closed',
-            Brief.responses_zip_filesize.is_(None), (
-                or_(
-                    Lot.slug == 'digital-professionals',
-                    Lot.slug == 'training',
-                    Lot.slug == 'rfx',
-                    Lot.slug == 'training2',
-                    Lot.slug == 'atm',
-                    Lot.slug == 'specialist'
-                )
-            ),
+            Brief.responses_zip_filesize.is_(None),
+            Brief.responses_submitted_count > 0,
+            responses_zip_can_start(),
+            Lot.slug.in_(RESPONSES_ZIP_LOTS),
             Framework.slug == 'digital-marketplace'
         )
         .order_by(Brief.id.desc())
         .all()
     )
 
-    for brief in closed_briefs:
-        try:
-            create_responses_zip(brief.id)
-        except CreateResponsesZipException as e:
-            current_app.logger.error(str(e))
+    queued = [brief_id for brief_id, in closed_briefs if queue_responses_zip(brief_id)]
+    current_app.logger.info('Queued responses zips for {} closed briefs'.format(len(queued)))
 
 
 @celery.task
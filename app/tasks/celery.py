@@ -68,9 +68,19 @@ def make_celery(flask_app):
 
         def __call__(self, *args, **kwargs):
             if current_app:
-                return TaskBase.__call__(self, *args, **kwargs)
+                return self.call_in_context(*args, **kwargs)
             else:
                 with flask_app.app_context():
+                    return self.call_in_context(*args, **kwargs)
+
+        def call_in_context(self, *args, **kwargs):
+            from app.api.services import audit_service
+            with audit_service.buffered():
+                if not current_app.config.get('PUBLISH_BATCHED'):
+                    return TaskBase.__call__(self, *args, **kwargs)
+
+                from app.tasks.publish_tasks import batched
+                with batched():
                     return TaskBase.__call__(self, *args, **kwargs)
     celery.Task = ContextTask
     return celery
@@ -3,11 +3,17 @@ from __future__ import \
     absolute_import
 
 from . import celery
-import boto3
+from app.aws import get_client
 import botocore.exceptions
+import json
+import os
+import rollbar
 import textwrap
+import time
 import sys
 import codecs
+import uuid
+from multiprocessing.pool import ThreadPool
 from flask import current_app
 from flask._compat import string_types
 from dmutils.email import hash_email, to_bytes, to_text, EmailError
@@ -25,69 +31,19 @@ def send_email(to_email_addresses, email_body, subject, from_email, from_name, r
         bcc_addresses = [bcc_addresses]
 
     if current_app.config.get('DM_SEND_EMAIL_TO_STDERR', False):
-        email_body = to_text(email_body)
-        subject = to_text(subject)
-        reload(sys)
-        sys.setdefaultencoding('utf8')
-
-        print ("""
-------------------------
-To: {to}
-Bcc: {bcc}
-Subject: {subject}
-From: {from_line}
-Reply-To: {reply_to}
-
-{body}
-------------------------
-        """.format(
-            to=', '.join(to_email_addresses),
-            bcc=', '.join(bcc_addresses),
-            subject=subject,
-            from_line='{} <{}>'.format(from_name, from_email),
-            reply_to=reply_to,
-            body=email_body
-        ))
+        print_email(to_email_addresses, email_body, subject, from_email, from_name, reply_to, bcc_addresses)
 
     try:
         email_body = to_bytes(email_body)
         subject = to_bytes(subject)
 
-        email_client = boto3.client(
-            'ses',
-            region_name=getenv('AWS_REGION'),
-            aws_access_key_id=getenv('AWS_ACCESS_KEY_ID'),
-            aws_secret_access_key=getenv('AWS_SECRET_ACCESS_KEY'),
-            endpoint_url=getenv('AWS_SES_URL')
-        )
+        email_client = get_email_client()
 
-        destination_addresses = {
-            'ToAddresses': to_email_addresses,
-        }
         if 'DM_EMAIL_BCC_ADDRESS' in current_app.config:
             bcc_addresses.append(current_app.config['DM_EMAIL_BCC_ADDRESS'])
-        if bcc_addresses:
-            destination_addresses['BccAddresses'] = bcc_addresses
-
-        return_address = current_app.config.get('DM_EMAIL_RETURN_ADDRESS')
 
         result = email_client.send_email(
-            Source=u"{} <{}>".format(from_name, from_email),
-            Destination=destination_addresses,
-            Message={
-                'Subject': {
-                    'Data': subject,
-                    'Charset': 'UTF-8'
-                },
-                'Body': {
-                    'Html': {
-                        'Data': email_body,
-                        'Charset': 'UTF-8'
-                    }
-                }
-            },
-            ReturnPath=return_address or reply_to or from_email,
-            ReplyToAddresses=[reply_to or from_email],
+            **build_message(to_email_addresses, email_body, subject, from_email, from_name, reply_to, bcc_addresses)
         )
 
         current_app.logger.info("Sent email: id={id}, email={email_hash}",
@@ -103,3 +59,147 @@ Reply-To: {reply_to}
             (' & ').join(to_email_addresses)
         )
         raise EmailError(e.response['Error']['Message'])
+
+
+@celery.task
+def send_bulk_email(to_email_addresses, email_body, subject, from_email, from_name, reply_to=None):
+    """Send the same message to each address as its own email, from a bounded pool of threads.
+
+    The body is rendered once by the caller and the pool shares one SES client, so a notification to hundreds
+    of sellers costs one task rather than one task and one client per seller. Addresses that fail are logged
+    and reported but don't stop the rest of the batch.
+    """
+    if not to_email_addresses:
+        return {'sent': 0, 'failed': []}
+
+    if current_app.config.get('DM_SEND_EMAIL_TO_STDERR', False):
+        print_email(to_email_addresses, email_body, subject, from_email, from_name, reply_to, [])
+
+    email_body = to_bytes(email_body)
+    subject = to_bytes(subject)
+    email_client = get_email_client()
+    bcc_addresses = []
+    if 'DM_EMAIL_BCC_ADDRESS' in current_app.config:
+        bcc_addresses.append(current_app.config['DM_EMAIL_BCC_ADDRESS'])
+
+    messages = [
+        (address, build_message([address], email_body, subject, from_email, from_name, reply_to, bcc_addresses))
+        for address in to_email_addresses
+    ]
+
+    def send(addressed_message):
+        to_email_address, message = addressed_message
+        try:
+            email_client.send_email(**message)
+        except botocore.exceptions.ClientError as e:
+            return to_email_address, e.response['Error']['Message']
+        return to_email_address, None
+
+    started_at = time.time()
+    pool = ThreadPool(min(current_app.config['DM_EMAIL_BULK_CONCURRENCY'], len(messages)))
+    try:
+        results = pool.map(send, messages)
+    finally:
+        pool.terminate()
+        pool.join()
+    seconds = time.time() - started_at
+
+    failed = [(address, error) for address, error in results if error]
+    sent = len(results) - len(failed)
+    for address, error in failed:
+        current_app.logger.error("An SES error occurred: %s, when sending to %s", error, hash_email(address))
+    if failed:
+        rollbar.report_message('Failed to send {} of {} bulk emails'.format(len(failed), len(results)), 'error')
+
+    current_app.logger.info(
+        'Sent {} of {} bulk emails in {:.3f}s ({:.1f} emails/s)'
+        .format(sent, len(results), seconds, sent / seconds if seconds else 0)
+    )
+    return {'sent': sent, 'failed': [address for address, error in failed]}
+
+
+def print_email(to_email_addresses, email_body, subject, from_email, from_name, reply_to, bcc_addresses):
+    email_body = to_text(email_body)
+    subject = to_text(subject)
+    reload(sys)
+    sys.setdefaultencoding('utf8')
+
+    print ("""
+------------------------
+To: {to}
+Bcc: {bcc}
+Subject: {subject}
+From: {from_line}
+Reply-To: {reply_to}
+
+{body}
+------------------------
+    """.format(
+        to=', '.join(to_email_addresses),
+        bcc=', '.join(bcc_addresses),
+        subject=subject,
+        from_line='{} <{}>'.format(from_name, from_email),
+        reply_to=reply_to,
+        body=email_body
+    ))
+
+
+class LocalEmailClient(object):
+    """Stand-in for the SES client that writes each message to a local directory, so sends can be run offline.
+
+    Used instead of SES when the SES_LOCAL_PATH environment variable is set.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def send_email(self, **message):
+        if not os.path.isdir(self.root):
+            os.makedirs(self.root)
+        message_id = uuid.uuid4().hex
+        with open(os.path.join(self.root, '{}.json'.format(message_id)), 'w') as f:
+            json.dump(message, f)
+        return {'MessageId': message_id, 'ResponseMetadata': {'RequestId': message_id}}
+
+
+def get_email_client():
+    if getenv('SES_LOCAL_PATH'):
+        return LocalEmailClient(getenv('SES_LOCAL_PATH'))
+
+    return get_client(
+        'ses',
+        region_name=getenv('AWS_REGION'),
+        aws_access_key_id=getenv('AWS_ACCESS_KEY_ID'),
+        aws_secret_access_key=getenv('AWS_SECRET_ACCESS_KEY'),
+        endpoint_url=getenv('AWS_SES_URL')
+    )
+
+
+def build_message(to_email_addresses, email_body, subject, from_email, from_name, reply_to, bcc_addresses):
+    """The arguments for one SES send_email call."""
+    destination_addresses = {
+        'ToAddresses': to_email_addresses,
+    }
+    if bcc_addresses:
+        destination_addresses['BccAddresses'] = bcc_addresses
+
+    return_address = current_app.config.get('DM_EMAIL_RETURN_ADDRESS')
+
+    return dict(
+        Source=u"{} <{}>".format(from_name, from_email),
+        Destination=destination_addresses,
+        Message={
+            'Subject': {
+                'Data': subject,
+                'Charset': 'UTF-8'
+            },
+            'Body': {
+                'Html': {
+                    'Data': email_body,
+                    'Charset': 'UTF-8'
+                }
+            }
+        },
+        ReturnPath=return_address or reply_to or from_email,
+        ReplyToAddresses=[reply_to or from_email],
+    )
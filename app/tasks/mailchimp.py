@@ -1,5 +1,6 @@
 from __future__ import absolute_import, unicode_literals
 
+import hashlib
 from os import getenv
 
 import pendulum
@@ -9,12 +10,12 @@ from jinja2 import Environment, PackageLoader, select_autoescape
 from mailchimp3 import MailChimp
 from requests.exceptions import RequestException
 from requests.utils import default_headers
-from sqlalchemy import true
+from sqlalchemy import or_, true
 
 from app import db
 from app.tasks import publish_tasks
 from app.api.services import AuditTypes as audit_types
-from app.api.services import audit_service, audit_types, suppliers, briefs
+from app.api.services import audit_service, audit_types, key_values_service, suppliers, briefs
 from app.models import (AuditEvent, Brief, Framework, Supplier, SupplierDomain,
                         SupplierFramework, User)
 from dmapiclient.audit import AuditTypes
@@ -26,7 +27,61 @@ class MailChimpConfigException(Exception):
     """Raised when the MailChimp config is invalid."""
 
 
+# the key_value row holding where the last seller list sync got to
+SELLER_LIST_SYNC_KEY = 'mailchimp_seller_list_sync'
+MEMBERS_PER_BATCH = 500
+
+
+class LocalMailChimp(object):
+    """Stand-in for the parts of the MailChimp client the list sync uses, keeping each list's members in memory.
+
+    Used instead of MailChimp when the MAILCHIMP_LOCAL environment variable is set, and by the tests.
+    """
+
+    class Members(object):
+        def __init__(self, lists):
+            self._lists = lists
+
+        def all(self, list_id, fields=None, get_all=False):
+            return {
+                'members': [
+                    {'email_address': address, 'id': member_id}
+                    for address, member_id in self._lists.setdefault(list_id, {}).items()
+                ]
+            }
+
+    class Lists(object):
+        def __init__(self):
+            self.members_by_list = {}
+            self.members = LocalMailChimp.Members(self.members_by_list)
+
+        def update_members(self, list_id, data):
+            members = self.members_by_list.setdefault(list_id, {})
+            new_members = []
+            errors = []
+            for member in data['members']:
+                address = member['email_address'].lower()
+                if address in members:
+                    errors.append({'email_address': address, 'error': '{} is already a list member'.format(address)})
+                else:
+                    members[address] = hashlib.md5(address.encode('utf-8')).hexdigest()
+                    new_members.append({'email_address': address, 'id': members[address]})
+            return {'new_members': new_members, 'errors': errors}
+
+    def __init__(self):
+        self.lists = LocalMailChimp.Lists()
+
+
+_local_client = None
+
+
 def get_client():
+    global _local_client
+    if getenv('MAILCHIMP_LOCAL'):
+        if _local_client is None:
+            _local_client = LocalMailChimp()
+        return _local_client
+
     headers = default_headers()
     headers['User-Agent'] = 'Digital Marketplace (marketplace.service.gov.au)'
     client = MailChimp(
@@ -143,39 +198,43 @@ def schedule_campaign(client, campaign_id, schedule_time):
 
 
 def add_members_to_list(client, list_id, email_addresses):
-    try:
-        data = {
-            'members': [{
-                'email_address': email_address,
-                'status': 'subscribed'
-            } for email_address in email_addresses]
-        }
-
-        response = client.lists.update_members(list_id=list_id, data=data)
-
-        current_app.logger.info(
-            '{} were added to Mailchimp list {}'.format(', '.join(email_addresses), list_id)
-        )
+    """Subscribe the addresses in batches of MEMBERS_PER_BATCH, the most MailChimp accepts in one call."""
+    responses = []
+    for start in range(0, len(email_addresses), MEMBERS_PER_BATCH):
+        batch = email_addresses[start:start + MEMBERS_PER_BATCH]
+        try:
+            data = {
+                'members': [{
+                    'email_address': email_address,
+                    'status': 'subscribed'
+                } for email_address in batch]
+            }
 
-        return response
-    except RequestException as e:
-        # publish error in slack and rollbar
-        publish_tasks.mailchimp.delay(
-            'error',
-            message='Mailchimp API error occurred while adding a member to list',
-            error=e.message
-        )
-        current_app.logger.error(
-            'A Mailchimp API error occurred while adding a member to list {}, aborting: {} {}'
-            .format(list_id, e, e.response))
-        rollbar.report_exc_info()
-        raise e
-    except Exception as error:
-        publish.task.mailchimp.delay(
-            'error',
-            message='Mailchimp API error occurred while adding a member to list',
-            error=error.message
-        )
+            responses.append(client.lists.update_members(list_id=list_id, data=data))
+
+            current_app.logger.info(
+                '{} addresses were added to Mailchimp list {}'.format(len(batch), list_id)
+            )
+        except RequestException as e:
+            # publish error in slack and rollbar
+            publish_tasks.mailchimp.delay(
+                'error',
+                message='Mailchimp API error occurred while adding a member to list',
+                error=e.message
+            )
+            current_app.logger.error(
+                'A Mailchimp API error occurred while adding a member to list {}, aborting: {} {}'
+                .format(list_id, e, e.response))
+            rollbar.report_exc_info()
+            raise e
+        except Exception as error:
+            publish_tasks.mailchimp.delay(
+                'error',
+                message='Mailchimp API error occurred while adding a member to list',
+                error=error.message
+            )
+
+    return responses
 
 
 def send_document_expiry_campaign(client, sellers):
@@ -428,32 +487,11 @@ def send_new_briefs_email():
         rollbar.report_exc_info()
 
 
-@celery.task
-def sync_mailchimp_seller_list():
-    client = get_client()
-    list_id = getenv('MAILCHIMP_SELLER_LIST_ID')
-
-    if not list_id:
-        raise MailChimpConfigException('Failed to get MAILCHIMP_SELLER_LIST_ID from the environment variables.')
-
-    # get the mailchimp list's existing members
-    try:
-        current_members = client.lists.members.all(
-            list_id,
-            fields='members.email_address,members.id',
-            get_all=True
-        )
-    except RequestException as e:
-        current_app.logger.error("An Mailchimp API error occurred, aborting: %s %s", e, e.response)
-        raise e
-
-    current_member_addresses = []
-    try:
-        for member in current_members['members']:
-            current_member_addresses.append(member['email_address'].lower())
-    except KeyError:
-        pass
+def get_seller_list_addresses(since=None):
+    """The lower cased addresses that belong on the seller list, supplier contacts first and then users.
 
+    With `since`, only sellers and users created or updated after it are returned.
+    """
     # get the addresses from DM service supplier users
     sub1 = db.session.query(SupplierFramework.supplier_code)\
         .filter(Framework.slug == 'digital-marketplace')\
@@ -461,32 +499,91 @@ def sync_mailchimp_seller_list():
     sub2 = db.session.query(SupplierDomain.supplier_id)
     sub3 = db.session.query(Supplier.code)\
         .filter(Supplier.status != 'deleted', Supplier.code.in_(sub1), Supplier.id.in_(sub2))
-    results = db.session.query(User.email_address)\
-        .filter(User.role == 'supplier', User.active == true(), User.supplier_code.in_(sub3))\
-        .all()
+    query = db.session.query(User.email_address)\
+        .filter(User.role == 'supplier', User.active == true(), User.supplier_code.in_(sub3))
+    if since is not None:
+        query = query.filter(or_(User.created_at > since, User.updated_at > since))
 
-    supplier_users = [x[0].lower() for x in results]
+    supplier_users = [x[0].lower() for x in query.all()]
 
     # get the contact addresses for DM service suppliers
-    sub1 = db.session.query(SupplierFramework.supplier_code)\
-        .filter(Framework.slug == 'digital-marketplace')\
-        .join(Framework)
-    sub2 = db.session.query(SupplierDomain.supplier_id)
-    results = db.session.query(Supplier.data['contact_email'], Supplier.id)\
+    query = db.session.query(Supplier.data['contact_email'].astext, Supplier.id)\
         .filter(Supplier.code.in_(sub1), Supplier.id.in_(sub2), Supplier.status != 'deleted')\
-        .order_by(Supplier.id)\
-        .all()
+        .order_by(Supplier.id)
+    if since is not None:
+        query = query.filter(or_(Supplier.creation_time > since, Supplier.last_update_time > since))
 
-    supplier_contacts = [x[0].lower() for x in results]
+    supplier_contacts = [x[0].lower() for x in query.all() if x[0]]
 
-    # combine the user and supplier contact lists
-    combined_supplier_addresses = [x for x in supplier_contacts if x not in supplier_users]
-    combined_supplier_addresses = combined_supplier_addresses + supplier_users
+    # combine the user and supplier contact lists, keeping the first of any duplicates
+    seen = set()
+    addresses = []
+    for address in supplier_contacts + supplier_users:
+        if address not in seen:
+            seen.add(address)
+            addresses.append(address)
 
-    # get the suppliers not in the mailchimp list
-    new_addresses = [
-        x for x in combined_supplier_addresses if x not in current_member_addresses
-    ]
+    return addresses
+
+
+@celery.task
+def sync_mailchimp_seller_list(full=False):
+    """Subscribe sellers and seller users that aren't on the MailChimp seller list yet.
+
+    Runs incrementally from the time the last run started, considering only the sellers and users changed since
+    then and leaving MailChimp to skip addresses already on the list. Changes that don't touch a seller or user
+    row (such as a seller's first assessed domain) are picked up by a full run, which compares every address
+    with the list's members and happens at least every MAILCHIMP_SELLER_LIST_FULL_SYNC_HOURS.
+    """
+    client = get_client()
+    list_id = getenv('MAILCHIMP_SELLER_LIST_ID')
+
+    if not list_id:
+        raise MailChimpConfigException('Failed to get MAILCHIMP_SELLER_LIST_ID from the environment variables.')
+
+    started_at = pendulum.now('UTC')
+    watermark = key_values_service.get_by_key(SELLER_LIST_SYNC_KEY)
+    watermark = watermark['data'] if watermark else {}
+    last_full_sync_at = watermark.get('last_full_sync_at')
+    full = (
+        full or
+        watermark.get('list_id') != list_id or
+        not last_full_sync_at or
+        pendulum.parse(last_full_sync_at).add(
+            hours=current_app.config['MAILCHIMP_SELLER_LIST_FULL_SYNC_HOURS']) <= started_at
+    )
+
+    if full:
+        # get the mailchimp list's existing members
+        try:
+            current_members = client.lists.members.all(
+                list_id,
+                fields='members.email_address,members.id',
+                get_all=True
+            )
+        except RequestException as e:
+            current_app.logger.error("An Mailchimp API error occurred, aborting: %s %s", e, e.response)
+            raise e
+
+        current_member_addresses = set(
+            member['email_address'].lower() for member in current_members.get('members', [])
+        )
+        new_addresses = [x for x in get_seller_list_addresses() if x not in current_member_addresses]
+        last_full_sync_at = started_at.isoformat()
+    else:
+        new_addresses = get_seller_list_addresses(since=pendulum.parse(watermark['last_synced_at']))
 
     # add the new suppliers to the mailchimp list
-    add_members_to_list(client, list_id, new_addresses)
+    if new_addresses:
+        add_members_to_list(client, list_id, new_addresses)
+
+    key_values_service.upsert(SELLER_LIST_SYNC_KEY, {
+        'list_id': list_id,
+        'last_synced_at': started_at.isoformat(),
+        'last_full_sync_at': last_full_sync_at
+    })
+    current_app.logger.info(
+        '{} sync of Mailchimp list {} considered {} new addresses in {:.3f}s'
+        .format('Full' if full else 'Incremental', list_id, len(new_addresses),
+                (pendulum.now('UTC') - started_at).total_seconds())
+    )
@@ -1,10 +1,72 @@
+import time
+from contextlib import contextmanager
+
+from flask import current_app, g
+
 from app.api.services import (
     publish
 )
 from . import celery
 
 
+class BatchablePublishTask(celery.Task):
+    """Publish task that, inside a publish batch, is queued onto the batch rather than sent on its own."""
+    abstract = True
+
+    def delay(self, *args, **kwargs):
+        events = g.get('publish_batch') if g else None
+        if events is None:
+            return super(BatchablePublishTask, self).delay(*args, **kwargs)
+
+        events.append((self.name.rsplit('.', 1)[-1], args, kwargs))
+
+
+def start_batch():
+    """Start coalescing publish tasks for the current request or task, unless a batch is already open."""
+    if g.get('publish_batch') is None:
+        g.publish_batch = []
+
+
+def flush_batch(*args):
+    """Send the events queued since `start_batch` as a single `publish_batch` task."""
+    events = g.pop('publish_batch', None)
+    if events:
+        publish_batch.delay(events)
+
+
+@contextmanager
+def batched():
+    if g.get('publish_batch') is not None:
+        yield
+        return
+
+    start_batch()
+    try:
+        yield
+    finally:
+        flush_batch()
+
+
 @celery.task
+def publish_batch(events):
+    started_at = time.time()
+    published = 0
+    for name, args, kwargs in events:
+        try:
+            getattr(publish, name)(*args, **kwargs)
+            published += 1
+        except Exception as e:
+            current_app.logger.error('Failed to publish {} event: {}'.format(name, e))
+
+    seconds = time.time() - started_at
+    current_app.logger.info(
+        'Published {} of {} events in {:.3f}s ({:.1f} events/s, {:.1f} events/s since the worker started)'
+        .format(published, len(events), seconds, published / seconds if seconds else 0,
+                publish.events_per_second or 0)
+    )
+
+
+@celery.task(base=BatchablePublishTask)
 def agency(agency, event_type, **kwargs):
     publish.agency(agency, event_type, **kwargs)
 
@@ -20,7 +82,7 @@ def compress_agency(agency):
     }
 
 
-@celery.task
+@celery.task(base=BatchablePublishTask)
 def application(application, event_type, **kwargs):
     publish.application(application, event_type, **kwargs)
 
@@ -35,7 +97,7 @@ def compress_application(application):
     }
 
 
-@celery.task
+@celery.task(base=BatchablePublishTask)
 def assessment(assessment, event_type, **kwargs):
     publish.assessment(assessment, event_type, **kwargs)
 
@@ -48,7 +110,7 @@ def compress_assessment(assessment):
     }
 
 
-@celery.task
+@celery.task(base=BatchablePublishTask)
 def brief(brief, event_type, **kwargs):
     publish.brief(brief, event_type, **kwargs)
 
@@ -62,7 +124,7 @@ def compress_brief(brief):
     }
 
 
-@celery.task
+@celery.task(base=BatchablePublishTask)
 def brief_response(brief_response, event_type, **kwargs):
     publish.brief_response(brief_response, event_type, **kwargs)
 
@@ -75,7 +137,7 @@ def compress_brief_response(brief_response):
     }
 
 
-@celery.task
+@celery.task(base=BatchablePublishTask)
 def brief_question(brief_question, event_type, **kwargs):
     publish.brief_question(brief_question, event_type, **kwargs)
 
@@ -90,7 +152,7 @@ def compress_brief_question(brief_question):
     }
 
 
-@celery.task
+@celery.task(base=BatchablePublishTask)
 def supplier(supplier, event_type, **kwargs):
     publish.supplier(supplier, event_type, **kwargs)
 
@@ -104,7 +166,7 @@ def compress_supplier(supplier):
     }
 
 
-@celery.task
+@celery.task(base=BatchablePublishTask)
 def evidence(evidence, event_type, **kwargs):
     publish.evidence(evidence, event_type, **kwargs)
 
@@ -122,12 +184,12 @@ def compress_evidence(evidence):
     }
 
 
-@celery.task
+@celery.task(base=BatchablePublishTask)
 def mailchimp(event_type, **kwargs):
     publish.mailchimp(event_type, **kwargs)
 
 
-@celery.task
+@celery.task(base=BatchablePublishTask)
 def supplier_domain(supplier_domain, event_type, **kwargs):
     publish.supplier_domain(supplier_domain, event_type, **kwargs)
 
@@ -142,7 +204,7 @@ def compress_supplier_domain(supplier_domain):
     }
 
 
-@celery.task
+@celery.task(base=BatchablePublishTask)
 def team(team, event_type, **kwargs):
     publish.team(team, event_type, **kwargs)
 
@@ -156,7 +218,7 @@ def compress_team(team):
     }
 
 
-@celery.task
+@celery.task(base=BatchablePublishTask)
 def user(user, event_type, **kwargs):
     publish.user(user, event_type, **kwargs)
 
@@ -170,7 +232,7 @@ def compress_user(user):
     }
 
 
-@celery.task
+@celery.task(base=BatchablePublishTask)
 def user_claim(user_claim, event_type, **kwargs):
     publish.user_claim(user_claim, event_type, **kwargs)
 
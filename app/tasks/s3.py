@@ -1,8 +1,10 @@
 from __future__ import absolute_import, unicode_literals
 
+import os
+import shutil
 import tempfile
 import zipfile
-from io import BytesIO
+from multiprocessing.pool import ThreadPool
 from os import getenv
 
 import boto3
@@ -10,6 +12,7 @@ import botocore
 import pendulum
 from flask import current_app, render_template
 from jinja2 import Environment, PackageLoader, select_autoescape
+from sqlalchemy import and_, func, or_
 from werkzeug.utils import secure_filename
 
 from app import db
@@ -21,42 +24,182 @@ from app.models import Brief, BriefResponse
 from . import celery
 
 
+RESPONSES_ZIP_LOTS = ['digital-professionals', 'training', 'rfx', 'training2', 'atm', 'specialist']
+
+
 class CreateResponsesZipException(Exception):
     """Raised when the resume zip fails to create."""
 
 
+class ResponsesZipUnavailableException(CreateResponsesZipException):
+    """Raised when a brief has nothing that can be zipped, which trying again won't change."""
+
+
+class LocalBucket(object):
+    """Stand-in for an S3 bucket backed by a local directory, so the zip can be built and timed offline.
+
+    Used instead of S3 when the S3_LOCAL_PATH environment variable is set.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def _path(self, key):
+        return os.path.join(self.root, *key.split('/'))
+
+    def download_fileobj(self, key, fileobj):
+        with open(self._path(key), 'rb') as f:
+            shutil.copyfileobj(f, fileobj)
+
+    def upload_fileobj(self, fileobj, key):
+        path = self._path(key)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'wb') as f:
+            shutil.copyfileobj(fileobj, f)
+
+
+def get_bucket():
+    if getenv('S3_LOCAL_PATH'):
+        return LocalBucket(getenv('S3_LOCAL_PATH'))
+
+    s3 = boto3.resource(
+        's3',
+        region_name=getenv('AWS_REGION'),
+        aws_access_key_id=getenv('AWS_ACCESS_KEY_ID'),
+        aws_secret_access_key=getenv('AWS_SECRET_ACCESS_KEY'),
+        endpoint_url=getenv('AWS_S3_URL')
+    )
+    return s3.Bucket(getenv('S3_BUCKET_NAME'))
+
+
+def download_to_directory(bucket, files, directory, threads):
+    """Download `files` into `directory` with a bounded pool of threads.
+
+    Yields each file with the path it was downloaded to, in the order given, as soon as it is ready. Files
+    go to disk rather than memory so that large attachments don't grow the worker.
+    """
+    def download(indexed_file):
+        index, file = indexed_file
+        path = os.path.join(directory, str(index))
+        try:
+            with open(path, 'wb') as f:
+                bucket.download_fileobj(file['key'], f)
+        except (botocore.exceptions.ClientError, IOError):
+            raise CreateResponsesZipException('The file "{}" failed to download'.format(file['key']))
+        return file, path
+
+    pool = ThreadPool(threads)
+    try:
+        for file, path in pool.imap(download, enumerate(files)):
+            yield file, path
+    finally:
+        pool.terminate()
+        pool.join()
+
+
 template_env = Environment(
     loader=PackageLoader('app.tasks', 'templates'),
     autoescape=select_autoescape(['html', 'xml'])
 )
 
 
+def responses_zip_can_start(force=False):
+    """Briefs whose responses zip can be (re)built: never built, failed or stuck, and when forced also done.
+
+    A zip that is 'unavailable' (the brief had no responses or isn't a lot that is zipped) is only built
+    again when forced, since retrying on a schedule would fail the same way every time.
+    """
+    stale = pendulum.now('UTC').subtract(minutes=current_app.config['RESPONSES_ZIP_STALE_MINUTES'])
+    return or_(
+        Brief.responses_zip_status.is_(None),
+        Brief.responses_zip_status.in_(['failed', 'unavailable', 'done'] if force else ['failed']),
+        and_(
+            Brief.responses_zip_status.in_(['queued', 'running']),
+            Brief.responses_zip_queued_at < stale
+        )
+    )
+
+
+def set_responses_zip_status(brief_id, status, *criteria, **values):
+    """Move the responses zip of a brief to `status` if it matches `criteria`, returning whether it did."""
+    values['responses_zip_status'] = status
+    updated = (
+        db.session.query(Brief)
+        .filter(Brief.id == brief_id, *criteria)
+        .update(values, synchronize_session=False)
+    )
+    db.session.commit()
+    return updated == 1
+
+
+def queue_responses_zip(brief_id, force=False):
+    """Queue a job to build the responses zip of a brief, unless one is already queued, running or done.
+
+    The brief's status is claimed in the database before the task is sent, so buyers closing early and the
+    scheduled run for closed briefs never zip the same brief at once. Returns whether a job was queued.
+    """
+    queued = set_responses_zip_status(
+        brief_id,
+        'queued',
+        responses_zip_can_start(force),
+        responses_zip_queued_at=pendulum.now('UTC'),
+        responses_zip_started_at=None,
+        responses_zip_finished_at=None
+    )
+    if queued:
+        create_responses_zip.delay(brief_id, force=force)
+    return queued
+
+
 @celery.task
-def create_responses_zip(brief_id):
+def create_responses_zip(brief_id, force=False):
+    """Build the zip of a brief's responses and upload it, recording its progress on the brief.
+
+    Does nothing if the zip is already being built, or has been built and `force` isn't set, so a task
+    that is delivered twice or queued alongside a direct run is harmless.
+    """
     brief = briefs.find(id=brief_id).one_or_none()
 
     if not brief:
         raise CreateResponsesZipException('Failed to load brief for id {}'.format(brief_id))
 
+    now = pendulum.now('UTC')
+    started = set_responses_zip_status(
+        brief_id,
+        'running',
+        or_(Brief.responses_zip_status == 'queued', responses_zip_can_start(force)),
+        responses_zip_queued_at=func.coalesce(Brief.responses_zip_queued_at, now),
+        responses_zip_started_at=now,
+        responses_zip_finished_at=None
+    )
+    if not started:
+        current_app.logger.info('Responses zip for brief id {} is already {}'.format(
+            brief_id, brief.responses_zip_status))
+        return
+
+    try:
+        write_responses_zip(brief)
+    except Exception as e:
+        db.session.rollback()
+        status = 'unavailable' if isinstance(e, ResponsesZipUnavailableException) else 'failed'
+        set_responses_zip_status(brief_id, status, responses_zip_finished_at=pendulum.now('UTC'))
+        raise
+
+
+def write_responses_zip(brief):
+    brief_id = brief.id
     responses = brief_responses_service.get_responses_to_zip(brief_id, brief.lot.slug)
 
     if not responses:
-        raise CreateResponsesZipException('There were no respones for brief id {}'.format(brief_id))
+        raise ResponsesZipUnavailableException('There were no respones for brief id {}'.format(brief_id))
 
-    if brief.lot.slug not in ['digital-professionals', 'training', 'rfx', 'training2', 'atm', 'specialist']:
-        raise CreateResponsesZipException('Brief id {} is not a compatible lot'.format(brief_id))
+    if brief.lot.slug not in RESPONSES_ZIP_LOTS:
+        raise ResponsesZipUnavailableException('Brief id {} is not a compatible lot'.format(brief_id))
 
     print 'Generating zip for brief id: {}'.format(brief_id)
 
-    BUCKET_NAME = getenv('S3_BUCKET_NAME')
-    s3 = boto3.resource(
-        's3',
-        region_name=getenv('AWS_REGION'),
-        aws_access_key_id=getenv('AWS_ACCESS_KEY_ID'),
-        aws_secret_access_key=getenv('AWS_SECRET_ACCESS_KEY'),
-        endpoint_url=getenv('AWS_S3_URL')
-    )
-    bucket = s3.Bucket(BUCKET_NAME)
+    bucket = get_bucket()
 
     files = []
     attachments = brief_responses_service.get_all_attachments(brief_id)
@@ -78,18 +221,19 @@ def create_responses_zip(brief_id):
             )
         })
 
+    download_directory = tempfile.mkdtemp()
     with tempfile.TemporaryFile() as archive:
         with zipfile.ZipFile(archive, mode='w', compression=zipfile.ZIP_DEFLATED) as zf:
-            for file in files:
-                s3file = file['key']
-                with BytesIO() as s3_stream:
-                    try:
-                        bucket.download_fileobj(s3file, s3_stream)
-                        zf.writestr(file['zip_name'], s3_stream.getvalue())
-                    except botocore.exceptions.ClientError as e:
-                        raise CreateResponsesZipException('The file "{}" failed to download'.format(s3file))
-                    finally:
-                        s3_stream.close()
+            threads = int(getenv('RESPONSES_ZIP_DOWNLOAD_THREADS', 8))
+            downloads = download_to_directory(bucket, files, download_directory, threads)
+            try:
+                for file, path in downloads:
+                    # ZipFile.write compresses from disk in chunks rather than reading the file into memory
+                    zf.write(path, file['zip_name'])
+                    os.remove(path)
+            finally:
+                downloads.close()
+                shutil.rmtree(download_directory, ignore_errors=True)
 
             csvdata = generate_brief_responses_csv(brief, responses)
             csv_file_name = ('opportunity-{}-raw.csv'.format(brief_id)
@@ -159,16 +303,11 @@ def create_responses_zip(brief_id):
 
                 zf.writestr('Responses ({}).html'.format(brief_id), response_criteria_html.encode('utf-8'))
 
+        # the zip's central directory has been written, so the end of the file is its size
+        archive.seek(0, os.SEEK_END)
+        filesize = archive.tell()
         archive.seek(0)
 
-        try:
-            brief.responses_zip_filesize = len(archive.read())
-            archive.seek(0)
-            db.session.add(brief)
-            db.session.commit()
-        except Exception as e:
-            raise CreateResponsesZipException(str(e))
-
         try:
             bucket.upload_fileobj(
                 archive,
@@ -177,3 +316,12 @@ def create_responses_zip(brief_id):
         except botocore.exceptions.ClientError as e:
             raise CreateResponsesZipException('The responses archive for brief id "{}" failed to upload'
                                               .format(brief_id))
+
+        try:
+            brief.responses_zip_filesize = filesize
+            brief.responses_zip_status = 'done'
+            brief.responses_zip_finished_at = pendulum.now('UTC')
+            db.session.add(brief)
+            db.session.commit()
+        except Exception as e:
+            raise CreateResponsesZipException(str(e))
@@ -1,4 +1,5 @@
 from app.api.services import (
+    application_service,
     key_values_service,
     suppliers
 )
@@ -11,3 +12,8 @@ def update_supplier_metrics():
     key_values_service.upsert('supplier_metrics', {
         "total": supplier_metrics.get('supplier_count', 0)
     })
+
+
+@celery.task
+def update_application_metrics():
+    key_values_service.upsert('application_metrics', application_service.get_metrics())
@@ -1,7 +1,11 @@
+import base64
+import json
+
 import pendulum
 from flask import url_for as base_url_for
 from flask import abort, request
 from six import iteritems, string_types
+from sqlalchemy import and_, or_
 from werkzeug.exceptions import BadRequest
 
 from .validation import validate_updater_json_or_400
@@ -89,6 +93,34 @@ def pagination_links(pagination, endpoint, args):
     return links
 
 
+def encode_cursor(values):
+    """Encode a list of keyset values as an opaque, url-safe pagination cursor."""
+    encoded = base64.urlsafe_b64encode(json.dumps(values).encode('utf-8'))
+    return encoded.decode('ascii').rstrip('=')
+
+
+def decode_cursor_or_400(cursor, length):
+    """Decode a cursor built by `encode_cursor`, aborting if it is malformed or has the wrong shape."""
+    try:
+        padded = str(cursor) + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded).decode('utf-8'))
+    except (TypeError, ValueError, UnicodeError):
+        abort(400, "Invalid cursor: {}".format(cursor))
+    if not isinstance(values, list) or len(values) != length:
+        abort(400, "Invalid cursor: {}".format(cursor))
+    return values
+
+
+def keyset_after(keyset, values):
+    """Build the WHERE clause selecting rows that sort after `values` under a mixed-direction keyset."""
+    clauses = []
+    for i, (column, descending) in enumerate(keyset):
+        equal_prefix = [c == v for (c, _), v in zip(keyset[:i], values[:i])]
+        after = column < values[i] if descending else column > values[i]
+        clauses.append(and_(*(equal_prefix + [after])))
+    return or_(*clauses)
+
+
 def get_json_from_request():
     if request.content_type not in ['application/json',
                                     'application/json; charset=UTF-8',
@@ -1,7 +1,6 @@
 import json
 import re
 import os
-import copy
 from decimal import Decimal
 
 from flask import abort
@@ -78,12 +77,25 @@ def load_schemas(schemas_path, schema_names):
     return loaded_schemas
 
 
-_SCHEMAS = load_schemas(JSON_SCHEMAS_PATH, SCHEMA_NAMES)
+_SCHEMAS = {}
+_VALIDATORS = {}
+MAXIMUM_CACHED_VALIDATORS = 500
+
+
+def get_schema(schema_name):
+    """Load and check a schema the first time it is used, rather than every schema when a worker starts."""
+    try:
+        return _SCHEMAS[schema_name]
+    except KeyError:
+        if schema_name not in SCHEMA_NAMES:
+            raise
+        schema = load_schemas(JSON_SCHEMAS_PATH, [schema_name])[schema_name]
+        return _SCHEMAS.setdefault(schema_name, schema)
 
 
 def get_sections(schema_name):
     try:
-        schema = _SCHEMAS[schema_name]
+        schema = get_schema(schema_name)
         return schema['sections']
     except KeyError as e:
         abort(500, 'Missing key: {}'.format(e.message))
@@ -91,23 +103,41 @@ def get_sections(schema_name):
 
 def get_required_fields(brief):
     schema_name = 'briefs-{}-{}'.format(brief.framework.slug, brief.lot.slug)
-    schema = _SCHEMAS[schema_name]
+    schema = get_schema(schema_name)
     return schema['required']
 
 
 def get_validator(schema_name, enforce_required=True, required_fields=None):
-    if required_fields is None:
-        required_fields = []
+    """Return a validator for the schema, built once per schema and set of required fields.
+
+    Validators hold no state between calls so they are shared between requests. The only `$ref` in the schemas
+    is a single absolute one, so the resolver's scope stack is the same whichever thread is using it.
+    """
+    schema = get_schema(schema_name)
     if enforce_required:
-        schema = _SCHEMAS[schema_name]
+        key = (schema_name, None)
     else:
-        schema = copy.deepcopy(_SCHEMAS[schema_name])
-        schema['required'] = [
+        key = (schema_name, frozenset(
             field for field in schema.get('required', [])
-            if field in required_fields
-        ]
-        schema.pop('anyOf', None)
-    return validator_for(schema)(schema, format_checker=FORMAT_CHECKER)
+            if field in (required_fields or [])
+        ))
+
+    validator = _VALIDATORS.get(key)
+    if validator is None:
+        if not enforce_required:
+            # only top level keys change, so a shallow copy leaves the cached schema alone
+            schema = dict(schema)
+            schema['required'] = [
+                field for field in schema.get('required', [])
+                if field in key[1]
+            ]
+            schema.pop('anyOf', None)
+
+        if len(_VALIDATORS) >= MAXIMUM_CACHED_VALIDATORS:
+            _VALIDATORS.clear()
+        validator = _VALIDATORS[key] = validator_for(schema)(schema, format_checker=FORMAT_CHECKER)
+
+    return validator
 
 
 def validate_updater_json_or_400(submitted_json):
@@ -40,6 +40,10 @@ CELERYBEAT_SCHEDULE = {
         'task': 'app.tasks.supplier_tasks.update_supplier_metrics',
         'schedule': crontab(hour='*/4', minute=4)
     },
+    'update_application_metrics': {
+        'task': 'app.tasks.supplier_tasks.update_application_metrics',
+        'schedule': crontab(hour='*/1', minute=5)
+    },
     'sync_application_approvals_with_jira': {
         'task': 'app.tasks.jira.sync_application_approvals_with_jira',
         'schedule': crontab(day_of_week='mon-fri', hour='8-18/1', minute=45)
@@ -94,6 +98,35 @@ class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SQLALCHEMY_RECORD_QUERIES = True
     SQLALCHEMY_DATABASE_URI = 'postgresql:///digitalmarketplace'
+    # engine and pool settings by process type, see app/engine.py. create_app is 'web', celery is 'worker'
+    DB_PROCESS_TYPE = 'web'
+    DB_POOL_OPTIONS = {
+        'web': {
+            'pool_size': 10,
+            'max_overflow': 20,
+            'pool_timeout': 5,
+            'pool_recycle': 1800,
+            'pre_ping': False
+        },
+        'worker': {
+            'pool_size': 2,
+            'max_overflow': 2,
+            'pool_timeout': 30,
+            'pool_recycle': 300,
+            'pre_ping': True
+        }
+    }
+    # let PgBouncer (in transaction mode) pool the connections instead
+    DB_PGBOUNCER = False
+    # statement timeouts in milliseconds by class of route, see app.statement_timeout. The default is by process
+    # type and left unset for workers, whose reports and bulk jobs can run for longer
+    DB_STATEMENT_TIMEOUTS = {
+        'default': {
+            'web': 30000,
+            'worker': None
+        },
+        'report': 300000
+    }
     BASE_TEMPLATE_DATA = {}
 
     DM_FAILED_LOGIN_LIMIT = 5
@@ -144,6 +177,10 @@ class Config:
 
     # EMAIL CONFIG
     DM_SEND_EMAIL_TO_STDERR = False
+    # bulk notifications are sent as tasks of up to DM_EMAIL_BULK_BATCH_SIZE recipients, each sending from
+    # at most DM_EMAIL_BULK_CONCURRENCY threads (botocore keeps 10 connections per client by default)
+    DM_EMAIL_BULK_BATCH_SIZE = 50
+    DM_EMAIL_BULK_CONCURRENCY = 10
 
     DM_CLARIFICATION_QUESTION_EMAIL = 'no-reply@marketplace.digital.gov.au'
     DM_FRAMEWORK_AGREEMENTS_EMAIL = 'enquiries@example.com'
@@ -206,8 +243,20 @@ class Config:
 
     # CELERY
     CELERY_TIMEZONE = 'Australia/Sydney'
+    # send the SNS events raised by a request or task as one publish_batch task
+    PUBLISH_BATCHED = False
     CELERYBEAT_SCHEDULE = {}
 
+    # a responses zip still queued or running this long after it was queued is taken to have died with its worker
+    RESPONSES_ZIP_STALE_MINUTES = 60
+
+    # the seller list sync only looks at changed sellers, comparing every seller with the list this often
+    MAILCHIMP_SELLER_LIST_FULL_SYNC_HOURS = 24
+
+    # write the audit events logged by a request or task in one insert when it ends
+    AUDIT_BUFFERED = True
+    AUDIT_BUFFER_MAX_EVENTS = 500
+
 
     # redis
     REDIS_SESSIONS = True
@@ -218,6 +267,17 @@ class Config:
     REDIS_SSL_HOST_REQ = None
     REDIS_SSL_CA_CERTS = None
 
+    # cache
+    CACHE_TYPE = 'redis'
+    CACHE_KEY_PREFIX = 'dm-api:'
+    CACHE_DEFAULT_TIMEOUT = 300
+    NOTIFICATION_COUNT_CACHE_TIMEOUT = 300
+    BRIEF_ACCESS_CACHE_TIMEOUT = 300
+    OPPORTUNITIES_CACHE_TIMEOUT = 300
+    MASTER_AGREEMENT_CACHE_TIMEOUT = 300
+    DOMAIN_CACHE_TIMEOUT = 300
+    SELLER_DASHBOARD_CACHE_TIMEOUT = 300
+
 
 class Test(Config):
     URL_PREFIX = ''
@@ -229,6 +289,7 @@ class Test(Config):
     ES_ENABLED = False
     SQLALCHEMY_DATABASE_URI = 'postgresql:///digitalmarketplace_test'
     DM_API_AUTH_TOKENS = 'myToken'
+    AUDIT_BUFFERED = False
     DM_API_APPLICATIONS_PAGE_SIZE = 5
     DM_API_SERVICES_PAGE_SIZE = 5
     DM_API_SUPPLIERS_PAGE_SIZE = 5
@@ -254,6 +315,7 @@ class Test(Config):
     SEND_EMAILS = False
 
     REDIS_SESSIONS = False
+    CACHE_TYPE = 'simple'
 
 
 class Development(Config):
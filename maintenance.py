@@ -0,0 +1,65 @@
+"""Data maintenance tasks run against the application database.
+
+Usage:
+    python maintenance.py <task> [args...]
+
+Example:
+    DM_ENVIRONMENT=production python maintenance.py backfill_search_vectors
+    DM_ENVIRONMENT=production python maintenance.py archive_audit_events 365
+"""
+from __future__ import print_function
+
+import os
+import sys
+
+from app import create_app, db
+
+
+def get_app():
+    app = create_app(os.getenv('DM_ENVIRONMENT') or 'development')
+    # these run long statements over whole tables, so they get the worker pool and no statement timeout
+    app.config['DB_PROCESS_TYPE'] = 'worker'
+    return app
+
+
+def backfill_search_vectors():
+    """Recompute every stored product and case study search vector."""
+    from app.models import refresh_search_vectors
+
+    with get_app().app_context():
+        refresh_search_vectors(db.session.connection())
+        db.session.commit()
+
+    print('Search vectors refreshed')
+
+
+def archive_audit_events(days='365', batch_size='10000'):
+    """Move acknowledged audit events older than `days` to archived_audit_event.
+
+    /audit-events reads both tables, so this can run while the API is serving.
+    """
+    import pendulum
+    from app.models import archive_audit_events as archive
+
+    before = pendulum.now('UTC').subtract(days=int(days))
+    total = 0
+    with get_app().app_context():
+        while True:
+            moved = archive(db.session.connection(), before, int(batch_size))
+            db.session.commit()
+            if not moved:
+                break
+            total += moved
+            print('Archived {} audit events'.format(total))
+
+    print('Archived {} acknowledged audit events created before {}'.format(total, before.to_date_string()))
+
+
+if __name__ == '__main__':
+    try:
+        task_method = getattr(sys.modules[__name__], sys.argv[1])
+    except (AttributeError, IndexError):
+        print('no such task')
+        sys.exit(1)
+
+    task_method(*sys.argv[2:])
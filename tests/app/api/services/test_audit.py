@@ -0,0 +1,144 @@
+import pytest
+
+from flask import g
+
+from app.api.services import audit_service, audit_types
+from app.models import Application, AuditEvent, db
+from app.tasks import celery
+from tests.app.helpers import BaseApplicationTest, QueryCounter
+
+
+class TestAuditService(BaseApplicationTest):
+    def setup(self):
+        super(TestAuditService, self).setup()
+
+    @pytest.fixture()
+    def applications(self, app):
+        with app.app_context():
+            for id in range(1, 4):
+                db.session.add(Application(id=id, data={}, status='submitted'))
+            db.session.commit()
+            yield db.session.query(Application).all()
+
+    @pytest.fixture()
+    def buffered_app(self, app):
+        app.config['AUDIT_BUFFERED'] = True
+        yield app
+
+    def log(self, application):
+        audit_service.log_audit_event(
+            audit_type=audit_types.update_application,
+            user='test@digital.gov.au',
+            data={'id': application.id},
+            db_object=application
+        )
+
+    def test_events_are_saved_immediately_when_not_buffered(self, app, applications):
+        with app.app_context():
+            self.log(applications[0])
+
+            assert AuditEvent.query.count() == 1
+
+    def test_buffered_events_are_written_in_one_insert(self, buffered_app, applications):
+        with buffered_app.app_context():
+            with QueryCounter(db.engine) as queries:
+                with audit_service.buffered():
+                    for application in applications:
+                        self.log(application)
+                    assert AuditEvent.query.count() == 0
+
+            inserts = [s for s in queries.statements if s.startswith('INSERT INTO audit_event')]
+            assert len(inserts) == 1
+
+            events = AuditEvent.query.order_by(AuditEvent.object_id).all()
+            assert [(e.object_type, e.object_id, e.data['id']) for e in events] == [
+                ('Application', 1, 1), ('Application', 2, 2), ('Application', 3, 3)
+            ]
+            assert all(e.type == 'update_application' and not e.acknowledged for e in events)
+            assert audit_service.stats['largest_buffer'] >= 3
+
+    def test_buffer_is_flushed_when_full(self, buffered_app, applications):
+        buffered_app.config['AUDIT_BUFFER_MAX_EVENTS'] = 2
+        with buffered_app.app_context():
+            with audit_service.buffered():
+                for application in applications:
+                    self.log(application)
+                assert AuditEvent.query.count() == 2
+
+            assert AuditEvent.query.count() == 3
+
+    def test_buffer_is_flushed_when_the_block_fails(self, buffered_app, applications):
+        with buffered_app.app_context():
+            with pytest.raises(ValueError):
+                with audit_service.buffered():
+                    self.log(applications[0])
+                    raise ValueError()
+
+            assert AuditEvent.query.count() == 1
+
+    def test_events_for_unsaved_objects_are_saved_immediately(self, buffered_app):
+        with buffered_app.app_context():
+            with audit_service.buffered():
+                application = Application(data={}, status='saved')
+                db.session.add(application)
+                self.log(application)
+
+                event = AuditEvent.query.one()
+                assert event.object_id == application.id
+
+    def test_sent_markers_are_saved_immediately(self, buffered_app, applications):
+        with buffered_app.app_context():
+            with audit_service.buffered():
+                self.log(applications[0])
+                audit_service.log_audit_event(
+                    audit_type=audit_types.sent_closed_brief_email,
+                    user='',
+                    data={},
+                    db_object=applications[1]
+                )
+
+                assert [e.type for e in AuditEvent.query.all()] == ['sent_closed_brief_email']
+
+            assert AuditEvent.query.count() == 2
+
+    def test_a_failed_insert_falls_back_to_one_event_at_a_time(self, buffered_app, applications):
+        with buffered_app.app_context():
+            with audit_service.buffered():
+                for application in applications:
+                    self.log(application)
+                g.audit_events[1].type = None
+
+            events = AuditEvent.query.order_by(AuditEvent.object_id).all()
+            assert [e.object_id for e in events] == [1, 3]
+
+    def test_buffered_events_are_written_when_a_request_ends(self, buffered_app, applications):
+        counts = []
+
+        @buffered_app.route('/audit-buffer')
+        def log_in_request():
+            for application in Application.query.order_by(Application.id):
+                self.log(application)
+            counts.append(AuditEvent.query.count())
+            return 'ok'
+
+        response = buffered_app.test_client().get('/audit-buffer')
+
+        assert response.status_code == 200
+        assert counts == [0]
+        with buffered_app.app_context():
+            assert AuditEvent.query.count() == 3
+
+    def test_buffered_events_are_written_when_a_task_ends(self, buffered_app, applications):
+        counts = []
+
+        @celery.task
+        def log_in_task():
+            for application in Application.query.order_by(Application.id):
+                self.log(application)
+            counts.append(AuditEvent.query.count())
+
+        with buffered_app.app_context():
+            log_in_task()
+
+            assert counts == [0]
+            assert AuditEvent.query.count() == 3
@@ -2,14 +2,16 @@ from __future__ import absolute_import
 
 import os
 import json
+import timeit
 import pytest
 import pendulum
 import mock
 from datetime import timedelta
 
 from nose.tools import assert_equal, assert_in
+from sqlalchemy import event
 
-from app import create_app, db
+from app import cache, create_app, db
 from app.models import Address, Service, Supplier, Framework, Lot, User, FrameworkLot, \
     Brief, utcnow, Application, PriceSchedule, Product, SupplierFramework
 
@@ -219,6 +221,33 @@ def setup_dummy_user(id=123, role='buyer'):
     return user.id
 
 
+class QueryCounter(object):
+    """Counts the statements run against an engine while used as a context manager."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self.record)
+        return self
+
+    def __exit__(self, *args):
+        event.remove(self.engine, 'before_cursor_execute', self.record)
+
+
+def best_of(fn, number=20, repeat=3):
+    """The fastest of `repeat` timings of `fn`, in seconds per call, for tests marked `benchmark`."""
+    return min(timeit.repeat(fn, number=number, repeat=repeat)) / number
+
+
 class WSGIApplicationWithEnvironment(object):
     def __init__(self, app, **kwargs):
         self.app = app
@@ -557,6 +586,7 @@ class BaseApplicationTest(object):
             Framework.query.filter(Framework.id >= 100).delete()
             db.session.commit()
             db.get_engine(self.app).dispose()
+            cache.clear()
 
     def load_example_listing(self, name):
         file_path = os.path.join("example_listings", "{}.json".format(name))
@@ -2,7 +2,13 @@
 
 from __future__ import unicode_literals
 
+import os
+
+from jinja2 import UndefinedError
+
 from app.emails import render_email_template, escape_token_markdown
+from app.emails.markdown_styler import markdown_with_inline_styles
+from app.emails.util import DEFAULT_STYLES, render_email_from_string, template_env
 
 EXPECTED = """<!DOCTYPE html>
 <html>
@@ -48,3 +54,61 @@ def test_escape_token_markdown():
     expected = 'randomtoken\-\_withmarkdown\_\-inthemiddle'
 
     assert escape_token_markdown(token) == expected
+
+
+def filled_templates():
+    """Every markdown email template, filled with placeholder values for the variables it uses."""
+    directory = os.path.dirname(template_env.get_template('master.html').filename)
+    filled = {}
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith('.md'):
+            continue
+        try:
+            filled[filename] = template_env.get_template(filename).render(
+                frontend_url='https://marketplace.example.com',
+                brief_name='Opportunity <name> & title',
+                brief_id=1,
+                supplier_name='Seller_Name',
+                title='Opportunity title'
+            )
+        except (UndefinedError, TypeError, AttributeError):
+            continue
+    return filled
+
+
+def test_every_template_converts_the_same_way_each_time():
+    filled = filled_templates()
+    assert len(filled) > 10
+
+    first = {filename: markdown_with_inline_styles(md, DEFAULT_STYLES) for filename, md in filled.items()}
+    for filename, md in filled.items():
+        assert first[filename].startswith('<')
+        assert markdown_with_inline_styles(md, DEFAULT_STYLES) == first[filename]
+
+
+def test_markdown_styles_and_state_do_not_leak_between_emails():
+    styled = markdown_with_inline_styles('# Title', {'h1': 'font-weight: bold'})
+    assert 'font-weight: bold' in styled
+    assert markdown_with_inline_styles('# Title') == '<h1>Title</h1>'
+
+    linked = markdown_with_inline_styles('[the brief][1]\n\n[1]: https://marketplace.example.com/1')
+    assert 'href="https://marketplace.example.com/1"' in linked
+    assert 'href' not in markdown_with_inline_styles('[another brief][1]')
+
+
+def test_markdown_is_cleaned():
+    converted = markdown_with_inline_styles('Hello <script>alert("xss")</script> <marquee>there</marquee>')
+    assert '<script>' not in converted
+    assert '<marquee>' not in converted
+    assert '&lt;script&gt;' in converted
+
+
+def test_render_email_from_string_uses_the_values_of_each_call():
+    message = 'Dear {{ supplier_name }},\n\nYour assessment for **{{ domain_name }}** was unsuccessful.'
+
+    first = render_email_from_string(message, supplier_name='Seller & Co', domain_name='Data science')
+    second = render_email_from_string(message, supplier_name='Another seller', domain_name='Data science')
+
+    assert 'Seller &amp; Co' in first
+    assert 'Another seller' in second
+    assert '<strong>Data science</strong>' in second
@@ -116,6 +116,31 @@ def test_product_models(app_context):
     assert Product.from_json(JSON).serializable == Product(**JSON).serializable
 
 
+def test_product_search_vector_is_maintained_on_write(app_context):
+    product = Product(name='widget', summary='a useful gadget')
+    supplier = Supplier(name='acme', products=[product])
+    db.session.add(supplier)
+    db.session.commit()
+
+    def matches(term):
+        return db.session.query(Product.id).filter(
+            Product.search_vector.op('@@')(db.func.to_tsquery(term))
+        ).all()
+
+    assert matches('gadget') == [(product.id,)]
+    assert matches('acme') == [(product.id,)]
+
+    supplier.name = 'globex'
+    db.session.commit()
+
+    assert matches('acme') == []
+    assert matches('globex') == [(product.id,)]
+    assert 'search_vector' not in product.serializable
+
+    db.session.delete(supplier)
+    db.session.commit()
+
+
 class TestBriefs(BaseApplicationTest):
     def setup(self):
         super(TestBriefs, self).setup()
@@ -8,7 +8,8 @@ from jsonschema import validate, SchemaError, ValidationError
 
 from app.utils import drop_foreign_fields
 from app.validation import validates_against_schema, is_valid_service_id, is_valid_date, \
-    is_valid_acknowledged_state, get_validation_errors, is_valid_string, min_price_less_than_max_price
+    is_valid_acknowledged_state, get_validation_errors, is_valid_string, min_price_less_than_max_price, \
+    get_validator, load_schemas, JSON_SCHEMAS_PATH, SCHEMA_NAMES
 
 EXAMPLE_LISTING_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__),
                                                     '..', '..', 'example_listings'))
@@ -273,6 +274,42 @@ def test_required_fields_param_requires_specified_fields():
     assert "answer_required" in errs['serviceSummary']
 
 
+def test_listed_schemas_load_and_check():
+    # schemas are loaded on first use now, so make sure every listed one would load
+    schemas = load_schemas(JSON_SCHEMAS_PATH, SCHEMA_NAMES)
+    assert sorted(schemas.keys()) == sorted(SCHEMA_NAMES)
+
+
+def test_validators_are_cached_by_schema_and_required_fields():
+    assert get_validator('services-g-cloud-7-scs') is get_validator('services-g-cloud-7-scs')
+    assert (get_validator('services-g-cloud-7-scs', False, ['serviceSummary', 'notAField']) is
+            get_validator('services-g-cloud-7-scs', False, ['serviceSummary']))
+    assert (get_validator('services-g-cloud-7-scs', False, ['serviceSummary']) is not
+            get_validator('services-g-cloud-7-scs', False, []))
+    assert get_validator('services-g-cloud-7-scs', False).schema['required'] == []
+    assert 'serviceSummary' in get_validator('services-g-cloud-7-scs').schema['required']
+
+
+def test_draft_validation_only_requires_the_listed_fields():
+    data = load_example_listing("G7-SCS")
+    data = drop_api_exported_fields_so_that_api_import_will_validate(data)
+    data.pop("serviceSummary", None)
+    data.pop("serviceName", None)
+    data.pop("serviceDefinitionDocumentURL", None)
+
+    for _ in range(2):
+        errs = get_validation_errors("services-g-cloud-7-scs", data,
+                                     enforce_required=False,
+                                     required_fields=['serviceSummary', 'serviceName'])
+        assert errs['serviceSummary'] == 'answer_required'
+        assert errs['serviceName'] == 'answer_required'
+        assert 'serviceDefinitionDocumentURL' not in errs
+
+    # drafts share the cached validators, which must not change what a full validation requires
+    errs = get_validation_errors("services-g-cloud-7-scs", data)
+    assert errs['serviceDefinitionDocumentURL'] == 'answer_required'
+
+
 def test_additional_properties_has_validation_error():
     data = load_example_listing("G7-SCS")
     data = drop_api_exported_fields_so_that_api_import_will_validate(data)
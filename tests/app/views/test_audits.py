@@ -1,9 +1,11 @@
 from tests.app.helpers import BaseApplicationTest
 from flask import json
 from datetime import datetime
-from app.models import AuditEvent
+import pendulum
+from app.models import AuditEvent, ArchivedAuditEvent, archive_audit_events
 from app import db
 from app.models import Supplier
+from app.utils import encode_cursor
 from dmapiclient.audit import AuditTypes
 
 from nose.tools import assert_equal, assert_in, assert_true, assert_false
@@ -352,6 +354,91 @@ class TestAuditEvents(BaseApplicationTest):
             data['auditEvents'][1]['id']
         )
 
+    def test_should_walk_audit_events_with_cursor(self):
+        self.add_audit_events(7)
+
+        users = []
+        response = self.client.get('/audit-events')
+        data = json.loads(response.get_data())
+        users.extend(e['user'] for e in data['auditEvents'])
+
+        response = self.client.get('/audit-events?cursor={}'.format(data['next_cursor']))
+        data = json.loads(response.get_data())
+        assert_equal(response.status_code, 200)
+        users.extend(e['user'] for e in data['auditEvents'])
+
+        assert_equal(users, [str(i) for i in range(7)])
+        assert_equal(data['next_cursor'], None)
+        assert_false('next' in data['links'])
+
+    def test_should_walk_latest_first_audit_events_with_cursor(self):
+        self.add_audit_events(7)
+
+        response = self.client.get('/audit-events?latest_first=true&per_page=3')
+        data = json.loads(response.get_data())
+        users = [e['user'] for e in data['auditEvents']]
+        while data['next_cursor']:
+            response = self.client.get(data['links']['next'])
+            data = json.loads(response.get_data())
+            users.extend(e['user'] for e in data['auditEvents'])
+
+        assert_equal(users, [str(i) for i in reversed(range(7))])
+
+    def test_should_reject_invalid_cursor(self):
+        response = self.client.get('/audit-events?cursor=not-a-cursor')
+        assert_equal(response.status_code, 400)
+
+    def test_should_reject_cursor_with_an_id_that_is_not_a_number(self):
+        cursor = encode_cursor([datetime(2018, 1, 1).isoformat(), 'not-an-id'])
+        response = self.client.get('/audit-events?cursor={}'.format(cursor))
+        assert_equal(response.status_code, 400)
+
+    def test_should_get_user_names_for_audit_events(self):
+        self.setup_dummy_user(id=1)
+        self.add_audit_events(1)
+        with self.app.app_context():
+            db.session.add(self.audit_event('test+1@digital.gov.au', AuditTypes.supplier_update))
+            db.session.commit()
+
+        response = self.client.get('/audit-events?include-user=true')
+        data = json.loads(response.get_data())
+
+        assert_false('userName' in data['auditEvents'][0])
+        assert_equal(data['auditEvents'][1]['userName'], 'my name')
+
+    def test_should_list_archived_audit_events(self):
+        self.add_audit_events(3)
+        with self.app.app_context():
+            acknowledged_ids = []
+            for event in AuditEvent.query.order_by(AuditEvent.id).limit(2):
+                event.acknowledged = True
+                event.acknowledged_at = datetime.utcnow()
+                event.acknowledged_by = 'tests'
+                acknowledged_ids.append(event.id)
+            db.session.commit()
+
+            before = pendulum.now('UTC').add(minutes=1)
+            assert_equal(archive_audit_events(db.session.connection(), before, 1), 1)
+            assert_equal(archive_audit_events(db.session.connection(), before, 1), 1)
+            assert_equal(archive_audit_events(db.session.connection(), before, 1), 0)
+            db.session.commit()
+
+            assert_equal(AuditEvent.query.count(), 1)
+            assert_equal([e.id for e in ArchivedAuditEvent.query.order_by(ArchivedAuditEvent.id)], acknowledged_ids)
+
+        response = self.client.get('/audit-events')
+        data = json.loads(response.get_data())
+        assert_equal([e['user'] for e in data['auditEvents']], ['0', '1', '2'])
+        assert_equal(data['auditEvents'][0]['acknowledgedBy'], 'tests')
+
+        response = self.client.get('/audit-events?acknowledged=true')
+        data = json.loads(response.get_data())
+        assert_equal([e['user'] for e in data['auditEvents']], ['0', '1'])
+
+        response = self.client.get('/audit-events?acknowledged=false')
+        data = json.loads(response.get_data())
+        assert_equal([e['user'] for e in data['auditEvents']], ['2'])
+
 
 class TestCreateAuditEvent(BaseApplicationTest):
     @staticmethod
@@ -3,7 +3,9 @@ from flask import json
 from datetime import datetime
 from app.models import AuditEvent
 from app import db
-from app.models import Supplier
+from app.api.services import key_values_service
+from app.models import Application, Supplier
+from app.tasks.supplier_tasks import update_application_metrics
 from dmapiclient.audit import AuditTypes
 
 from nose.tools import assert_equal, assert_in, assert_true, assert_false
@@ -25,3 +27,40 @@ class TestMetrics(BaseApplicationTest):
 
             data = json.loads(response.get_data(as_text=True))
             assert response.status_code == 200, data
+
+    def test_application_metrics(self):
+        with self.app.app_context():
+            self.setup_dummy_suppliers(2)
+            Supplier.query.update({Supplier.abn: '12345678901'}, synchronize_session=False)
+            db.session.add(Application(status='submitted', supplier_code=0, data={}))
+            db.session.add(Application(status='saved', data={}))
+            db.session.commit()
+
+            response = self.client.get("/metrics/applications")
+            data = json.loads(response.get_data(as_text=True))
+
+            assert response.status_code == 200, data
+            assert data['application_total_count']['value'] == 2
+            assert data['application_existing_seller_count']['value'] == 1
+            assert data['application_status_submitted_existing_seller_count']['value'] == 1
+            assert data['application_status_saved_new_seller_count']['value'] == 1
+            assert data['application_status_approved_total_count']['value'] == 0
+            assert data['suppliers_with_application_count']['value'] == 1
+            assert data['suppliers_without_application_count']['value'] == 1
+
+    def test_application_metrics_are_read_from_the_snapshot(self):
+        with self.app.app_context():
+            db.session.add(Application(status='saved', data={}))
+            db.session.commit()
+            update_application_metrics()
+
+            db.session.add(Application(status='saved', data={}))
+            db.session.commit()
+
+            response = self.client.get("/metrics/applications")
+            data = json.loads(response.get_data(as_text=True))
+
+            snapshot = key_values_service.get_by_key('application_metrics')
+            assert data['application_total_count'] == {
+                'value': 1, 'ts': snapshot['updated_at'].to_iso8601_string()
+            }
@@ -1,6 +1,12 @@
+import json
+
 from ..helpers import BaseApplicationTest
 
 from nose.tools import assert_equal
+from sqlalchemy.exc import OperationalError
+
+from app import db, statement_timeout
+from app.engine import MeteredNullPool, MeteredQueuePool, engine_options
 
 
 class TestStatus(BaseApplicationTest):
@@ -8,3 +14,53 @@ class TestStatus(BaseApplicationTest):
     def test_should_return_200_from_elb_status_check(self):
         status_response = self.client.get('/_status?ignore-dependencies')
         assert_equal(200, status_response.status_code)
+
+    def test_db_pool_status_reports_checkouts_and_saturation(self):
+        with self.app.app_context():
+            db.session.execute('SELECT 1')
+            db.session.remove()
+
+        status_response = self.client.get('/_status/db-pool')
+        assert_equal(200, status_response.status_code)
+
+        data = json.loads(status_response.get_data())
+        assert_equal(data['processType'], 'web')
+        assert_equal(data['pool']['size'], self.app.config['DB_POOL_OPTIONS']['web']['pool_size'])
+        assert_equal((data['pool']['checkedOut'], data['pool']['checkedIn']), (0, 1))
+        assert_equal(data['pool']['saturation'], 0)
+        assert_equal(data['pool']['metrics']['checkouts'], 1)
+
+    def test_engine_options_follow_the_process_type(self):
+        config = dict(self.app.config)
+        options = engine_options(config)
+        assert_equal(options['poolclass'], MeteredQueuePool)
+        assert_equal(options['pool_size'], config['DB_POOL_OPTIONS']['web']['pool_size'])
+        assert_equal(options['connect_args'], {'options': '-c statement_timeout=30000'})
+
+        config['DB_PROCESS_TYPE'] = 'worker'
+        options = engine_options(config)
+        assert_equal(options['pre_ping'], True)
+        assert 'connect_args' not in options
+
+        config['DB_PGBOUNCER'] = True
+        options = engine_options(config)
+        assert_equal(options['poolclass'], MeteredNullPool)
+        assert 'pool_size' not in options and 'connect_args' not in options
+
+    def test_report_statement_timeout_cancels_slow_queries_in_the_view(self):
+        self.app.config['DB_STATEMENT_TIMEOUTS'] = dict(self.app.config['DB_STATEMENT_TIMEOUTS'], report=50)
+
+        @self.app.route('/slow-report')
+        @statement_timeout('report')
+        def slow_report():
+            timeout = db.session.execute('SHOW statement_timeout').scalar()
+            try:
+                db.session.execute('SELECT pg_sleep(1)')
+            except OperationalError as e:
+                db.session.rollback()
+                return '{} {}'.format(timeout, e.orig.pgcode)
+            return '{} finished'.format(timeout)
+
+        response = self.client.get('/slow-report')
+        # 57014 is query_canceled, which is what postgres raises when statement_timeout is reached
+        assert_equal(response.get_data(as_text=True), '50ms 57014')
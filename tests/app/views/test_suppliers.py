@@ -8,8 +8,11 @@ from flask import current_app
 from nose.tools import assert_equal, assert_in, assert_is_none, assert_is_not_none, assert_true, assert_false
 
 from app import db
-from app.models import Address, Supplier, AuditEvent, SupplierFramework, Framework, Domain, User, utcnow, Product
-from ..helpers import BaseApplicationTest, JSONTestMixin, JSONUpdateTestMixin, assert_api_compatible, is_sorted
+from app.utils import encode_cursor
+from app.models import Address, Supplier, AuditEvent, SupplierFramework, Framework, Domain, User, utcnow, Product, \
+    MasterAgreement, SignedAgreement
+from ..helpers import BaseApplicationTest, JSONTestMixin, JSONUpdateTestMixin, QueryCounter, assert_api_compatible, \
+    is_sorted
 from decimal import Decimal
 
 import pendulum
@@ -96,6 +99,69 @@ class TestListSuppliers(BaseApplicationTest):
         names = [s['name'] for s in data['suppliers']]
         assert 'Example Pty Ltd' not in names
 
+    def sign_agreements(self, agreements_per_supplier):
+        with self.app.app_context():
+            now = pendulum.now('utc')
+            agreement_ids = []
+            for i in range(agreements_per_supplier):
+                agreement = MasterAgreement(
+                    start_date=now.subtract(years=i + 1),
+                    end_date=now.subtract(years=i),
+                    data={'htmlUrl': 'agreement-{}.html'.format(i)}
+                )
+                db.session.add(agreement)
+                db.session.flush()
+                agreement_ids.append(agreement.id)
+
+            for code in range(7):
+                for i, agreement_id in enumerate(agreement_ids):
+                    user_id = self.setup_dummy_user(id=1000 + code * 10 + i, role='supplier', supplier_code=code)
+                    db.session.add(SignedAgreement(
+                        agreement_id=agreement_id,
+                        user_id=user_id,
+                        supplier_code=code,
+                        signed_at=now.subtract(days=i)
+                    ))
+
+            db.session.commit()
+
+    def test_signed_agreements_do_not_add_queries_per_agreement(self):
+        with self.app.app_context():
+            with QueryCounter(db.engine) as without_agreements:
+                self.client.get('/suppliers')
+
+        self.sign_agreements(4)
+
+        with self.app.app_context():
+            with QueryCounter(db.engine) as with_agreements:
+                response = self.client.get('/suppliers')
+
+        assert_equal(200, response.status_code)
+        data = json.loads(response.get_data())
+        signed_agreements = [a for s in data['suppliers'] for a in s['signed_agreements']]
+        assert len(signed_agreements) == 7 * 4
+        assert all(a['htmlUrl'].startswith('agreement-') for a in signed_agreements)
+        assert all(a['user']['emailAddress'].startswith('test+10') for a in signed_agreements)
+        # one query for the signed agreements, one for their signers and one for the master agreements
+        assert with_agreements.count <= without_agreements.count + 3
+
+    def test_master_agreement_cache_is_cleared_when_a_change_commits(self):
+        self.sign_agreements(1)
+        with self.app.app_context():
+            agreement = MasterAgreement.query.first()
+            assert_equal(MasterAgreement.serialized_by_id()[agreement.id]['htmlUrl'], 'agreement-0.html')
+
+            agreement.data = {'htmlUrl': 'rolled-back.html'}
+            db.session.flush()
+            assert_in('master_agreements', current_app.extensions['process_cache'])
+            db.session.rollback()
+            assert_in('master_agreements', current_app.extensions['process_cache'])
+
+            agreement = MasterAgreement.query.first()
+            agreement.data = {'htmlUrl': 'committed.html'}
+            db.session.commit()
+            assert_equal(MasterAgreement.serialized_by_id()[agreement.id]['htmlUrl'], 'committed.html')
+
     def test_results_per_page(self):
         response = self.client.get('/suppliers?per_page=2')
         assert_equal(200, response.status_code)
@@ -681,6 +747,85 @@ class TestSupplierSearch(BaseApplicationTest):
             results = self.do_search(NEW_DOMAIN_SEARCH)
             assert [_['name'] for _ in results] == ['Supplier 2']
 
+    def test_search_pages_in_database(self):
+        self.setup_dummy_suppliers_with_old_and_new_domains(5)
+
+        MATCH_ALL_SEARCH = {
+            "query": {
+                "match_all": {
+                }
+            }
+        }
+
+        with self.app.app_context():
+            response = self.search(MATCH_ALL_SEARCH, framework='digital-outcomes-and-specialists', size='2')
+            assert_equal(response.status_code, 200)
+            first = json.loads(response.get_data())
+
+            response = self.search(MATCH_ALL_SEARCH, framework='digital-outcomes-and-specialists', size='2',
+                                   **{'from': '4'})
+            assert_equal(response.status_code, 200)
+            last = json.loads(response.get_data())
+
+        assert_equal(first['hits']['total'], 5)
+        assert_equal(len(first['hits']['hits']), 2)
+        assert first['next_cursor']
+        assert_equal(last['hits']['total'], 5)
+        assert_equal(len(last['hits']['hits']), 1)
+        assert_is_none(last['next_cursor'])
+
+    def test_search_walks_keyset_cursor(self):
+        self.setup_dummy_suppliers_with_old_and_new_domains(5)
+
+        MATCH_ALL_SEARCH = {
+            "query": {
+                "match_all": {
+                }
+            },
+            "sort": [{'name': {"order": "desc", "mode": "min"}}]
+        }
+
+        codes = []
+        cursor = None
+        with self.app.app_context():
+            while True:
+                args = {'framework': 'digital-outcomes-and-specialists', 'size': '2'}
+                if cursor:
+                    args['cursor'] = cursor
+                response = self.search(MATCH_ALL_SEARCH, **args)
+                assert_equal(response.status_code, 200)
+                result = json.loads(response.get_data())
+                assert_equal(result['hits']['total'], 5)
+                codes.extend(h['_source']['code'] for h in result['hits']['hits'])
+                cursor = result['next_cursor']
+                if not cursor:
+                    break
+
+        assert_equal(len(codes), 5)
+        assert_equal(len(set(codes)), 5)
+
+    def test_search_rejects_invalid_cursor(self):
+        response = self.search({'query': {'match_all': {}}}, cursor='not-a-cursor')
+        assert_equal(response.status_code, 400)
+
+    def test_search_rejects_cursor_values_of_the_wrong_type(self):
+        self.setup_dummy_suppliers_with_old_and_new_domains(5)
+        term_search = {'query': {'match_phrase_prefix': {'name': 'Supplier'}}}
+        latest_search = {'query': {'match_all': {}}, 'sort': [{'name': {'sort_by': 'latest'}}]}
+
+        for search, values in [
+            (term_search, ['not a rank', 'Supplier 1', 1]),
+            (term_search, ['NaN', 'Supplier 1', 1]),
+            (term_search, [{}, 'Supplier 1', 1]),
+            (term_search, ['0.5', ['Supplier 1'], 1]),
+            (term_search, ['0.5', 'Supplier 1', '1; drop table supplier']),
+            (latest_search, ['not a date', 1]),
+            (latest_search, ['2018-01-01T00:00:00', True])
+        ]:
+            with self.app.app_context():
+                response = self.search(search, cursor=encode_cursor(values))
+            assert_equal(response.status_code, 400, values)
+
     def test_product_search_results(self):
         self.setup_dummy_suppliers_with_old_and_new_domains(5)
 
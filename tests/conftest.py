@@ -16,6 +16,23 @@ from migrations import \
     load_from_app_model, load_test_fixtures
 
 
+def pytest_addoption(parser):
+    parser.addoption('--benchmark', action='store_true', help='also run the tests marked benchmark')
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'benchmark: times old and new code paths, skipped without --benchmark')
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption('--benchmark'):
+        return
+    skip = pytest.mark.skip(reason='benchmarks only run with --benchmark')
+    for item in items:
+        if 'benchmark' in item.keywords:
+            item.add_marker(skip)
+
+
 @pytest.fixture(autouse=True, scope='session')
 def db_initialization(request):
     from config import configs
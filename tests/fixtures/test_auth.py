@@ -1,7 +1,13 @@
 import json
+import mock
 import pytest
 from base64 import b64encode
 
+from app import cache
+from app.api.business.supplier_business import notification_count_cache_key
+from app.models import Supplier, SupplierDomain, db
+from tests.app.helpers import QueryCounter
+
 
 def test_anonymous(client):
     res = client.get('/2/ping')
@@ -229,3 +235,63 @@ def test_api_key_require_auth_decorator(client, users, api_key):
 
     res = client.get('/2/reports/brief/published', headers={'X-Api-Key': key})
     assert res.status_code == 200
+
+
+def test_supplier_notification_count_is_cached_until_supplier_changes(app, client, supplier_user):
+    client.post('/2/login', data=json.dumps({
+        'emailAddress': 'j@examplecompany.biz', 'password': 'testpassword'
+    }), content_type='application/json')
+
+    with mock.patch('app.api.business.supplier_business.get_supplier_messages') as get_supplier_messages:
+        get_supplier_messages.return_value = mock.Mock(errors=[{}], warnings=[{}, {}])
+        res = client.get('/2/ping')
+        assert json.loads(res.get_data(as_text=True))['notificationCount'] == 3
+        client.get('/2/ping')
+        assert get_supplier_messages.call_count == 1
+
+        with app.app_context():
+            supplier = Supplier.query.filter(Supplier.code == supplier_user.supplier_code).first()
+            supplier.data = dict(supplier.data, contact_phone='456')
+            db.session.commit()
+
+        get_supplier_messages.return_value = mock.Mock(errors=[], warnings=[])
+        res = client.get('/2/ping')
+        assert json.loads(res.get_data(as_text=True))['notificationCount'] == 0
+        assert get_supplier_messages.call_count == 2
+
+
+def test_supplier_notification_count_is_cleared_once_a_domain_change_commits(app, supplier_domains):
+    with app.app_context():
+        supplier_domain = SupplierDomain.query.first()
+        key = notification_count_cache_key(supplier_domain.supplier.code)
+        cache.set(key, 3)
+
+        supplier_domain.status = 'assessed'
+        db.session.flush()
+        db.session.rollback()
+        assert cache.get(key) == 3
+
+        supplier_domain = SupplierDomain.query.first()
+        assert supplier_domain.supplier.code
+        supplier_domain.status = 'assessed'
+        with QueryCounter(db.engine) as queries:
+            db.session.flush()
+        assert cache.get(key) == 3
+        db.session.commit()
+
+        assert cache.get(key) is None
+        # the supplier was already loaded, so the flush didn't look its code up
+        assert not any(statement.startswith('SELECT supplier.code') for statement in queries.statements)
+
+
+def test_unchanged_suppliers_leave_notification_counts_alone(app, suppliers):
+    with app.app_context():
+        supplier = Supplier.query.first()
+        key = notification_count_cache_key(supplier.code)
+        cache.set(key, 3)
+
+        supplier.name = supplier.name
+        assert supplier in db.session.dirty
+        db.session.commit()
+
+        assert cache.get(key) == 3
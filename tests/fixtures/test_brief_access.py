@@ -0,0 +1,110 @@
+import pytest
+
+from app import cache
+from app.api.services import briefs as briefs_service
+from app.api.services.briefs import brief_access_cache_key
+from app.models import (Brief, BriefUser, Framework, Lot, Team, TeamBrief,
+                        TeamMember, User, db, utcnow)
+
+TEAM_SIZE = 50
+BRIEFS_PER_MEMBER = 4
+OUTSIDER_ID = 1000
+
+
+def add_user(user_id):
+    db.session.add(User(
+        id=user_id,
+        email_address='buyer{}@digital.gov.au'.format(user_id),
+        name='Buyer {}'.format(user_id),
+        password='test',
+        active=True,
+        role='buyer',
+        password_changed_at=utcnow()
+    ))
+
+
+def add_brief(brief_id, user_id, team_id=None):
+    db.session.add(Brief(
+        id=brief_id,
+        data={},
+        framework=Framework.query.filter(Framework.slug == 'digital-marketplace').first(),
+        lot=Lot.query.filter(Lot.slug == 'specialist').first()
+    ))
+    db.session.flush()
+    db.session.add(BriefUser(brief_id=brief_id, user_id=user_id))
+    if team_id:
+        db.session.add(TeamBrief(brief_id=brief_id, team_id=team_id, user_id=user_id))
+
+
+@pytest.fixture()
+def large_team(app):
+    with app.app_context():
+        db.session.add(Team(id=1, name='Large team', email_address='team@digital.gov.au', status='completed'))
+        brief_id = 1
+        for user_id in range(1, TEAM_SIZE + 1):
+            add_user(user_id)
+            db.session.flush()
+            db.session.add(TeamMember(team_id=1, user_id=user_id))
+            for _ in range(BRIEFS_PER_MEMBER):
+                add_brief(brief_id, user_id, team_id=1)
+                brief_id += 1
+
+        add_user(OUTSIDER_ID)
+        db.session.flush()
+        add_brief(brief_id, OUTSIDER_ID)
+
+        db.session.commit()
+        yield brief_id
+
+
+def test_team_members_can_access_each_others_briefs(app, large_team):
+    outsider_brief_id = large_team
+    last_team_brief_id = TEAM_SIZE * BRIEFS_PER_MEMBER
+    with app.app_context():
+        for user_id in [1, TEAM_SIZE]:
+            assert briefs_service.has_permission_to_brief(user_id, 1)
+            assert briefs_service.has_permission_to_brief(user_id, last_team_brief_id)
+            assert not briefs_service.has_permission_to_brief(user_id, outsider_brief_id)
+
+        assert briefs_service.has_permission_to_brief(OUTSIDER_ID, outsider_brief_id)
+        assert not briefs_service.has_permission_to_brief(OUTSIDER_ID, 1)
+        assert not briefs_service.has_permission_to_brief(OUTSIDER_ID, last_team_brief_id)
+        assert not briefs_service.has_permission_to_brief(1, outsider_brief_id + 1)
+
+
+def test_joining_team_grants_access_to_team_briefs(app, large_team):
+    outsider_brief_id = large_team
+    with app.app_context():
+        assert not briefs_service.has_permission_to_brief(OUTSIDER_ID, 1)
+        assert not briefs_service.has_permission_to_brief(1, outsider_brief_id)
+
+        db.session.add(TeamMember(team_id=1, user_id=OUTSIDER_ID))
+        db.session.commit()
+
+        assert briefs_service.has_permission_to_brief(OUTSIDER_ID, 1)
+        assert briefs_service.has_permission_to_brief(1, outsider_brief_id)
+
+
+def test_removing_brief_user_revokes_access_for_team_mates(app, large_team):
+    outsider_brief_id = large_team
+    with app.app_context():
+        db.session.add(TeamMember(team_id=1, user_id=OUTSIDER_ID))
+        db.session.commit()
+        assert briefs_service.has_permission_to_brief(2, outsider_brief_id)
+
+        db.session.delete(BriefUser.query.filter(BriefUser.brief_id == outsider_brief_id).one())
+        db.session.commit()
+
+        assert cache.get(brief_access_cache_key(2)) is None
+        assert not briefs_service.has_permission_to_brief(2, outsider_brief_id)
+
+
+def test_adding_brief_users_through_the_brief_grants_access(app, large_team):
+    with app.app_context():
+        assert not briefs_service.has_permission_to_brief(OUTSIDER_ID, 1)
+
+        brief = Brief.query.get(1)
+        brief.users.append(User.query.get(OUTSIDER_ID))
+        db.session.commit()
+
+        assert briefs_service.has_permission_to_brief(OUTSIDER_ID, 1)
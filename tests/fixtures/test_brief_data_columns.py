@@ -0,0 +1,116 @@
+import random
+
+import pendulum
+import pytest
+from sqlalchemy.orm.attributes import flag_modified
+
+from app.api.services import briefs as briefs_service
+from app.models import Brief, Framework, Lot, brief_data_columns, db
+
+SEEDED_BRIEFS = 400
+AREAS = ['Software engineering and Development', 'Training, Learning and Development', 'User research and Design']
+
+
+def explain(query):
+    """Run the query under EXPLAIN ANALYZE and return the plan postgres chose with its timings."""
+    compiled = query.statement.compile(dialect=db.engine.dialect)
+    result = db.session.connection().execute('EXPLAIN (ANALYZE, FORMAT JSON) {}'.format(compiled), compiled.params)
+    return result.scalar()[0]
+
+
+def plan_nodes(plan):
+    yield plan
+    for child in plan.get('Plans', []):
+        for node in plan_nodes(child):
+            yield node
+
+
+def brief_data(i):
+    if i % 200 == 0:
+        seller_selector = 'oneSeller'
+    elif i % 4 == 0:
+        seller_selector = 'allSellers'
+    else:
+        seller_selector = 'someSellers'
+    return {
+        'title': 'Synthetic brief {}'.format(i),
+        'summary': 'A brief to fill the table. ' * 20,
+        'sellerSelector': seller_selector,
+        'openTo': random.choice(['category', 'selected']) if seller_selector == 'someSellers' else None,
+        'areaOfExpertise': random.choice(AREAS),
+        'location': ['Australian Capital Territory', 'Offsite']
+    }
+
+
+@pytest.fixture()
+def synthetic_briefs(app):
+    random.seed(20)
+    with app.app_context():
+        framework = Framework.query.filter(Framework.slug == 'digital-marketplace').first()
+        lot = Lot.query.filter(Lot.slug == 'specialist').first()
+        now = pendulum.now('UTC')
+        rows = []
+        for i in range(1, SEEDED_BRIEFS + 1):
+            data = brief_data(i)
+            row = dict(
+                id=i,
+                framework_id=framework.id,
+                lot_id=lot.id,
+                data=data,
+                created_at=now,
+                updated_at=now,
+                published_at=now.subtract(minutes=i)
+            )
+            row.update(brief_data_columns(data))
+            rows.append(row)
+
+        db.session.execute(Brief.__table__.insert(), rows)
+        db.session.commit()
+        db.session.execute('ANALYZE brief')
+        yield SEEDED_BRIEFS
+
+
+def test_columns_are_kept_in_step_with_brief_data(app, briefs):
+    with app.app_context():
+        brief = Brief.query.get(1)
+        brief.data['sellerSelector'] = 'someSellers'
+        brief.data['openTo'] = 'category'
+        brief.data['areaOfExpertise'] = AREAS[0]
+        flag_modified(brief, 'data')
+        db.session.commit()
+
+        brief = Brief.query.get(1)
+        assert (brief.seller_selector, brief.open_to, brief.area_of_expertise) == ('someSellers', 'category', AREAS[0])
+
+        brief.data = {'sellerSelector': 'allSellers', 'openTo': ['not', 'text']}
+        db.session.commit()
+
+        brief = Brief.query.get(1)
+        assert (brief.seller_selector, brief.open_to, brief.area_of_expertise) == ('allSellers', None, None)
+
+
+def test_column_filters_find_the_briefs_their_data_describes(app, synthetic_briefs):
+    with app.app_context():
+        briefs = Brief.query.all()
+        open_to_all = [b.id for b in briefs if b.data['sellerSelector'] == 'allSellers']
+        open_to_selected = [b.id for b in briefs if b.data['sellerSelector'] == 'someSellers']
+        open_to_category = [
+            b.id for b in briefs if b.data['sellerSelector'] == 'someSellers' and b.data['openTo'] == 'category'
+        ]
+
+        since = pendulum.now('UTC').subtract(hours=24)
+        assert (sorted(b.id for b in briefs_service.get_open_briefs_published_since(since)) ==
+                sorted(open_to_all + open_to_category))
+
+        metrics = briefs_service.get_metrics_query().one()
+        assert (metrics.total, metrics.live, metrics.open_to_all, metrics.open_to_selected) == (
+            SEEDED_BRIEFS, 0, len(open_to_all), len(open_to_selected))
+        assert metrics.most_recent_published_at == Brief.query.get(1).published_at
+
+        query = db.session.query(Brief.id).filter(Brief.seller_selector == 'oneSeller')
+        assert sorted(query.all()) == [(200, ), (400, )]
+
+        # a table this small is cheaper to scan, so rule that out to check the filter can use the index
+        db.session.execute('SET LOCAL enable_seqscan = off')
+        plan = explain(query)
+        assert any(node.get('Index Name') == 'ix_brief_seller_selector' for node in plan_nodes(plan['Plan']))
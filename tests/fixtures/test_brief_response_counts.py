@@ -0,0 +1,75 @@
+import pendulum
+
+from app.api.services import brief_responses_service
+from app.api.services import briefs as briefs_service
+from app.models import Brief, BriefResponse, db
+
+
+def counted_states(brief_id):
+    brief = Brief.query.get(brief_id)
+    return brief.responses_submitted_count, brief.responses_draft_count, brief.responses_withdrawn_count
+
+
+def add_response(response_id, brief_id, supplier_code, submitted=True):
+    db.session.add(BriefResponse(
+        id=response_id,
+        brief_id=brief_id,
+        supplier_code=supplier_code,
+        submitted_at=pendulum.now('UTC') if submitted else None,
+        data={}
+    ))
+
+
+def test_counters_follow_response_state_changes(app, briefs, suppliers):
+    with app.app_context():
+        assert counted_states(1) == (0, 0, 0)
+        updated_at = Brief.query.get(1).updated_at
+
+        add_response(1, 1, 1)
+        add_response(2, 1, 2, submitted=False)
+        add_response(3, 1, 3, submitted=False)
+        add_response(4, 2, 1)
+        db.session.commit()
+        assert counted_states(1) == (1, 2, 0)
+        assert counted_states(2) == (1, 0, 0)
+        assert Brief.query.get(1).updated_at == updated_at
+
+        BriefResponse.query.get(2).submit()
+        BriefResponse.query.get(1).withdrawn_at = pendulum.now('UTC')
+        db.session.commit()
+        assert counted_states(1) == (1, 1, 1)
+
+        db.session.delete(BriefResponse.query.get(3))
+        db.session.commit()
+        assert counted_states(1) == (1, 0, 1)
+        assert counted_states(1)[0] == brief_responses_service.count_brief_responses(1, submitted_only=True)
+
+
+def test_count_brief_responses_matches_the_responses(app, briefs, suppliers):
+    with app.app_context():
+        add_response(1, 1, 1)
+        add_response(2, 1, 1, submitted=False)
+        add_response(3, 1, 2)
+        db.session.commit()
+
+        for supplier_code in [None, 1, 2, 3]:
+            for submitted_only in [True, False]:
+                assert brief_responses_service.count_brief_responses(1, supplier_code, submitted_only) == len(
+                    brief_responses_service.get_brief_responses(1, supplier_code, submitted_only=submitted_only))
+
+
+def test_opportunities_read_the_counters(app, briefs, suppliers):
+    with app.app_context():
+        # briefs 1 to 5 get 20 responses each, every third one left as a draft
+        for response_id in range(1, 101):
+            add_response(response_id, response_id % 5 + 1, response_id % 5 + 1, submitted=response_id % 3 > 0)
+        db.session.commit()
+
+        submitted = {}
+        for response_id in range(1, 101):
+            if response_id % 3 > 0:
+                brief_id = response_id % 5 + 1
+                submitted[brief_id] = submitted.get(brief_id, 0) + 1
+
+        opportunities = briefs_service.get_opportunities()
+        assert {o['id']: o['submissions'] for o in opportunities} == submitted
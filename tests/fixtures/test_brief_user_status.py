@@ -717,3 +717,18 @@ def test_can_not_respond_to_open_to_selected_specialist_as_unassessed_seller(
     result = user_status.can_respond_to_specialist_opportunity()
 
     assert result is False
+
+
+@pytest.mark.parametrize('specialist_brief', [{'data': open_to_all_specialist_data}], indirect=True)
+@pytest.mark.parametrize('supplier_domains', [{'status': 'assessed'}, {'status': 'unassessed'}], indirect=True)
+def test_loaded_supplier_facts_answer_like_the_lookups(specialist_brief, supplier_user, supplier_domains,
+                                                       brief_assessments):
+    questions = ['evidence_id_in_draft', 'evidence_id_rejected', 'is_assessed_for_category',
+                 'is_awaiting_domain_assessment', 'is_awaiting_application_assessment',
+                 'has_been_assessed_for_brief', 'has_signed_current_agreement', 'can_respond']
+    looked_up = BriefUserStatus(specialist_brief, supplier_user)
+    loaded = BriefUserStatus(specialist_brief, supplier_user)
+    loaded.load_supplier_facts()
+
+    for question in questions:
+        assert getattr(loaded, question)() == getattr(looked_up, question)(), question
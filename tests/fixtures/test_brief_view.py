@@ -0,0 +1,102 @@
+import json
+
+import pendulum
+import pytest
+
+from app.api.business.brief import BriefUserStatus
+from app.api.services import domain_service
+from app.models import BriefResponse, db
+from tests.app.helpers import QueryCounter
+
+ANONYMOUS_QUERY_BUDGET = 5
+BUYER_QUERY_BUDGET = 10
+SELLER_QUERY_BUDGET = 16
+
+brief_params = {
+    'data': {
+        'title': 'Brief view',
+        'sellerCategory': '1',
+        'openTo': 'all',
+        'numberOfSuppliers': '3',
+        'sellers': {'1': {'name': 'Test Supplier1'}}
+    },
+    'published_at': pendulum.yesterday(tz='Australia/Sydney').format('%Y-%m-%d')
+}
+
+
+def login(client, email_address, password):
+    res = client.post('/2/login', data=json.dumps({
+        'emailAddress': email_address, 'password': password
+    }), content_type='application/json')
+    assert res.status_code == 200
+
+
+def get_brief(app, client):
+    with app.app_context():
+        with QueryCounter(db.engine) as queries:
+            res = client.get('/2/brief/1', content_type='application/json')
+
+    assert res.status_code == 200
+    return json.loads(res.get_data(as_text=True)), queries
+
+
+@pytest.mark.parametrize('specialist_brief', [brief_params], indirect=True)
+def test_anonymous_brief_view_query_budget(app, client, specialist_brief):
+    data, queries = get_brief(app, client)
+
+    assert queries.count <= ANONYMOUS_QUERY_BUDGET
+    assert data['brief']['sellers'] == {}
+    assert data['invited_seller_count'] == 1
+    assert data['supplier_brief_response_count'] == 0
+    assert not data['is_buyer'] and not data['can_respond']
+
+
+@pytest.mark.parametrize('specialist_brief', [brief_params], indirect=True)
+def test_buyer_brief_view_query_budget(app, client, specialist_brief):
+    login(client, 'me@digital.gov.au', 'test')
+    data, queries = get_brief(app, client)
+
+    assert queries.count <= BUYER_QUERY_BUDGET
+    assert data['is_buyer'] and data['is_brief_owner']
+    assert data['brief']['sellers'] == brief_params['data']['sellers']
+    assert data['brief']['contactEmail']
+    with app.app_context():
+        assert data['domains'] == [
+            {'id': str(domain.id), 'name': domain.name} for domain in domain_service.get_active_domains()
+        ]
+
+
+@pytest.mark.parametrize('specialist_brief', [brief_params], indirect=True)
+def test_seller_brief_view_query_budget(app, client, specialist_brief, supplier_user, supplier_domains):
+    with app.app_context():
+        db.session.add(BriefResponse(id=1, brief_id=1, supplier_code=supplier_user.supplier_code, data={}))
+        db.session.add(BriefResponse(id=2, brief_id=1, supplier_code=2, data={}, submitted_at=pendulum.now()))
+        db.session.commit()
+
+    login(client, 'j@examplecompany.biz', 'testpassword')
+    data, queries = get_brief(app, client)
+
+    assert queries.count <= SELLER_QUERY_BUDGET
+    assert data['brief_response_count'] == 1
+    assert data['supplier_brief_response_count'] == 1
+    assert data['supplier_brief_response_count_draft'] == 1
+    assert data['supplier_brief_response_count_submitted'] == 0
+    assert data['supplier_brief_response_id'] == 1
+    assert data['supplier_brief_response_is_draft'] is True
+    assert data['has_responded'] is False
+    assert data['is_invited'] is True
+
+
+@pytest.mark.parametrize('specialist_brief', [brief_params], indirect=True)
+def test_seller_brief_view_loads_each_user_status_fact_once(app, client, specialist_brief, supplier_user,
+                                                            supplier_domains, monkeypatch):
+    login(client, 'j@examplecompany.biz', 'testpassword')
+    memoised, memoised_queries = get_brief(app, client)
+
+    monkeypatch.setattr(BriefUserStatus, 'fact', lambda self, name, load: load())
+    unmemoised, unmemoised_queries = get_brief(app, client)
+
+    assert memoised == unmemoised
+    # the latest evidence alone was read five times, once for each evidence question
+    assert unmemoised_queries.count - memoised_queries.count >= 4
+    assert memoised_queries.count <= SELLER_QUERY_BUDGET
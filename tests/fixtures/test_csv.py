@@ -1,7 +1,9 @@
 # coding: utf-8
 
 import pytest
-from app.api.csv import generate_brief_responses_csv
+from collections import OrderedDict
+
+from app.api.csv import generate_brief_responses_csv, stream_csv
 
 brief_response_data_1 = {
     "supplierName": "K,ev’s \"Bu,tties",
@@ -294,3 +296,29 @@ def test_csv_specialist_hourly_rate(app, briefs, brief_responses):
         u'Queensland Labour hire licence expiry,'
     ]
     assert csvdata.splitlines() == lines
+
+
+def test_stream_csv_yields_rows_in_chunks():
+    def row(r):
+        return OrderedDict([('opportunity_id', r), ('title', u'Brief, {}'.format(r))])
+
+    consumed = []
+
+    def rows():
+        for i in range(1, 6):
+            consumed.append(i)
+            yield i
+
+    chunks = stream_csv(rows(), row, rows_per_chunk=2)
+
+    assert next(chunks).splitlines() == [u'Opportunity id,title', u'1,"Brief, 1"', u'2,"Brief, 2"']
+    assert consumed == [1, 2]
+    assert u''.join(chunks).splitlines() == [
+        u'3,"Brief, 3"',
+        u'4,"Brief, 4"',
+        u'5,"Brief, 5"'
+    ]
+
+
+def test_stream_csv_with_no_rows():
+    assert u''.join(stream_csv([], lambda r: r)).strip() == u''
@@ -0,0 +1,84 @@
+import pytest
+
+from app import cache
+from app.api.services import domain_service
+from app.caching import process_cached_version_key
+from app.models import Domain, SupplierDomain, db
+from dmutils.data_tools import ValidationError
+from tests.app.helpers import QueryCounter
+
+
+def test_loading_a_domain_does_not_join_supplier_domains(app, supplier_domains):
+    with app.app_context():
+        with QueryCounter(db.engine) as queries:
+            domain = Domain.query.get(1)
+            assert domain.name
+
+        assert queries.count == 1
+        assert 'supplier_domain' not in queries.statements[0]
+
+
+def test_get_by_name_or_id_is_served_from_the_domain_cache(app, supplier_domains):
+    with app.app_context():
+        with QueryCounter(db.engine) as queries:
+            by_id = Domain.get_by_name_or_id(1)
+            by_name = Domain.get_by_name_or_id(by_id.name.upper())
+            for _ in range(10):
+                Domain.get_by_name_or_id(2)
+                domain_service.get_by_name_or_id(3)
+
+        assert queries.count == 1
+        assert by_name is by_id
+        assert by_id.price_maximum == db.session.query(Domain.price_maximum).filter(Domain.id == 1).scalar()
+
+        with pytest.raises(ValidationError):
+            Domain.get_by_name_or_id('not a domain')
+        assert domain_service.get_by_name_or_id(999) is None
+
+        # relationships are still there when asked for
+        assert len(by_id.suppliers) == len(SupplierDomain.query.filter(SupplierDomain.domain_id == 1).all())
+
+
+def test_domain_cache_cleared_when_a_domain_changes(app, domains):
+    with app.app_context():
+        domain = Domain.get_by_name_or_id(1)
+        domain.price_maximum = 12345
+        db.session.commit()
+
+        assert Domain.get_by_name_or_id(1).price_maximum == 12345
+
+
+def test_lookups_return_the_domain_already_in_the_session(app, domains):
+    with app.app_context():
+        domain = Domain.query.get(1)
+        domain.price_maximum = 12345
+
+        assert Domain.get_by_name_or_id(1) is domain
+        assert domain_service.get_by_name_or_id(domain.name) is domain
+        db.session.commit()
+
+        assert Domain.query.get(1).price_maximum == 12345
+
+
+def test_rolled_back_domain_changes_are_not_cached(app, domains):
+    with app.app_context():
+        domain = Domain.get_by_name_or_id(1)
+        price_maximum = domain.price_maximum
+        domain.price_maximum = 12345
+        db.session.flush()
+        db.session.rollback()
+
+        assert Domain.get_by_name_or_id(1).price_maximum == price_maximum
+
+
+def test_domain_cache_is_reloaded_after_another_process_commits_a_change(app, domains):
+    with app.app_context():
+        assert Domain.get_by_name_or_id(1).price_maximum != 12345
+
+        # what a domain write committed in another process leaves behind
+        table = Domain.__table__
+        db.engine.execute(table.update().where(table.c.id == 1).values(price_maximum=12345))
+        cache.delete(process_cached_version_key('domains'))
+
+    with app.app_context():
+        assert Domain.get_by_name_or_id(1).price_maximum == 12345
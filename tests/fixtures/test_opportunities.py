@@ -1,6 +1,7 @@
 import json
 import pytest
 from datetime import date
+from app.models import Brief, db
 from tests.app.helpers import COMPLETE_DIGITAL_SPECIALISTS_BRIEF
 
 briefs_data_all_sellers = COMPLETE_DIGITAL_SPECIALISTS_BRIEF.copy()
@@ -302,3 +303,30 @@ def test_opportunities_success_location(client, briefs):
     data = json.loads(res.get_data(as_text=True))
     assert 'opportunities' in data
     assert len(data['opportunities']) == 5
+
+
+def test_opportunities_not_modified_for_matching_etag(client, briefs):
+    res = client.get('/2/opportunities?statusFilters=live')
+    assert res.status_code == 200
+    etag = res.headers['ETag']
+
+    res = client.get('/2/opportunities?statusFilters=live', headers={'If-None-Match': etag})
+    assert res.status_code == 304
+
+    res = client.get('/2/opportunities?statusFilters=closed', headers={'If-None-Match': etag})
+    assert res.status_code == 200
+
+
+def test_opportunities_cache_cleared_when_brief_withdrawn(app, client, briefs):
+    res = client.get('/2/opportunities?statusFilters=live')
+    etag = res.headers['ETag']
+    assert len(json.loads(res.get_data(as_text=True))['opportunities']) == 5
+
+    with app.app_context():
+        brief = Brief.query.get(1)
+        brief.status = 'withdrawn'
+        db.session.commit()
+
+    res = client.get('/2/opportunities?statusFilters=live', headers={'If-None-Match': etag})
+    assert res.status_code == 200
+    assert len(json.loads(res.get_data(as_text=True))['opportunities']) == 4
@@ -0,0 +1,159 @@
+import pendulum
+import pytest
+from sqlalchemy.orm.attributes import flag_modified
+
+from app import cache
+from app.api.services import seller_dashboard_service
+from app.api.services.seller_dashboard import seller_dashboard_cache_key
+from app.models import (Brief, BriefInvitedSupplier, BriefResponse, Framework,
+                        Lot, db)
+from tests.app.helpers import COMPLETE_SPECIALIST_BRIEF, QueryCounter
+
+SELLER = 1
+
+
+def add_brief(brief_id, published_days_ago, closes_in_days, sellers=None):
+    data = COMPLETE_SPECIALIST_BRIEF.copy()
+    data['title'] = 'Brief {}'.format(brief_id)
+    data['sellers'] = {str(code): {'name': 'Test Supplier{}'.format(code)} for code in sellers or []}
+    brief = Brief(
+        id=brief_id,
+        data=data,
+        framework=Framework.query.filter(Framework.slug == 'digital-marketplace').first(),
+        lot=Lot.query.filter(Lot.slug == 'specialist').first(),
+        published_at=pendulum.now('UTC').subtract(days=published_days_ago)
+    )
+    brief.closed_at = pendulum.now('UTC').add(days=closes_in_days)
+    db.session.add(brief)
+    db.session.flush()
+
+
+def add_response(response_id, brief_id, supplier_code=SELLER, submitted=True):
+    db.session.add(BriefResponse(
+        id=response_id,
+        brief_id=brief_id,
+        supplier_code=supplier_code,
+        submitted_at=pendulum.now('UTC') if submitted else None,
+        data={}
+    ))
+
+
+@pytest.fixture()
+def dashboard_briefs(app, suppliers):
+    with app.app_context():
+        add_brief(1, published_days_ago=10, closes_in_days=5, sellers=[SELLER, 2])
+        add_brief(2, published_days_ago=30, closes_in_days=-10)
+        add_brief(3, published_days_ago=100, closes_in_days=-80, sellers=[SELLER])
+        add_brief(4, published_days_ago=5, closes_in_days=10)
+        add_brief(5, published_days_ago=40, closes_in_days=-20, sellers=[2])
+        add_response(1, 2)
+        add_response(2, 2)
+        add_response(3, 3)
+        add_response(4, 4, submitted=False)
+        add_response(5, 5, supplier_code=2)
+        db.session.commit()
+        yield Brief.query.all()
+
+
+def test_invited_suppliers_are_kept_with_the_brief_data(app, dashboard_briefs):
+    with app.app_context():
+        rows = db.session.query(BriefInvitedSupplier.brief_id, BriefInvitedSupplier.supplier_code)
+        assert sorted(rows.all()) == [(1, 1), (1, 2), (3, 1), (5, 2)]
+
+        brief = Brief.query.get(1)
+        brief.data['sellers'] = {'3': {'name': 'Test Supplier3'}}
+        flag_modified(brief, 'data')
+        db.session.commit()
+
+        assert sorted(rows.filter(BriefInvitedSupplier.brief_id == 1).all()) == [(1, 3)]
+
+
+def summary(opportunities):
+    return [(o['briefId'], o['responseCount'], o['draftResponseCount']) for o in opportunities]
+
+
+def test_opportunities_list_open_then_recently_closed_briefs(app, dashboard_briefs):
+    with app.app_context():
+        opportunities = seller_dashboard_service.get_opportunities(SELLER)
+        assert summary(opportunities) == [(1, None, None), (4, None, 1), (2, 2, None)]
+        assert opportunities[0]['name'] == 'Brief 1'
+        assert opportunities[0]['lot'] == 'specialist'
+        assert opportunities[2]['briefResponseId'] == 2
+
+        opportunities = seller_dashboard_service.get_opportunities(2)
+        assert summary(opportunities) == [(1, None, None), (5, 1, None)]
+        assert opportunities[1]['briefResponseId'] == 5
+
+        assert seller_dashboard_service.get_opportunities(3) == []
+
+
+def test_opportunities_are_served_from_the_cache(app, dashboard_briefs):
+    with app.app_context():
+        opportunities = seller_dashboard_service.get_opportunities(SELLER)
+
+        with QueryCounter(db.engine) as queries:
+            for _ in range(10):
+                assert seller_dashboard_service.get_opportunities(SELLER) == opportunities
+
+        assert queries.count == 0
+
+
+def test_cache_is_cleared_when_a_response_changes(app, dashboard_briefs):
+    with app.app_context():
+        seller_dashboard_service.get_opportunities(SELLER)
+        seller_dashboard_service.get_opportunities(2)
+
+        add_response(6, 1)
+        db.session.commit()
+
+        assert cache.get(seller_dashboard_cache_key(SELLER)) is None
+        assert cache.get(seller_dashboard_cache_key(2)) is not None
+        assert seller_dashboard_service.get_opportunities(SELLER)[0]['responseCount'] == 1
+
+        response = BriefResponse.query.get(6)
+        response.withdrawn_at = pendulum.now('UTC')
+        db.session.commit()
+
+        assert seller_dashboard_service.get_opportunities(SELLER)[0]['responseCount'] is None
+        # the brief's response counters moved, but that doesn't change the other invited seller's dashboard
+        assert Brief.query.get(1).responses_withdrawn_count == 1
+        assert cache.get(seller_dashboard_cache_key(2)) is not None
+
+
+def test_cache_is_cleared_for_sellers_uninvited_from_a_brief(app, dashboard_briefs):
+    with app.app_context():
+        assert 1 in [o['briefId'] for o in seller_dashboard_service.get_opportunities(SELLER)]
+
+        brief = Brief.query.get(1)
+        brief.data['sellers'] = {'2': {'name': 'Test Supplier2'}}
+        flag_modified(brief, 'data')
+        db.session.commit()
+
+        assert 1 not in [o['briefId'] for o in seller_dashboard_service.get_opportunities(SELLER)]
+        assert summary(seller_dashboard_service.get_opportunities(SELLER)) == [(4, None, 1), (2, 2, None)]
+
+
+def test_cache_is_cleared_for_sellers_invited_to_a_deleted_brief(app, dashboard_briefs):
+    with app.app_context():
+        assert 1 in [o['briefId'] for o in seller_dashboard_service.get_opportunities(SELLER)]
+        assert 1 in [o['briefId'] for o in seller_dashboard_service.get_opportunities(2)]
+
+        db.session.delete(Brief.query.get(1))
+        db.session.commit()
+
+        assert cache.get(seller_dashboard_cache_key(SELLER)) is None
+        assert cache.get(seller_dashboard_cache_key(2)) is None
+        assert summary(seller_dashboard_service.get_opportunities(SELLER)) == [(4, None, 1), (2, 2, None)]
+        assert summary(seller_dashboard_service.get_opportunities(2)) == [(5, 1, None)]
+
+
+def test_unchanged_briefs_do_not_query_for_sellers(app, dashboard_briefs):
+    with app.app_context():
+        brief = Brief.query.get(1)
+        brief.withdrawn_at = None
+        assert brief in db.session.dirty
+
+        with QueryCounter(db.engine) as queries:
+            db.session.flush()
+
+        assert not any('brief_invited_supplier' in statement for statement in queries.statements)
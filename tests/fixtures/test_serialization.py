@@ -0,0 +1,70 @@
+from __future__ import print_function
+
+import pytest
+
+from app.models import Application, Brief, Supplier
+from tests.app.helpers import best_of
+
+
+def test_serialized_brief_links_itself_and_its_foreign_keys(app, briefs):
+    with app.test_request_context('/'):
+        brief = Brief.query.get(1)
+        data = brief.serializable
+
+        assert data['id'] == 1
+        assert data['sellerCategory'] == 1
+        assert data['createdAt'] == data['created_at']
+        assert data['links']['self'] == 'http://localhost/briefs/1'
+        assert data['links']['framework'] == 'http://localhost/frameworks/{}'.format(brief.framework.id)
+        assert data['links']['lot'] == 'http://localhost/lots/{}'.format(brief.lot.id)
+        assert data['framework']['slug'] == 'digital-marketplace'
+        assert data['lot']['slug'] == 'specialist'
+        assert set(u['id'] for u in data['users']) == set(u.id for u in brief.users)
+        assert 'dates' in data
+
+
+def test_serialized_supplier_leaves_out_excluded_relationships(app, suppliers):
+    with app.test_request_context('/'):
+        supplier = Supplier.query.filter(Supplier.code == 1).one()
+        data = supplier.serializable
+
+        assert data['links']['self'] == 'http://localhost/suppliers/{}'.format(supplier.id)
+        assert data['supplierCode'] == 1
+        assert data['contact_email'] == 'test1@supplier.com'
+        assert data['representative'] == 'auth rep'
+        assert [c['name'] for c in data['contacts']] == ['auth rep']
+        assert len(data['frameworks']) == 1
+        for relationship in ['work_orders', 'applications', 'brief_responses']:
+            assert relationship not in data
+
+
+def test_serialized_application_without_a_supplier(app, applications):
+    with app.test_request_context('/'):
+        data = Application.query.get(1).serializable
+
+        assert data['abn'] == '123456'
+        assert data['createdAt'] == data['created_at']
+        assert data['supplier'] is None
+        assert data['links'] == {'self': 'http://localhost/applications/1'}
+
+
+def test_links_outside_a_request_are_relative(app, briefs):
+    with app.app_context():
+        assert Brief.query.get(1).serializable['links']['self'] == '/briefs/1'
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize('model, fixture', [
+    (Supplier, 'suppliers'),
+    (Brief, 'briefs'),
+    (Application, 'applications')
+])
+def test_serialization_speed(app, request, model, fixture):
+    request.getfixturevalue(fixture)
+    with app.test_request_context('/'):
+        objects = model.query.order_by(model.id).all()
+        # load relationships up front so the timing is serialization rather than lazy loads
+        [o.serializable for o in objects]
+
+        elapsed = best_of(lambda: [o.serializable for o in objects])
+        print('{}: {:.3f}ms per page of {}'.format(model.__name__, elapsed * 1000, len(objects)))
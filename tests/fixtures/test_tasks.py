@@ -1,6 +1,9 @@
+import json
+import zipfile
 from datetime import date, timedelta
 from os import environ
 
+import botocore.exceptions
 import pytest
 from flask import current_app
 from mock.mock import MagicMock
@@ -8,17 +11,23 @@ from requests.exceptions import RequestException
 
 from app import db
 from app.api.services import AuditTypes as audit_types
-from app.models import (Application, Assessment, AuditEvent, Supplier,
-                        SupplierDomain)
+from app.models import (Application, Assessment, AuditEvent, Brief, KeyValue,
+                        Supplier, SupplierDomain, User, utcnow)
 from app.tasks.jira import sync_application_approvals_with_jira
-from app.tasks.mailchimp import (MailChimpConfigException,
+from app.tasks.mailchimp import (LocalMailChimp, MailChimpConfigException,
+                                 add_members_to_list,
                                  send_document_expiry_campaign,
                                  send_document_expiry_reminder,
                                  send_labour_hire_expiry_reminder,
                                  send_labour_hire_licence_expiry_campaign,
                                  send_new_briefs_email,
                                  sync_mailchimp_seller_list)
-from app.tasks.s3 import CreateResponsesZipException, create_responses_zip
+import app.emails.briefs as email_briefs
+from app.emails.briefs import send_opportunity_withdrawn_email_to_sellers
+from app.tasks import publish_tasks
+from app.tasks.email import LocalEmailClient, send_bulk_email
+from app.tasks.s3 import (CreateResponsesZipException, ResponsesZipUnavailableException,
+                          create_responses_zip, queue_responses_zip)
 from dmapiclient.audit import AuditTypes
 from tests.app.helpers import (COMPLETE_DIGITAL_SPECIALISTS_BRIEF,
                                INCOMING_APPLICATION_DATA)
@@ -65,6 +74,88 @@ def test_sync_mailchimp_seller_list_success(app, mocker, suppliers, supplier_dom
         })
 
 
+@pytest.mark.parametrize('suppliers', [{'framework_slug': 'digital-marketplace'}], indirect=True)
+@pytest.mark.parametrize(
+    'users',
+    [{'framework_slug': 'digital-marketplace', 'user_role': 'supplier', 'email_domain': 'supplier.com'}],
+    indirect=True
+)
+def test_sync_mailchimp_seller_list_only_considers_changes_after_a_full_sync(app, mocker, suppliers,
+                                                                             supplier_domains, users):
+    client = LocalMailChimp()
+    mocker.patch('app.tasks.mailchimp.get_client', return_value=client)
+    all_members = mocker.spy(client.lists.members, 'all')
+    update_members = mocker.spy(client.lists, 'update_members')
+    expected = set([x.data['contact_email'].lower() for x in suppliers] + [x.email_address.lower() for x in users])
+
+    with app.app_context():
+        environ['MAILCHIMP_SELLER_LIST_ID'] = '123456'
+
+        sync_mailchimp_seller_list()
+        assert set(client.lists.members_by_list['123456'].keys()) == expected
+        assert all_members.call_count == 1
+
+        sync_mailchimp_seller_list()
+        assert all_members.call_count == 1
+        assert update_members.call_count == 1
+
+        db.session.add(User(
+            email_address='New.Seller@supplier.com',
+            name='New seller',
+            password='test',
+            active=True,
+            role='supplier',
+            supplier_code=suppliers[0].code,
+            password_changed_at=utcnow()
+        ))
+        db.session.commit()
+
+        sync_mailchimp_seller_list()
+        assert all_members.call_count == 1
+        update_members.assert_called_with(list_id='123456', data={
+            'members': [{'email_address': 'new.seller@supplier.com', 'status': 'subscribed'}]
+        })
+
+        sync_mailchimp_seller_list(full=True)
+        assert all_members.call_count == 2
+        assert set(client.lists.members_by_list['123456'].keys()) == expected | {'new.seller@supplier.com'}
+
+
+@pytest.mark.parametrize('suppliers', [{'framework_slug': 'digital-marketplace'}], indirect=True)
+@pytest.mark.parametrize(
+    'users',
+    [{'framework_slug': 'digital-marketplace', 'user_role': 'supplier', 'email_domain': 'supplier.com'}],
+    indirect=True
+)
+def test_full_sync_adds_only_missing_addresses_to_a_large_list(app, mocker, suppliers, supplier_domains, users):
+    client = LocalMailChimp()
+    mocker.patch('app.tasks.mailchimp.get_client', return_value=client)
+    update_members = mocker.spy(client.lists, 'update_members')
+    expected = [x.data['contact_email'].lower() for x in suppliers] + [x.email_address.lower() for x in users]
+    members = dict(('member{}@example.com'.format(i), str(i)) for i in range(20000))
+    members.update((address, address) for address in expected[::2])
+    client.lists.members_by_list['123456'] = members
+
+    with app.app_context():
+        environ['MAILCHIMP_SELLER_LIST_ID'] = '123456'
+        sync_mailchimp_seller_list(full=True)
+
+    added = [m['email_address'] for call in update_members.call_args_list for m in call[1]['data']['members']]
+    assert sorted(added) == sorted(set(expected) - set(expected[::2]))
+    assert set(expected) <= set(client.lists.members_by_list['123456'].keys())
+
+
+def test_add_members_to_list_sends_batches_of_the_most_mailchimp_accepts(app):
+    client = LocalMailChimp()
+    addresses = ['seller{}@example.com'.format(i) for i in range(1200)]
+
+    with app.app_context():
+        responses = add_members_to_list(client, '123456', addresses)
+
+    assert [len(r['new_members']) for r in responses] == [500, 500, 200]
+    assert not any(r['errors'] for r in responses)
+
+
 def test_sync_mailchimp_seller_list_fails_mailchimp_api_call_with_requests_error(app, mocker):
     mailchimp = mocker.patch('app.tasks.mailchimp.MailChimp')
     requestEx = mocker.patch('app.tasks.mailchimp.RequestException')
@@ -240,6 +331,38 @@ def test_create_responses_zip_success(app, briefs, brief_responses, mocker):
         assert bucket.upload_fileobj.called
 
 
+@pytest.mark.parametrize('brief_responses', [{'data': brief_response_data}], indirect=True)
+def test_create_responses_zip_from_local_bucket(app, briefs, brief_responses, monkeypatch, tmpdir):
+    monkeypatch.setenv('S3_LOCAL_PATH', str(tmpdir))
+    documents = tmpdir.mkdir('digital-marketplace').mkdir('documents').mkdir('brief-1').mkdir('supplier-1')
+    documents.join('attachment_1.pdf').write('first')
+    documents.join('attachment_2.pdf').write('second' * 1000)
+
+    with app.app_context():
+        create_responses_zip(1)
+
+        archive = tmpdir.join('digital-marketplace', 'archives', 'brief-1', 'brief-1-resumes.zip')
+        with zipfile.ZipFile(str(archive)) as zf:
+            assert zf.read('opportunity-1-documents/Test_Supplier1/attachment_1.pdf') == 'first'
+            assert zf.read('opportunity-1-documents/Test_Supplier1/attachment_2.pdf') == 'second' * 1000
+
+        brief = Brief.query.get(1)
+        assert brief.responses_zip_filesize == archive.size()
+
+
+@pytest.mark.parametrize('brief_responses', [{'data': brief_response_data}], indirect=True)
+def test_create_responses_zip_fails_when_a_file_is_missing(app, briefs, brief_responses, monkeypatch, tmpdir):
+    monkeypatch.setenv('S3_LOCAL_PATH', str(tmpdir))
+
+    with app.app_context():
+        with pytest.raises(CreateResponsesZipException) as e:
+            create_responses_zip(1)
+
+        assert str(e.value) == (
+            'The file "digital-marketplace/documents/brief-1/supplier-1/attachment_1.pdf" failed to download'
+        )
+
+
 brief_response_data = {
     'attachedDocumentURL': []
 }
@@ -265,6 +388,81 @@ def test_create_responses_zip_fails_when_no_responses(app, briefs, mocker):
             assert str(e) == 'There were no respones for brief id 1'
 
 
+@pytest.mark.parametrize('brief_responses', [{'data': {'attachedDocumentURL': ['attachment_1.pdf']}}], indirect=True)
+def test_create_responses_zip_records_its_progress_and_is_not_rebuilt(app, briefs, brief_responses, monkeypatch,
+                                                                      tmpdir):
+    monkeypatch.setenv('S3_LOCAL_PATH', str(tmpdir))
+    tmpdir.mkdir('digital-marketplace').mkdir('documents').mkdir('brief-1').mkdir('supplier-1') \
+        .join('attachment_1.pdf').write('first')
+    archive = tmpdir.join('digital-marketplace', 'archives', 'brief-1', 'brief-1-resumes.zip')
+
+    with app.app_context():
+        create_responses_zip(1)
+
+        status = Brief.query.get(1).serialize_responses_zip()
+        assert status['status'] == 'done'
+        assert status['size'] == archive.size()
+        assert status['queuedAt'] and status['startedAt'] and status['finishedAt']
+        assert status['duration'] >= 0
+
+        archive.remove()
+        create_responses_zip(1)
+        assert not archive.check()
+
+        create_responses_zip(1, force=True)
+        assert archive.check()
+
+
+@pytest.mark.parametrize('brief_responses', [{'data': {'attachedDocumentURL': ['missing.pdf']}}], indirect=True)
+def test_create_responses_zip_records_failure(app, briefs, brief_responses, monkeypatch, tmpdir):
+    monkeypatch.setenv('S3_LOCAL_PATH', str(tmpdir))
+
+    with app.app_context():
+        with pytest.raises(CreateResponsesZipException):
+            create_responses_zip(1)
+
+        brief = Brief.query.get(1)
+        assert brief.responses_zip_status == 'failed'
+        assert brief.responses_zip_filesize is None
+        assert brief.responses_zip_finished_at
+
+
+def test_responses_zip_of_a_brief_without_responses_is_not_retried(app, briefs, mocker):
+    with app.app_context():
+        with pytest.raises(ResponsesZipUnavailableException):
+            create_responses_zip(1)
+        assert Brief.query.get(1).responses_zip_status == 'unavailable'
+
+        task = mocker.patch('app.tasks.s3.create_responses_zip')
+        assert not queue_responses_zip(1)
+        assert queue_responses_zip(1, force=True)
+        assert task.delay.call_count == 1
+
+
+def test_queue_responses_zip_only_queues_a_brief_once(app, briefs, mocker):
+    task = mocker.patch('app.tasks.s3.create_responses_zip')
+
+    with app.app_context():
+        assert queue_responses_zip(1)
+        assert not queue_responses_zip(1)
+        assert task.delay.call_count == 1
+        assert Brief.query.get(1).responses_zip_status == 'queued'
+
+        # a job that has sat queued past the stale limit is taken to have been lost
+        brief = Brief.query.get(1)
+        brief.responses_zip_queued_at = utcnow().subtract(minutes=current_app.config['RESPONSES_ZIP_STALE_MINUTES'] + 1)
+        db.session.commit()
+        assert queue_responses_zip(1)
+        assert task.delay.call_count == 2
+
+        brief = Brief.query.get(1)
+        brief.responses_zip_status = 'done'
+        db.session.commit()
+        assert not queue_responses_zip(1)
+        assert queue_responses_zip(1, force=True)
+        task.delay.assert_called_with(1, force=True)
+
+
 @pytest.fixture
 def mock_jira_application_response(mocker):
     marketplace_jira = MagicMock()
@@ -645,3 +843,117 @@ def test_licence_expiry_campaign_adds_audit_event_on_success(expiry_date, mocker
     assert audit_event.data['campaign_title'] == ('Expiring labour hire licence - {}'
                                                   .format(date.today().isoformat()))
     assert audit_event.data['sellers'] == suppliers_service.get_suppliers_with_expiring_labour_hire_licences()
+
+
+def test_publish_reuses_config_and_client(app, mocker):
+    boto3 = mocker.patch('app.aws.boto3')
+    mocker.patch.dict('app.aws._clients', clear=True)
+    from app.api.services import key_values_service, publish
+    get_by_keys = mocker.spy(key_values_service, 'get_by_keys')
+
+    with app.app_context():
+        db.session.add(KeyValue('aws_sns', {'aws_sns_region': 'ap-southeast-2', 'aws_sns_topicarn': 'arn'}))
+        db.session.commit()
+
+        publish._config_expires_at = 0
+        published = publish.stats['published']
+        publish.supplier({'code': 1}, 'updated')
+        publish.supplier({'code': 2}, 'updated')
+
+        assert get_by_keys.call_count == 1
+        assert boto3.client.call_count == 1
+        assert boto3.client.return_value.publish.call_count == 2
+        assert publish.stats['published'] == published + 2
+
+
+def test_publish_tasks_are_coalesced_in_a_batch(app, mocker):
+    send_task = mocker.patch('celery.app.task.Task.delay')
+    publish_batch = mocker.patch('app.tasks.publish_tasks.publish_batch')
+
+    with app.app_context():
+        with publish_tasks.batched():
+            publish_tasks.supplier.delay({'code': 1}, 'updated')
+            with publish_tasks.batched():
+                publish_tasks.brief.delay({'id': 1}, 'published', name='test')
+
+        assert not send_task.called
+        publish_batch.delay.assert_called_once_with([
+            ('supplier', ({'code': 1}, 'updated'), {}),
+            ('brief', ({'id': 1}, 'published'), {'name': 'test'})
+        ])
+
+
+def test_publish_batch_publishes_each_event(app, mocker):
+    publish = mocker.patch('app.tasks.publish_tasks.publish')
+    publish.events_per_second = None
+
+    with app.app_context():
+        publish_tasks.publish_batch([
+            ['supplier', [{'code': 1}, 'updated'], {}],
+            ['brief', [{'id': 1}, 'published'], {'name': 'test'}]
+        ])
+
+    publish.supplier.assert_called_once_with({'code': 1}, 'updated')
+    publish.brief.assert_called_once_with({'id': 1}, 'published', name='test')
+
+
+def test_send_bulk_email_sends_each_address_its_own_message(app, monkeypatch, tmpdir):
+    monkeypatch.setenv('SES_LOCAL_PATH', str(tmpdir))
+    addresses = ['seller{}@example.com'.format(i) for i in range(25)]
+
+    with app.app_context():
+        app.config['DM_EMAIL_BULK_CONCURRENCY'] = 4
+        result = send_bulk_email(addresses, '<p>body</p>', 'subject', 'no-reply@example.com', 'Marketplace')
+
+    assert result == {'sent': 25, 'failed': []}
+    messages = [json.loads(f.read()) for f in tmpdir.listdir()]
+    assert sorted(m['Destination']['ToAddresses'][0] for m in messages) == sorted(addresses)
+    assert all(len(m['Destination']['ToAddresses']) == 1 for m in messages)
+    assert all(m['Message']['Body']['Html']['Data'] == '<p>body</p>' for m in messages)
+
+
+def test_send_bulk_email_reports_failed_addresses_and_sends_the_rest(app, mocker, tmpdir):
+    class RejectingEmailClient(LocalEmailClient):
+        def send_email(self, **message):
+            if message['Destination']['ToAddresses'][0].startswith('unverified'):
+                raise botocore.exceptions.ClientError(
+                    {'Error': {'Code': 'MessageRejected', 'Message': 'Email address is not verified.'}},
+                    'SendEmail'
+                )
+            return super(RejectingEmailClient, self).send_email(**message)
+
+    mocker.patch('app.tasks.email.get_email_client', return_value=RejectingEmailClient(str(tmpdir)))
+    mocker.patch('app.tasks.email.rollbar')
+
+    with app.app_context():
+        result = send_bulk_email(
+            ['a@example.com', 'unverified@example.com', 'b@example.com'],
+            'body', 'subject', 'no-reply@example.com', 'Marketplace'
+        )
+
+    assert result == {'sent': 2, 'failed': ['unverified@example.com']}
+    assert len(tmpdir.listdir()) == 2
+
+
+def test_seller_notifications_are_rendered_once_and_queued_in_batches(app, briefs, mocker):
+    send_bulk_email = mocker.patch('app.emails.util.send_bulk_email')
+    render = mocker.spy(email_briefs, 'render_email_template')
+    addresses = ['seller{}@example.com'.format(i) for i in range(5)]
+
+    with app.app_context():
+        app.config['SEND_EMAILS'] = True
+        app.config['DM_EMAIL_BULK_BATCH_SIZE'] = 2
+        brief = Brief.query.get(1)
+        brief.data['reasonToWithdraw'] = 'No longer needed'
+
+        send_opportunity_withdrawn_email_to_sellers(brief, set(addresses), 'Digital Transformation Agency')
+
+        assert render.call_count == 1
+        batches = [c[0][0] for c in send_bulk_email.delay.call_args_list]
+        assert [len(b) for b in batches] == [2, 2, 1]
+        assert sorted(sum(batches, [])) == addresses
+
+        events = AuditEvent.query.filter(
+            AuditEvent.type == audit_types.sent_opportunity_withdrawn_email_to_seller.value
+        ).all()
+        assert sorted(e.data['to_addresses'] for e in events) == addresses